@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import threading
+import time
+
+from utils import video_key
+from clipper import AUDIO_ONLY_FORMATS
+
+DOWNLOAD_ARCHIVE_FILE = 'download_archive.db'
+
+
+def _dir_key(save_path):
+    return os.path.normcase(os.path.abspath(save_path))
+
+
+def _quality_key(fmt, quality):
+    # 음성 전용 형식은 화질 구분 없이 기록
+    return '-' if fmt in AUDIO_ONLY_FORMATS else quality
+
+
+# --- 다운로드 기록 ---
+class DownloadArchive:
+    """
+    (영상 ID, 저장 폴더, 형식, 화질)별로 이미 받은 파일을 기록하는 SQLite 저장소.
+    대량 추가 시 네트워크 요청 없이 이미 받은 영상을 건너뛰는 데 사용한다.
+    기록된 파일이 지워졌으면 받은 적 없는 것으로 보고 기록도 지운다.
+    """
+
+    def __init__(self, path=DOWNLOAD_ARCHIVE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive (
+                video_id TEXT NOT NULL,
+                save_dir TEXT NOT NULL,
+                format TEXT NOT NULL,
+                quality TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                downloaded REAL NOT NULL,
+                PRIMARY KEY (video_id, save_dir, format, quality)
+            )
+        """)
+        self._conn.commit()
+
+    def _key(self, url, save_path, fmt, quality):
+        return (video_key(url), _dir_key(save_path), fmt, _quality_key(fmt, quality))
+
+    def record(self, url, save_path, fmt, quality, file_path):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO archive VALUES (?, ?, ?, ?, ?, ?)",
+                               self._key(url, save_path, fmt, quality) + (file_path, time.time()))
+            self._conn.commit()
+
+    def lookup(self, url, save_path, fmt, quality):
+        """이미 받은 파일 경로. 기록이 없거나 파일이 지워졌으면 None"""
+        key = self._key(url, save_path, fmt, quality)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_path FROM archive WHERE video_id = ? AND save_dir = ? AND format = ? AND quality = ?",
+                key).fetchone()
+            if row is None:
+                return None
+            if not os.path.exists(row[0]):
+                self._conn.execute(
+                    "DELETE FROM archive WHERE video_id = ? AND save_dir = ? AND format = ? AND quality = ?", key)
+                self._conn.commit()
+                return None
+        return row[0]
+
+    def pending_outputs(self, url, save_path, outputs):
+        """outputs([(형식, 화질)]) 중 이 폴더에 아직 받지 않은 것"""
+        return [output for output in outputs if not self.lookup(url, save_path, *output)]
+
+    def files(self, url):
+        """영상 하나를 받아 둔 모든 파일 [(형식, 화질, 경로)] (폴더 무관, 지워진 파일 제외)"""
+        vid = video_key(url)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT save_dir, format, quality, file_path FROM archive WHERE video_id = ?", (vid,)).fetchall()
+            missing = [row for row in rows if not os.path.exists(row[3])]
+            for save_dir, fmt, quality, _ in missing:
+                self._conn.execute(
+                    "DELETE FROM archive WHERE video_id = ? AND save_dir = ? AND format = ? AND quality = ?",
+                    (vid, save_dir, fmt, quality))
+            if missing:
+                self._conn.commit()
+        return [(fmt, quality, path) for _, fmt, quality, path in rows if os.path.exists(path)]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': self._conn.execute("SELECT COUNT(*) FROM archive").fetchone()[0]}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def configure_download_archive(path=DOWNLOAD_ARCHIVE_FILE):
+    global _archive
+    with _archive_lock:
+        if _archive is not None:
+            _archive.close()
+        _archive = DownloadArchive(path)
+    return _archive
+
+
+def get_download_archive():
+    """DownloadJob(기록)과 GUI/헤드리스(추가 시 확인)가 함께 쓰는 공용 기록"""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = DownloadArchive()
+        return _archive
@@ -0,0 +1,224 @@
+import threading
+import time
+
+# 대기 중에도 중지/제한 변경을 빨리 반영하도록 한 번에 자는 최대 시간
+MAX_SLEEP = 0.25
+# 시간대별 일정을 다시 확인하는 간격 (초)
+SCHEDULE_CHECK_INTERVAL = 15
+
+
+def mbps_to_bytes(mbps):
+    """Mbit/s -> bytes/s (0 또는 None이면 무제한 = None)"""
+    if not mbps:
+        return None
+    return float(mbps) * 1_000_000 / 8
+
+
+def _parse_hm(value):
+    h, m = value.split(':')
+    return int(h) * 60 + int(m)
+
+
+def scheduled_limit(schedule, default_mbps=0, now=None):
+    """
+    현재 시각에 적용할 제한(Mbit/s) 반환. schedule 항목 예:
+        {"days": [0, 1, 2, 3, 4], "start": "09:00", "end": "18:00", "limit_mbps": 20}
+    days는 월요일=0 (생략하면 매일), end가 start보다 이르면 자정을 넘기는 구간. 처음 일치하는 항목을 사용한다.
+    """
+    now = now or time.localtime()
+    minute = now.tm_hour * 60 + now.tm_min
+    for entry in schedule or []:
+        try:
+            start, end = _parse_hm(entry['start']), _parse_hm(entry['end'])
+        except (KeyError, ValueError):
+            continue
+        days = entry.get('days')
+        if start <= end:
+            active = start <= minute < end and (days is None or now.tm_wday in days)
+        else:
+            # 자정을 넘기는 구간은 시작한 날의 요일 기준
+            if minute >= start:
+                active = days is None or now.tm_wday in days
+            else:
+                active = minute < end and (days is None or (now.tm_wday - 1) % 7 in days)
+        if active:
+            return entry.get('limit_mbps', 0)
+    return default_mbps
+
+
+# --- 작업별 몫 (토큰 버킷) ---
+class BandwidthShare:
+    """작업 하나의 토큰 버킷. 속도(rate)는 거버너가 전체 제한을 가중치대로 나눠 정한다"""
+
+    def __init__(self, governor, weight=1.0, cap=None):
+        self.governor = governor
+        self.weight = max(float(weight), 0.01)
+        self.cap = cap  # bytes/s (None이면 개별 제한 없음)
+        self.rate = None  # 현재 배분된 속도 (None이면 무제한)
+        self._tokens = 0.0
+        self._last_refill = time.monotonic()
+        self._seen = {}  # 스트림 키 -> 마지막으로 본 누적 바이트
+
+    def set_weight(self, weight):
+        self.weight = max(float(weight), 0.01)
+        self.governor._rebalance()
+
+    def set_cap(self, cap):
+        self.cap = cap
+        self.governor._rebalance()
+
+    def _refill(self, now):
+        if self.rate is None:
+            self._tokens = 0.0
+        else:
+            burst = max(self.rate * 0.5, 64 * 1024)
+            self._tokens = min(burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def consume(self, key, downloaded, should_stop=lambda: False, offset=0):
+        """
+        progress hook에서 호출. 스트림 key의 누적 바이트가 downloaded일 때 늘어난 만큼 토큰을 쓰고,
+        몫을 넘었으면 호출한 (다운로드) 스레드를 재워 속도를 맞춘다.
+        offset은 이어받은 스트림이 이번 실행 전에 이미 받아 둔 바이트로, 첫 보고에서 이만큼은 청구하지 않는다.
+        """
+        with self.governor._lock:
+            last = self._seen.get(key, offset)
+            self._seen[key] = max(last, downloaded)
+            delta = downloaded - last
+            if delta <= 0:
+                return
+            self._refill(time.monotonic())
+            if self.rate is None:
+                return
+            self._tokens -= delta
+
+        while not should_stop():
+            self.governor._check_schedule()
+            with self.governor._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.rate is None or self._tokens >= 0:
+                    return
+                wait = -self._tokens / self.rate
+            time.sleep(min(wait, MAX_SLEEP))
+
+    def release(self):
+        """작업 종료 시 호출. 남은 작업들이 이 몫을 나눠 가짐"""
+        self.governor._unregister(self)
+
+
+# --- 전역 대역폭 거버너 ---
+class BandwidthGovernor:
+    """
+    모든 다운로드가 공유하는 전역 속도 제한.
+    전체 제한을 활성 작업의 가중치 비율로 나누되, 개별 제한(cap)보다 많이 받는 작업의 남는 몫은
+    나머지 작업에 다시 나눈다 (water-filling). 작업이 끝나거나 제한이 바뀌면 즉시 다시 배분한다.
+    """
+
+    def __init__(self, limit_mbps=0, schedule=None):
+        self._lock = threading.RLock()
+        self._shares = []
+        self._default_mbps = limit_mbps
+        self._schedule = list(schedule or [])
+        self._override_mbps = None  # UI에서 직접 고른 값 (None이면 일정을 따름)
+        self._limit = None  # 현재 적용 중인 전체 제한 (bytes/s)
+        self._last_schedule_check = 0.0
+        self._check_schedule(force=True)
+
+    # --- 설정 ---
+    def configure(self, limit_mbps=None, schedule=None):
+        with self._lock:
+            if limit_mbps is not None:
+                self._default_mbps = limit_mbps
+            if schedule is not None:
+                self._schedule = list(schedule)
+        self._check_schedule(force=True)
+
+    def set_override(self, mbps):
+        """UI에서 즉시 변경. None이면 기본값/시간대 일정으로 돌아감, 0이면 무제한"""
+        with self._lock:
+            self._override_mbps = mbps
+        self._check_schedule(force=True)
+
+    def current_limit_mbps(self):
+        with self._lock:
+            if self._override_mbps is not None:
+                return self._override_mbps
+            return scheduled_limit(self._schedule, self._default_mbps)
+
+    def _check_schedule(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_schedule_check < SCHEDULE_CHECK_INTERVAL:
+            return
+        with self._lock:
+            self._last_schedule_check = now
+            limit = mbps_to_bytes(self.current_limit_mbps())
+            if force or limit != self._limit:
+                self._limit = limit
+                self._rebalance()
+
+    # --- 작업 등록 ---
+    def register(self, weight=1.0, cap_mbps=None):
+        share = BandwidthShare(self, weight, mbps_to_bytes(cap_mbps))
+        with self._lock:
+            self._shares.append(share)
+            self._rebalance()
+        return share
+
+    def _unregister(self, share):
+        with self._lock:
+            if share in self._shares:
+                self._shares.remove(share)
+                self._rebalance()
+
+    def _rebalance(self):
+        with self._lock:
+            now = time.monotonic()
+            for share in self._shares:
+                share._refill(now)  # 이전 속도로 쌓인 토큰을 먼저 정산
+            if self._limit is None:
+                for share in self._shares:
+                    share.rate = share.cap
+                return
+
+            remaining = self._limit
+            pending = list(self._shares)
+            while pending:
+                total_weight = sum(share.weight for share in pending)
+                capped = [s for s in pending if s.cap is not None and s.cap < remaining * s.weight / total_weight]
+                if not capped:
+                    for share in pending:
+                        share.rate = remaining * share.weight / total_weight
+                    break
+                for share in capped:
+                    share.rate = share.cap
+                    remaining -= share.cap
+                    pending.remove(share)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'limit_mbps': self.current_limit_mbps(),
+                'active': len(self._shares),
+                'rates': [share.rate for share in self._shares],
+            }
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def configure_bandwidth(limit_mbps=0, schedule=None):
+    """설정값으로 공용 거버너 구성 (앱 시작 시 호출)"""
+    governor = get_bandwidth_governor()
+    governor.configure(limit_mbps=limit_mbps, schedule=schedule or [])
+    return governor
+
+
+def get_bandwidth_governor():
+    """모든 DownloadJob이 공유하는 거버너"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = BandwidthGovernor()
+        return _governor
@@ -0,0 +1,108 @@
+"""
+음성 전용 형식별 후처리 시간/CPU 비교 (음성 1시간 기준으로 환산)
+
+유튜브 음성 포맷과 같은 원본(AAC .m4a, Opus .webm)을 ffmpeg로 만든 뒤
+DownloadJob과 같은 FFmpegExtractAudio 설정으로 변환한다.
+  - m4a / opus: 원본 스트림을 그대로 담음 (재인코딩 없음)
+  - mp3: 항상 인코딩 (음질 설정별)
+
+    python benchmarks/bench_audio.py --minutes 10
+    python benchmarks/bench_audio.py --mp3-qualities 128 192 320 0
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource  # 자식 프로세스(ffmpeg) CPU 시간 측정 (Windows에는 없음)
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp
+from yt_dlp.postprocessor.ffmpeg import FFmpegExtractAudioPP
+
+from engine import audio_postprocessor
+
+# 유튜브 140(AAC 128k) / 251(Opus ~160k)과 비슷한 원본
+SOURCES = {
+    'm4a': ['-c:a', 'aac', '-b:a', '128k'],
+    'webm': ['-c:a', 'libopus', '-b:a', '160k'],
+}
+
+
+def make_source(ffmpeg, path, seconds, codec_args):
+    # 무음/사인파는 인코더가 너무 쉽게 처리하므로 잡음을 섞은 신호 사용
+    subprocess.run([ffmpeg, '-y', '-v', 'error', '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}',
+                    '-f', 'lavfi', '-i', f'anoisesrc=amplitude=0.2:duration={seconds}',
+                    '-filter_complex', 'amix=inputs=2,aformat=channel_layouts=stereo', '-ar', '48000',
+                    *codec_args, path], check=True)
+
+
+def child_cpu():
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_mode(ydl, source, workdir, fmt, mp3_quality=None):
+    ext = os.path.splitext(source)[1][1:]
+    path = os.path.join(workdir, f"input.{ext}")
+    shutil.copyfile(source, path)
+    options = audio_postprocessor(fmt, mp3_quality)
+    pp = FFmpegExtractAudioPP(ydl, preferredcodec=options['preferredcodec'],
+                              preferredquality=options.get('preferredquality'))
+    cpu_before = child_cpu()
+    started = time.perf_counter()
+    _, info = pp.run({'filepath': path, 'ext': ext})
+    wall = time.perf_counter() - started
+    cpu = None if cpu_before is None else child_cpu() - cpu_before
+    size = os.path.getsize(info['filepath'])
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    return wall, cpu, size
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--minutes', type=float, default=10, help="원본 길이 (분)")
+    parser.add_argument('--mp3-qualities', nargs='+', default=['128', '192', '320', '0'])
+    args = parser.parse_args(argv)
+
+    ydl = yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True})
+    probe = FFmpegExtractAudioPP(ydl)
+    if not probe.available or not probe.probe_available:
+        print("ffmpeg/ffprobe가 필요합니다")
+        return 1
+
+    seconds = args.minutes * 60
+    hours = seconds / 3600
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = {}
+        for ext, codec_args in SOURCES.items():
+            sources[ext] = os.path.join(tmp, f"source.{ext}")
+            make_source(probe.executable, sources[ext], seconds, codec_args)
+        workdir = os.path.join(tmp, 'work')
+        os.makedirs(workdir)
+
+        # (표시 이름, 원본, 형식, mp3 음질): 원본은 각 형식의 포맷 선택(AUDIO_FORMATS) 결과와 같게
+        modes = [('m4a (copy)', 'm4a', 'm4a', None), ('opus (copy)', 'webm', 'opus', None)]
+        modes += [(f"mp3 {q}" if int(q) > 9 else f"mp3 V{q}", 'm4a', 'mp3', q) for q in args.mp3_qualities]
+
+        print(f"원본 {args.minutes:g}분, 음성 1시간 기준 환산")
+        print(f"{'mode':<12} {'wall(s/h)':>10} {'cpu(s/h)':>10} {'MB/h':>8}")
+        for name, source, fmt, quality in modes:
+            wall, cpu, size = run_mode(ydl, sources[source], workdir, fmt, quality)
+            cpu_text = '-' if cpu is None else f"{cpu / hours:.1f}"
+            print(f"{name:<12} {wall / hours:>10.1f} {cpu_text:>10} {size / hours / (1024 * 1024):>8.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,176 @@
+"""
+조각 동시 요청 수 비교 (고정값 vs 자동 조절)
+
+로컬 HLS 서버에서 조각으로 나뉜 영상을 받는다. 서버는
+  - 연결당 전송 속도를 --per-conn-kbps로 제한하고
+  - 전체 전송 속도를 --server-mbps로 제한하며
+  - 동시 요청이 --max-conns를 넘으면 429를 돌려준다.
+(유튜브처럼 연결 수를 늘리면 어느 지점까지만 빨라지고 그 이상은 제한에 걸리는 서버)
+
+    python benchmarks/bench_concurrency.py --levels 1 2 8 auto
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import DownloadJob
+from concurrency import get_concurrency_registry
+
+
+class ThrottlingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, segments, segment_size, per_conn_bps, total_bps, max_conns):
+        super().__init__(('127.0.0.1', 0), ThrottlingHandler)
+        self.segments = segments
+        self.segment = os.urandom(segment_size)
+        self.per_conn_bps = per_conn_bps
+        self.total_bps = total_bps
+        self.max_conns = max_conns
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.rejected = 0
+        self._tokens = 0.0
+        self._last = time.monotonic()
+
+    def reset_stats(self):
+        # 이전 실행에서 남은 요청이 끝날 때까지 대기
+        while self.active:
+            time.sleep(0.1)
+        with self.lock:
+            self.peak = 0
+            self.rejected = 0
+
+    def take(self, count):
+        """서버 전체 대역폭 (토큰 버킷)"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._tokens = min(self.total_bps * 0.2, self._tokens + (now - self._last) * self.total_bps)
+                self._last = now
+                if self._tokens >= count:
+                    self._tokens -= count
+                    return
+                wait = (count - self._tokens) / self.total_bps
+            time.sleep(wait)
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        if self.path.endswith('.m3u8'):
+            lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-TARGETDURATION:2', '#EXT-X-MEDIA-SEQUENCE:0']
+            for i in range(server.segments):
+                lines += ['#EXTINF:2.0,', f'seg{i}.ts']
+            lines.append('#EXT-X-ENDLIST')
+            body = '\n'.join(lines).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/vnd.apple.mpegurl')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        with server.lock:
+            if server.active >= server.max_conns:
+                server.rejected += 1
+                reject = True
+            else:
+                server.active += 1
+                server.peak = max(server.peak, server.active)
+                reject = False
+        if reject:
+            self.send_response(429)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        try:
+            data = server.segment
+            self.send_response(200)
+            self.send_header('Content-Type', 'video/mp2t')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            chunk = 16 * 1024
+            started = time.monotonic()
+            for offset in range(0, len(data), chunk):
+                block = data[offset:offset + chunk]
+                # 연결당 속도 제한 (마지막 블록을 보낸 뒤에는 바로 연결을 반납)
+                ahead = offset / server.per_conn_bps - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+                server.take(len(block))
+                self.wfile.write(block)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+def run_once(url, level, workdir):
+    # 실패한 실행이 남긴 조각 파일을 이어받지 않도록 실행마다 새 폴더 사용
+    workdir = tempfile.mkdtemp(dir=workdir)
+    result = {}
+    options = {'path': workdir, 'format': 'mp4', 'quality': '최고', 'mode': 'normal',
+               'fragment_concurrency': level}
+    done = threading.Event()
+    job = DownloadJob(url, options,
+                      on_finished=lambda path, size: result.update(path=path),
+                      on_error=lambda msg: result.update(error=msg),
+                      on_done=done.set)
+    started = time.perf_counter()
+    job.run()
+    done.wait()  # 파일은 후처리 풀에서 완성됨
+    result['seconds'] = time.perf_counter() - started
+    result['level'] = job.concurrency.level if job.concurrency else level
+    path = result.get('path')
+    result['bytes'] = os.path.getsize(path) if path and os.path.exists(path) else 0
+    if path and os.path.exists(path):
+        os.remove(path)
+    return result
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--levels', nargs='+', default=['1', '2', '8', 'auto'])
+    parser.add_argument('--segments', type=int, default=120)
+    parser.add_argument('--segment-kb', type=int, default=128)
+    parser.add_argument('--per-conn-kbps', type=int, default=400, help="연결당 속도 (KB/s)")
+    parser.add_argument('--server-mbps', type=float, default=24, help="서버 전체 속도 (Mbit/s)")
+    parser.add_argument('--max-conns', type=int, default=6, help="이 수를 넘는 동시 요청은 429")
+    args = parser.parse_args(argv)
+
+    server = ThrottlingServer(args.segments, args.segment_kb * 1024, args.per_conn_kbps * 1024,
+                              args.server_mbps * 1_000_000 / 8, args.max_conns)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/stream.m3u8"
+    expected = args.segments * args.segment_kb * 1024
+
+    print(f"{'level':>6} {'time(s)':>8} {'MB/s':>6} {'complete':>9} {'429':>5} {'peak':>5} {'final':>6}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for level in args.levels:
+            server.reset_stats()
+            result = run_once(url, level, workdir)
+            rate = result['bytes'] / result['seconds'] / (1024 * 1024)
+            complete = f"{result['bytes'] / expected * 100:.0f}%"
+            print(f"{level:>6} {result['seconds']:>8.2f} {rate:>6.2f} {complete:>9} {server.rejected:>5} "
+                  f"{server.peak:>5} {result['level']:>6}")
+            if result.get('error'):
+                print(f"       오류: {result['error'][:100]}")
+    print("host levels:", get_concurrency_registry().stats()['host_levels'])
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,134 @@
+"""
+작업당 추출기 왕복 횟수 측정
+
+DownloadWorker 한 번의 실행 동안 yt-dlp 추출기(InfoExtractor.extract)와
+HTTP 요청(YoutubeDL.urlopen)이 몇 번 호출되는지 센다.
+비교를 위해 기존 방식(extract_info 후 download 재호출)과
+메타데이터 캐시 적중 시(재시도/재추가)도 같이 측정한다.
+
+    python benchmarks/bench_extraction.py                # 로컬 테스트 서버 사용
+    python benchmarks/bench_extraction.py URL [URL ...]  # 실제 URL 측정
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp
+from PyQt5.QtCore import Qt
+from yt_dlp.extractor.common import InfoExtractor
+
+from downloader import DownloadWorker
+from engine import EXTRACT_OPTS
+from metacache import configure_metadata_cache
+
+COUNTERS = {'extract': 0, 'urlopen': 0}
+
+
+def install_counters():
+    original_extract = InfoExtractor.extract
+    original_urlopen = yt_dlp.YoutubeDL.urlopen
+
+    def counting_extract(self, url):
+        COUNTERS['extract'] += 1
+        return original_extract(self, url)
+
+    def counting_urlopen(self, req):
+        COUNTERS['urlopen'] += 1
+        return original_urlopen(self, req)
+
+    InfoExtractor.extract = counting_extract
+    yt_dlp.YoutubeDL.urlopen = counting_urlopen
+
+
+def reset_counters():
+    for key in COUNTERS:
+        COUNTERS[key] = 0
+
+
+def start_local_server(root):
+    """테스트용 영상 파일을 제공하는 로컬 HTTP 서버"""
+    with open(os.path.join(root, 'video.mp4'), 'wb') as f:
+        f.write(os.urandom(2 * 1024 * 1024))
+
+    class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    class QuietServer(ThreadingHTTPServer):
+        daemon_threads = True
+
+        def handle_error(self, request, client_address):
+            pass  # 클라이언트가 연결을 먼저 끊는 경우 무시
+
+    server = QuietServer(('127.0.0.1', 0), partial(QuietHandler, directory=root))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/video.mp4"
+
+
+def run_legacy(url, save_path):
+    """기존 방식: 파일명용 extract_info + download() 재추출"""
+    with yt_dlp.YoutubeDL(dict(EXTRACT_OPTS)) as ydl:
+        ydl.extract_info(url, download=False)
+    opts = dict(EXTRACT_OPTS, outtmpl=os.path.join(save_path, 'legacy.%(ext)s'), format='best', noprogress=True)
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        ydl.download([url])
+
+
+def run_worker(url, save_path):
+    worker = DownloadWorker(url, {'path': save_path, 'format': 'mp4', 'quality': '최고', 'mode': 'normal'})
+    errors = []
+    done = threading.Event()
+    # 신호는 후처리 풀 스레드에서 올 수 있고 이벤트 루프가 없으므로 바로 호출
+    worker.error_signal.connect(errors.append, Qt.DirectConnection)
+    worker.done_signal.connect(done.set, Qt.DirectConnection)
+    worker.run()  # 스레드 없이 동기 실행 (다운로드 단계까지)
+    # 병합/변환은 후처리 풀에서 끝나므로 작업이 완전히 끝날 때까지 worker를 붙잡고 기다림
+    done.wait()
+    if errors:
+        raise RuntimeError(errors[0])
+
+
+def measure(name, func, url, save_path):
+    reset_counters()
+    started = time.perf_counter()
+    func(url, save_path)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<10} extract={COUNTERS['extract']:<3} http={COUNTERS['urlopen']:<4} time={elapsed:.2f}s")
+    return dict(COUNTERS)
+
+
+def main(argv):
+    install_counters()
+    server = None
+    with tempfile.TemporaryDirectory() as tmp:
+        # 실제 캐시 파일에 영향을 주지 않도록 임시 캐시 사용
+        cache = configure_metadata_cache(path=os.path.join(tmp, 'metadata_cache.db'))
+        urls = argv
+        if not urls:
+            server, local_url = start_local_server(tmp)
+            urls = [local_url]
+
+        for url in urls:
+            print(f"# {url}")
+            with tempfile.TemporaryDirectory() as out:
+                legacy = measure('legacy', run_legacy, url, out)
+                current = measure('worker', run_worker, url, out)
+                measure('cached', run_worker, url, out)  # 재시도/재추가: 캐시 적중
+            if current['extract']:
+                print(f"extract 감소: {legacy['extract']} -> {current['extract']} "
+                      f"({legacy['extract'] / current['extract']:.1f}x)")
+
+        print(f"cache: {cache.stats()}")
+        cache.close()
+        if server:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
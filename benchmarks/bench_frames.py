@@ -0,0 +1,251 @@
+"""
+GUI 스레드 화면 갱신 시간 측정 (offscreen Qt, 네트워크 없음)
+
+상태가 한꺼번에 바뀔 때(여러 항목이 동시에 끝나거나 실패) GUI 스레드가 멈추는 시간을 잰다.
+경우마다 새 프로세스에서 스타일 적용 방식을 바꿔 실행한다.
+  inline   : 예전 방식. 상태가 바뀔 때마다 위젯에 setStyleSheet (스타일시트 해석 + 다시 꾸미기)
+  property : 앱 스타일시트(theme)를 한 번 적용하고 state 속성만 바꿈 (theme.set_state)
+장면
+  rows   : 항목마다 위젯(제목, 상태 라벨, 프로그레스 바)을 두던 예전 목록을 재현해
+           burst개씩 진행 중/완료/오류/대기로 바꿈
+  list   : 다운로드 목록(DownloadListView)에 항목 N개를 넣고 burst개씩 상태를 바꿈
+  menu   : 항목 우클릭 메뉴를 만들어 한 번 그림 (inline은 메뉴마다 setStyleSheet)
+frame = 한 묶음을 바꾸고 대기 중인 이벤트(다시 꾸미기, 그리기)를 모두 처리할 때까지 걸린 시간
+
+    python benchmarks/bench_frames.py --items 100 500 --burst 50
+    python benchmarks/bench_frames.py --scene rows --styles inline property --rounds 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+SCENES = ('rows', 'list', 'menu')
+STYLES = ('inline', 'property')
+ROUND_STATES = ('running', 'done', 'error', 'queued')
+
+# 예전 코드가 위젯마다 넣던 스타일 (inline 방식 재현용)
+LEGACY_ROW_STYLE = """
+    QWidget { background-color: #2b2b2b; border-bottom: 1px solid #555; }
+    QProgressBar { border: none; background-color: #444; border-radius: 4px; }
+"""
+LEGACY_LIST_STYLE = """
+    QListView { border: 2px inset #2a2a2a; background-color: #222; }
+    QScrollBar:vertical { background: #333; width: 10px; }
+    QScrollBar::handle:vertical { background: #555; }
+"""
+LEGACY_MENU_STYLE = """
+    QMenu { background-color: #333; color: white; border: 1px solid #555; }
+    QMenu::item:selected { background-color: #555; }
+"""
+
+def row_rules():
+    """property 방식에서 rows 장면의 행/프로그레스 바에 쓰는 규칙 (앱 스타일시트에 덧붙임)"""
+    from theme import STATE_COLORS
+    return """
+QWidget[role="row"] { background-color: #2b2b2b; border-bottom: 1px solid #555; }
+QProgressBar { border: none; background-color: #444; border-radius: 4px; }
+""" + "\n".join(f'QProgressBar[state="{state}"]::chunk {{ background-color: {color}; border-radius: 4px; }}'
+                for state, color in STATE_COLORS.items())
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def settle(app, rounds=3):
+    for _ in range(rounds):
+        app.processEvents()
+
+
+# --- 장면 ---
+def scene_rows(app, config, inline):
+    from PyQt5.QtWidgets import QScrollArea, QWidget, QVBoxLayout, QLabel, QProgressBar
+    from theme import STATE_COLORS, set_state
+
+    def apply(row, state):
+        status, pbar = row
+        color = STATE_COLORS[state]
+        if inline:
+            status.setStyleSheet(f"color: {color}; font-size: 11px; border: none; background: transparent;")
+            pbar.setStyleSheet(f"QProgressBar::chunk {{ background-color: {color}; border-radius: 4px; }}")
+        else:
+            set_state(status, state)
+            set_state(pbar, state)
+
+    area = QScrollArea()
+    area.resize(750, 650)
+    area.setWidgetResizable(True)
+    panel = QWidget()
+    layout = QVBoxLayout(panel)
+    rows = []
+    for i in range(config['items']):
+        row = QWidget()
+        if inline:
+            row.setStyleSheet(LEGACY_ROW_STYLE)
+        else:
+            row.setProperty('role', 'row')
+        row_layout = QVBoxLayout(row)
+        title = QLabel(f"항목 {i}")
+        status = QLabel("대기 중...")
+        pbar = QProgressBar()
+        pbar.setFixedHeight(8)
+        pbar.setTextVisible(False)
+        pbar.setValue(40)
+        for widget in (title, status, pbar):
+            row_layout.addWidget(widget)
+        apply((status, pbar), 'queued')
+        layout.addWidget(row)
+        rows.append((status, pbar))
+    area.setWidget(panel)
+    area.show()
+    settle(app)
+
+    frames = []
+    for round_index in range(config['rounds']):
+        state = ROUND_STATES[round_index % len(ROUND_STATES)]
+        for start in range(0, len(rows), config['burst']):
+            started = time.perf_counter()
+            for row in rows[start:start + config['burst']]:
+                apply(row, state)
+            app.processEvents()
+            frames.append(time.perf_counter() - started)
+    return frames, {}
+
+
+def _list_view(app, config, inline):
+    from widgets import DownloadItem, DownloadListView
+
+    view = DownloadListView()
+    if inline:
+        view.setStyleSheet(LEGACY_LIST_STYLE)
+    view.resize(750, 650)
+    settings = {'format': 'mp4', 'quality': '최고'}
+    items = [DownloadItem(f"https://www.youtube.com/watch?v=frame{i:06d}", dict(settings),
+                          restore_data={'title': f"항목 {i}", 'meta_text': "03:00 | 10MB | mp4 | 1080p | 일반",
+                                        'progress': 40, 'state': 'running'})
+             for i in range(config['items'])]
+    view.list_model.add_items(items)
+    view.show()
+    settle(app)
+    return view, items
+
+
+def scene_list(app, config, inline):
+    from widgets import STATE_RUNNING, STATE_DONE, STATE_ERROR, STATE_WAITING
+
+    view, items = _list_view(app, config, inline)
+    states = {'running': STATE_RUNNING, 'done': STATE_DONE, 'error': STATE_ERROR, 'queued': STATE_WAITING}
+    frames = []
+    for round_index in range(config['rounds']):
+        state = ROUND_STATES[round_index % len(ROUND_STATES)]
+        for start in range(0, len(items), config['burst']):
+            started = time.perf_counter()
+            for item in items[start:start + config['burst']]:
+                item.progress = 100 if state == 'done' else 40
+                item.set_status(state, states[state])
+            app.processEvents()
+            frames.append(time.perf_counter() - started)
+    return frames, {'paint': view.frame_stats()}
+
+
+def scene_menu(app, config, inline):
+    from PyQt5.QtWidgets import QAction
+
+    view, _ = _list_view(app, dict(config, items=min(config['items'], 50)), inline)
+    frames = []
+    for _ in range(config['rounds'] * 10):
+        started = time.perf_counter()
+        menu = view._menu()
+        if inline:
+            menu.setStyleSheet(LEGACY_MENU_STYLE)
+        for label in ("파일 위치 열기", "영상 URL 복사", "다운로드 중지", "맨 앞으로 이동",
+                      "재시도", "작업 시간 보기", "항목 삭제"):
+            menu.addAction(QAction(label, menu))
+        menu.adjustSize()
+        menu.grab()  # 화면에 띄우지 않고 한 번 그림
+        frames.append(time.perf_counter() - started)
+        menu.deleteLater()
+        app.processEvents()
+    return frames, {}
+
+
+# --- 자식 프로세스 ---
+def run_child(config):
+    sys.path.insert(0, ROOT)
+    from PyQt5.QtWidgets import QApplication
+    from theme import apply_theme
+
+    app = QApplication([])
+    inline = config['styles'] == 'inline'
+    if not inline:
+        apply_theme(app)
+        if config['scene'] == 'rows':
+            app.setStyleSheet(app.styleSheet() + row_rules())
+    scene = {'rows': scene_rows, 'list': scene_list, 'menu': scene_menu}[config['scene']]
+    frames, extra = scene(app, config, inline)
+    ms = [f * 1000 for f in frames]
+    result = {
+        'frames': len(ms),
+        'p50_ms': round(percentile(ms, 0.5), 2),
+        'p95_ms': round(percentile(ms, 0.95), 2),
+        'max_ms': round(max(ms), 2),
+        'total_ms': round(sum(ms), 1),
+    }
+    result.update(extra)
+    print(json.dumps(result))
+
+
+def run_case(config):
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    with tempfile.TemporaryDirectory() as workdir:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', json.dumps(config)],
+                             cwd=workdir, env=env, capture_output=True, text=True, timeout=600)
+    for line in reversed(out.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(out.stderr[-2000:])
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--scene', nargs='+', choices=SCENES, default=list(SCENES))
+parser.add_argument('--styles', nargs='+', choices=STYLES, default=list(STYLES))
+parser.add_argument('--items', type=int, nargs='+', default=[100, 500])
+parser.add_argument('--burst', type=int, default=50, help="한 번에 상태가 바뀌는 항목 수")
+parser.add_argument('--rounds', type=int, default=8, help="모든 항목의 상태를 바꾸는 횟수")
+parser.add_argument('--save', help="결과를 저장할 JSON 파일")
+
+
+def main(argv):
+    if argv[:1] == ['--child']:
+        run_child(json.loads(argv[1]))
+        return 0
+    args = parser.parse_args(argv)
+    results = {}
+    print(f"{'case':<24} {'frames':>7} {'p50(ms)':>8} {'p95(ms)':>8} {'max(ms)':>8} {'total(ms)':>10}")
+    for scene in args.scene:
+        for items in args.items:
+            for styles in args.styles:
+                case = f"{scene}/{items}/{styles}"
+                r = run_case({'scene': scene, 'styles': styles, 'items': items,
+                              'burst': args.burst, 'rounds': args.rounds})
+                results[case] = r
+                print(f"{case:<24} {r['frames']:>7} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['max_ms']:>8} "
+                      f"{r['total_ms']:>10}")
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,316 @@
+"""
+오프라인 성능 측정 (로컬 가짜 미디어 서버 + 대체 추출기, 외부 네트워크 없음)
+
+fakemedia 서버가 합성 미디어(한 파일 또는 DASH 조각)를 지연/대역폭/오류를 넣어 제공하고
+유튜브 URL은 대체 추출기가 이 서버로 보낸다. 항목 수마다 새 프로세스(offscreen Qt)에서
+  worker : DownloadWorker를 스케줄러로 직접 실행
+  gui    : main.py 창에 재생목록처럼 항목을 추가 (목록/진행률 반영/썸네일/히스토리 기록 포함)
+하고 다음을 잰다.
+  MB/s        받은 미디어 바이트 / 첫 작업 시작 ~ 마지막 작업 끝
+  ttfb        작업 시작 ~ 서버가 그 영상의 첫 미디어 바이트를 보낸 시각 (중앙값, p95)
+  lag         Qt 이벤트 루프 지연: 10ms 타이머가 늦게 불린 정도 (p95, 최대)
+  KB/item     항목을 모두 추가한 직후 / 모두 끝난 뒤 늘어난 RSS ÷ 항목 수
+--save로 결과를 저장하고 --compare로 저장해 둔 기준과 비교한다 (허용 범위보다 나빠지면 종료 코드 1).
+
+    python benchmarks/bench_offline.py --items 10 100 1000 --driver worker gui
+    python benchmarks/bench_offline.py --media dash --latency-ms 30 --error-rate 0.02 --save base.json
+    python benchmarks/bench_offline.py --compare base.json --tolerance 15
+DASH는 영상/음성을 합치므로 ffmpeg가 필요하다.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import resource  # RSS를 /proc에서 읽을 수 없을 때 최대 RSS로 대신함 (Windows에는 없음)
+except ImportError:
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+# (키, 표시 이름, 클수록 좋은지, 무시할 차이)
+METRICS = [
+    ('throughput_mbps', 'MB/s', True, 0.0),
+    ('ttfb_p50_ms', 'ttfb p50', False, 5.0),
+    ('ttfb_p95_ms', 'ttfb p95', False, 5.0),
+    ('loop_lag_p95_ms', 'lag p95', False, 2.0),
+    ('loop_lag_max_ms', 'lag max', False, 10.0),
+    ('mem_queued_kb', 'KB/item(대기)', False, 16.0),
+    ('mem_final_kb', 'KB/item(완료)', False, 16.0),
+]
+
+
+def rss_bytes():
+    """현재 프로세스의 RSS (알 수 없으면 None)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    return None
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+# --- 자식 프로세스: 항목 N개 실행 ---
+def run_child(config):
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QEventLoop, QTimer, Qt
+
+    import fakemedia
+
+    count = config['items']
+    out = os.path.abspath('download')
+    os.makedirs(out, exist_ok=True)
+    # 앱은 작업 폴더 기준 상대 경로에 설정/히스토리/캐시를 두므로 이 프로세스 전용 폴더에서 실행
+    with open('settings.json', 'w', encoding='utf-8') as f:
+        json.dump({'save_path': out, 'max_concurrent_downloads': config['jobs'],
+                   'max_downloads_per_host': config['jobs'], 'metrics_port': 0}, f)
+
+    server = fakemedia.FakeMediaServer(
+        media=config['media'], media_size=config['media_kb'] * 1024, segments=config['segments'],
+        latency=config['latency_ms'] / 1000, bandwidth=config['bandwidth_kbps'] * 1024,
+        error_rate=config['error_rate'], error_kind=config['error_kind'])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fakemedia.install_stub_extractor(server.base_url)
+
+    import engine
+    from utils import video_key
+
+    # 모든 작업의 시작/끝 시각 (드라이버와 무관하게 DownloadJob에서 기록)
+    started, ended = {}, {}
+    totals = {'bytes': 0, 'completed': 0, 'errors': 0}
+    lock = threading.Lock()
+    original_run, original_end = engine.DownloadJob.run, engine.DownloadJob._end
+
+    def timed_run(job):
+        with lock:
+            started.setdefault(video_key(job.url), time.perf_counter())
+        return original_run(job)
+
+    def timed_end(job):
+        with lock:
+            ended[video_key(job.url)] = time.perf_counter()
+            totals['bytes'] += job.bytes_received
+            totals['completed' if job._completed else 'errors'] += 1
+        return original_end(job)
+
+    engine.DownloadJob.run = timed_run
+    engine.DownloadJob._end = timed_end
+
+    app = QApplication(sys.argv)
+    lags = []
+    lag_timer = QTimer()
+    lag_timer.setTimerType(Qt.PreciseTimer)
+    last_tick = [0.0]
+
+    def tick():
+        now = time.perf_counter()
+        lags.append(max((now - last_tick[0]) * 1000 - lag_timer.interval(), 0.0))
+        last_tick[0] = now
+
+    lag_timer.timeout.connect(tick)
+
+    def wait(condition, timeout):
+        loop = QEventLoop()
+        poll = QTimer()
+        poll.timeout.connect(lambda: condition() and loop.quit())
+        poll.start(20)
+        QTimer.singleShot(int(timeout * 1000), loop.quit)
+        loop.exec_()
+        poll.stop()
+
+    options = {'path': out, 'format': 'mp4', 'quality': '최고', 'mode': 'normal',
+               'fragment_concurrency': 'auto', 'derive_local': False}
+    urls = [fakemedia.bench_url(n) for n in range(count)]
+    memory = {}
+    keep = []
+
+    if config['driver'] == 'gui':
+        import main
+
+        main.apply_theme(app)  # main()과 같은 순서
+        window = main.YouTubeDownloaderApp()
+        ready = []
+        window.startup_finished.connect(lambda: ready.append(True))
+        window.show()
+        wait(lambda: ready, 60)
+        memory['before'] = rss_bytes()
+        last_tick[0] = time.perf_counter()
+        lag_timer.start(10)
+        # 재생목록 펼치기와 같은 크기로 나눠서 추가
+        batch = main.PlaylistWorker.BATCH_SIZE
+        for start in range(0, count, batch):
+            window.add_playlist_entries([{'url': url, 'title': None} for url in urls[start:start + batch]],
+                                        options)
+            app.processEvents()
+        keep.append(window)
+    else:
+        from downloader import DownloadWorker
+        from scheduler import DownloadScheduler
+
+        engine.warm_up()
+        scheduler = DownloadScheduler(max_concurrent=config['jobs'], per_host_limit=config['jobs'])
+
+        class WorkerJob:
+            def __init__(self, url):
+                self.url = url
+                self.worker = DownloadWorker(url, dict(options))
+                self.worker.finished.connect(lambda: scheduler.job_done(self))
+
+            def start_download(self):
+                self.worker.start()
+
+        memory['before'] = rss_bytes()
+        last_tick[0] = time.perf_counter()
+        lag_timer.start(10)
+        jobs = [WorkerJob(url) for url in urls]
+        for job in jobs:
+            scheduler.submit(job)
+        keep.append(jobs)
+
+    memory['queued'] = rss_bytes()
+    wait(lambda: len(ended) >= count, config['timeout'])
+    lag_timer.stop()
+    app.processEvents()
+    memory['final'] = rss_bytes()
+    server.shutdown()
+
+    first = min(started.values()) if started else 0
+    last = max(ended.values()) if ended else first
+    seconds = max(last - first, 1e-6)
+    ttfb = [(server.first_byte[key] - t) * 1000 for key, t in started.items() if key in server.first_byte]
+
+    def per_item(key):
+        if memory.get('before') is None or memory.get(key) is None:
+            return None
+        return round((memory[key] - memory['before']) / 1024 / count, 1)
+
+    def ms(value):
+        return None if value is None else round(value, 2)
+
+    return {
+        'items': count,
+        'completed': totals['completed'],
+        'errors': totals['errors'] + (count - len(ended)),
+        'seconds': round(seconds, 3),
+        'throughput_mbps': round(totals['bytes'] / seconds / (1024 * 1024), 2),
+        'ttfb_p50_ms': ms(percentile(ttfb, 0.5)),
+        'ttfb_p95_ms': ms(percentile(ttfb, 0.95)),
+        'loop_lag_p95_ms': ms(percentile(lags, 0.95)),
+        'loop_lag_max_ms': ms(max(lags) if lags else None),
+        'mem_queued_kb': per_item('queued'),
+        'mem_final_kb': per_item('final'),
+        'requests': server.requests,
+        'errors_injected': server.errors_injected,
+    }
+
+
+# --- 부모 프로세스 ---
+def run_case(config):
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    with tempfile.TemporaryDirectory() as workdir:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', json.dumps(config)],
+                             cwd=workdir, env=env, capture_output=True, text=True,
+                             timeout=config['timeout'] + 120)
+    for line in reversed(out.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(out.stderr[-2000:])
+
+
+def fmt(value, width):
+    return f"{'-' if value is None else value:>{width}}"
+
+
+def compare(results, baseline, tolerance):
+    """기준보다 tolerance(%) 넘게 나빠진 지표 목록을 출력하고 그 수를 반환"""
+    if baseline.get('config') != results['config']:
+        print("주의: 기준과 서버/실행 설정이 다릅니다")
+    regressions = 0
+    print(f"\n{'case':<12} {'metric':<16} {'baseline':>10} {'current':>10} {'change':>8}")
+    for case, current in results['cases'].items():
+        base = baseline.get('cases', {}).get(case)
+        if base is None:
+            continue
+        for key, label, higher_better, ignore in METRICS:
+            old, new = base.get(key), current.get(key)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            worse = (new < old) if higher_better else (new > old)
+            regressed = worse and abs(new - old) > ignore and abs(change) > tolerance
+            regressions += regressed
+            print(f"{case:<12} {label:<16} {old:>10} {new:>10} {change:>+7.1f}%{'  <- 나빠짐' if regressed else ''}")
+    return regressions
+
+
+def main(argv):
+    if argv[:1] == ['--child']:
+        print(json.dumps(run_child(json.loads(argv[1]))))
+        return 0
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--driver', nargs='+', choices=['worker', 'gui'], default=['worker', 'gui'])
+    parser.add_argument('--media', choices=['progressive', 'dash'], default='progressive')
+    parser.add_argument('--media-kb', type=int, default=256, help="영상 하나의 크기 (KB)")
+    parser.add_argument('--segments', type=int, default=8, help="DASH 트랙당 조각 수")
+    parser.add_argument('--latency-ms', type=float, default=0, help="모든 응답 전 지연")
+    parser.add_argument('--bandwidth-kbps', type=int, default=0, help="연결당 속도 (KB/s, 0이면 무제한)")
+    parser.add_argument('--error-rate', type=float, default=0, help="미디어 요청 중 오류를 낼 비율 (0~1)")
+    parser.add_argument('--error-kind', choices=['503', '429', 'reset'], default='503')
+    parser.add_argument('-j', '--jobs', type=int, default=3, help="동시 다운로드 수")
+    parser.add_argument('--timeout', type=float, default=900, help="경우마다 최대 실행 시간 (초)")
+    parser.add_argument('--save', help="결과를 기준으로 저장할 JSON 파일")
+    parser.add_argument('--compare', help="비교할 기준 JSON 파일")
+    parser.add_argument('--tolerance', type=float, default=10, help="허용할 악화 정도 (%%)")
+    args = parser.parse_args(argv)
+
+    if args.media == 'dash' and not (shutil.which('ffmpeg') or os.path.exists(os.path.join(ROOT, 'ffmpeg.exe'))):
+        print("주의: ffmpeg를 찾을 수 없어 DASH 영상/음성을 합치지 못합니다")
+
+    config = {key: getattr(args, key) for key in ('media', 'media_kb', 'segments', 'latency_ms', 'bandwidth_kbps',
+                                                  'error_rate', 'error_kind', 'jobs')}
+    results = {'config': config, 'cases': {}}
+    print(f"{'case':<12} {'done':>5} {'err':>4} {'time(s)':>8} {'MB/s':>7} {'ttfb p50':>9} {'ttfb p95':>9} "
+          f"{'lag p95':>8} {'lag max':>8} {'KB/item':>8} {'KB/done':>8}")
+    for driver in args.driver:
+        for items in args.items:
+            case = f"{driver}/{items}"
+            r = run_case(dict(config, driver=driver, items=items, timeout=args.timeout))
+            results['cases'][case] = r
+            print(f"{case:<12} {r['completed']:>5} {r['errors']:>4} {r['seconds']:>8} {r['throughput_mbps']:>7} "
+                  f"{fmt(r['ttfb_p50_ms'], 9)} {fmt(r['ttfb_p95_ms'], 9)} {fmt(r['loop_lag_p95_ms'], 8)} "
+                  f"{fmt(r['loop_lag_max_ms'], 8)} {fmt(r['mem_queued_kb'], 8)} {fmt(r['mem_final_kb'], 8)}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
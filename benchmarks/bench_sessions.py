@@ -0,0 +1,116 @@
+"""
+작업당 준비 시간 / 새 연결 수 측정 (YoutubeDL 풀)
+
+같은 영상 파일을 N번 연속으로 분석+다운로드하면서 작업마다 걸린 시간과
+서버가 새로 받은 TCP 연결 수를 센다.
+  fresh  : 작업마다 YoutubeDL을 새로 만들고 연결을 공유하지 않음 (이전 방식)
+  pooled : sessions.YoutubeDLPool (추출기 재사용 + keep-alive 연결 공유)
+메타데이터 캐시는 끄고 측정한다 (매 작업 추출).
+
+    python benchmarks/bench_sessions.py [작업 수]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine
+import sessions
+from engine import DownloadJob, extract_video_info
+from metacache import configure_metadata_cache
+
+
+class CountingServer(ThreadingHTTPServer):
+    """keep-alive(HTTP/1.1)를 지원하고 새로 받은 연결 수를 세는 로컬 서버"""
+    daemon_threads = True
+
+    def __init__(self, root):
+        class Handler(SimpleHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(('127.0.0.1', 0), partial(Handler, directory=root))
+        self.connections = 0
+
+    def get_request(self):
+        self.connections += 1
+        return super().get_request()
+
+    def handle_error(self, request, client_address):
+        pass  # 클라이언트가 연결을 먼저 끊는 경우 무시
+
+
+class FreshPool(sessions.YoutubeDLPool):
+    """비교용: 매번 새 YoutubeDL, 연결 공유 없음"""
+
+    def _create(self, opts):
+        import yt_dlp
+        self.created += 1
+        return yt_dlp.YoutubeDL(dict(opts))
+
+    @staticmethod
+    def _discard(ydl):
+        ydl.close()
+
+    def extractor(self, opts):
+        return self.downloader(opts)
+
+
+def run_jobs(url, count):
+    times = []
+    with tempfile.TemporaryDirectory() as out:
+        for n in range(count):
+            started = time.perf_counter()
+            info = extract_video_info(url, use_cache=False)
+            errors = []
+            done = threading.Event()
+            job = DownloadJob(url, {'path': out, 'format': 'mp4', 'quality': '최고', 'mode': 'normal',
+                                    'derive_local': False},
+                              info=info, on_error=errors.append, on_done=done.set)
+            job.run()
+            done.wait()  # 후처리 풀에서 파일이 완성될 때까지
+            if errors:
+                raise RuntimeError(errors[0])
+            times.append(time.perf_counter() - started)
+    return times
+
+
+def measure(name, pool, server, url, count):
+    sessions._pool = pool
+    engine.get_ydl_pool = lambda: pool
+    server.connections = 0
+    times = run_jobs(url, count)
+    rest = times[1:] or times
+    print(f"{name:<7} 첫 작업 {times[0] * 1000:7.1f}ms  이후 평균 {sum(rest) / len(rest) * 1000:7.1f}ms  "
+          f"새 연결 {server.connections:<3} YoutubeDL 생성 {pool.created}")
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 10
+    with tempfile.TemporaryDirectory() as root:
+        configure_metadata_cache(path=os.path.join(root, 'metadata_cache.db'))
+        with open(os.path.join(root, 'video.mp4'), 'wb') as f:
+            f.write(os.urandom(512 * 1024))
+        server = CountingServer(root)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/video.mp4"
+
+        # yt_dlp import와 추출기 클래스 로딩은 두 방식 모두 한 번뿐이므로 측정에서 제외
+        measure('warmup', FreshPool(), server, url, 1)
+        measure('fresh', FreshPool(), server, url, count)
+        pool = sessions.YoutubeDLPool()
+        measure('pooled', pool, server, url, count)
+        print(f"pool: {pool.stats()}")
+        pool.close()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
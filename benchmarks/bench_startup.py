@@ -0,0 +1,96 @@
+"""
+앱 시작 시간 측정 (offscreen Qt)
+
+새 프로세스에서 main.py의 창을 띄워
+  - first_paint:  스크립트 시작 ~ 창이 처음 그려진 시점
+  - interactive:  스크립트 시작 ~ 히스토리 복원과 yt_dlp 준비가 끝난 시점 (startup_finished)
+을 측정한다. --history N 으로 N개 항목이 있는 히스토리를 만들어 히스토리 크기에 따른 차이를 볼 수 있다.
+
+    python benchmarks/bench_startup.py --runs 5 --history 0 1000 10000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import time
+t0 = time.perf_counter()
+import sys, json
+sys.path.insert(0, ROOT)
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QEvent, QTimer
+app = QApplication(sys.argv)
+import main
+main.apply_theme(app)  # main()과 같은 순서
+result = {}
+
+class PaintWatcher(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and 'first_paint' not in result:
+            result['first_paint'] = time.perf_counter() - t0
+        return False
+
+window = main.YouTubeDownloaderApp()
+watcher = PaintWatcher()
+window.installEventFilter(watcher)
+
+def on_finished():
+    result['interactive'] = time.perf_counter() - t0
+    result['rows'] = window.list_model.rowCount()
+    QTimer.singleShot(0, app.quit)
+
+window.startup_finished.connect(on_finished)
+window.show()
+QTimer.singleShot(30000, app.quit)
+app.exec_()
+print(json.dumps(result))
+'''
+
+
+def make_history(path, count):
+    sys.path.insert(0, ROOT)
+    from history import HistoryStore
+    store = HistoryStore(path)
+    settings = {'path': '/tmp', 'format': 'mp4', 'quality': '최고', 'mode': 'normal'}
+    for i in range(count):
+        store.add({'url': f'https://www.youtube.com/watch?v={i:011d}', 'settings': settings,
+                   'title': f'video {i}', 'meta_text': '00:03:00 - 10.0MB - mp4 - 최고 - 일반',
+                   'progress': 100, 'is_completed': True, 'state': 'done'})
+    store.close()
+
+
+def run_once(workdir):
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    code = CHILD.replace('ROOT', repr(ROOT))
+    out = subprocess.run([sys.executable, '-c', code], cwd=workdir, env=env,
+                         capture_output=True, text=True, timeout=60)
+    for line in reversed(out.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(out.stderr[-2000:])
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--history', type=int, nargs='+', default=[0, 1000])
+    args = parser.parse_args(argv)
+
+    print(f"{'history':>8} {'first_paint(ms)':>16} {'interactive(ms)':>16} {'rows':>6}")
+    for count in args.history:
+        with tempfile.TemporaryDirectory() as workdir:
+            make_history(os.path.join(workdir, 'history.db'), count)
+            results = [run_once(workdir) for _ in range(args.runs)]
+        paint = statistics.median(r['first_paint'] for r in results) * 1000
+        ready = statistics.median(r['interactive'] for r in results) * 1000
+        print(f"{count:>8} {paint:>16.1f} {ready:>16.1f} {results[0]['rows']:>6}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,231 @@
+"""
+오프라인 벤치마크용 가짜 미디어 서버와 yt-dlp 추출기
+
+유튜브 형식 URL(watch?v=ID, youtu.be/ID, shorts/ID)을 가로채 로컬 서버의 합성 미디어로 바꾼다.
+앱 코드(URL 확인, 중복 판단, 다운로드 기록)는 실제 유튜브 URL과 똑같이 동작하고 네트워크는 로컬 서버만 쓴다.
+
+서버 경로
+  /info/ID.json             추출기가 받는 영상 정보 (formats 포함)
+  /media/ID/progressive.mp4 영상+음성 한 파일 (Range 지원)
+  /media/ID/v/segN          DASH 영상 조각, /media/ID/a/segN 음성 조각
+  /thumb/ID.ppm             썸네일 (Qt가 읽을 수 있는 작은 이미지)
+모든 응답 전에 latency만큼 기다리고, 미디어 응답은 연결당 bandwidth로 보내며
+error_rate 확률로 오류(503/429 또는 전송 중 연결 끊기)를 낸다.
+
+    server = FakeMediaServer(media='dash', media_size=512 * 1024, latency=0.02)
+    install_stub_extractor(server.base_url)
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+MEDIA_KINDS = ('progressive', 'dash')
+ERROR_KINDS = ('503', '429', 'reset')
+CHUNK = 16 * 1024
+THUMB_SIZE = (160, 90)
+
+
+def bench_url(n):
+    """n번째 항목의 유튜브 형식 URL (영상 ID 11자)"""
+    return f"https://www.youtube.com/watch?v=bench{n:06d}"
+
+
+# --- 서버 ---
+class FakeMediaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, media='progressive', media_size=512 * 1024, segments=8, duration=60,
+                 latency=0.0, bandwidth=0, error_rate=0.0, error_kind='503', seed=0):
+        super().__init__(('127.0.0.1', 0), FakeMediaHandler)
+        if media not in MEDIA_KINDS:
+            raise ValueError(f"알 수 없는 미디어 종류: {media}")
+        if error_kind not in ERROR_KINDS:
+            raise ValueError(f"알 수 없는 오류 종류: {error_kind}")
+        self.media = media
+        self.media_size = media_size
+        self.segments = max(1, segments)
+        self.duration = duration
+        self.latency = latency  # 초
+        self.bandwidth = bandwidth  # 연결당 바이트/초 (0이면 무제한)
+        self.error_rate = error_rate
+        self.error_kind = error_kind
+        self._random = random.Random(seed)
+        # 내용은 모든 영상이 공유 (서버 메모리가 항목 수에 비례하지 않도록)
+        self.payload = os.urandom(media_size)
+        width, height = THUMB_SIZE
+        self.thumbnail = f"P6\n{width} {height}\n255\n".encode() + os.urandom(width * height * 3)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.media_bytes = 0
+        self.errors_injected = 0
+        self.first_byte = {}  # 영상 ID -> 첫 미디어 바이트를 보낸 시각 (perf_counter)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def handle_error(self, request, client_address):
+        pass  # 클라이언트가 먼저 끊은 연결, 일부러 끊은 연결
+
+    def should_fail(self):
+        with self.lock:
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors_injected += 1
+                return True
+        return False
+
+    def track(self, kind):
+        """(크기, 조각 수) - DASH 음성 트랙은 영상의 1/8"""
+        if kind == 'a':
+            return max(self.media_size // 8, 1), self.segments
+        if kind == 'v':
+            return self.media_size, self.segments
+        return self.media_size, 1
+
+    def segment_range(self, kind, index):
+        size, count = self.track(kind)
+        step = -(-size // count)
+        start = min(index * step, size)
+        return start, min(start + step, size)
+
+    def info(self, video_id):
+        """추출기가 돌려줄 info dict (yt-dlp 형식)"""
+        base = f"{self.base_url}/media/{video_id}"
+        info = {
+            'id': video_id,
+            'title': f"Benchmark {video_id}",
+            'duration': self.duration,
+            'thumbnail': f"{self.base_url}/thumb/{video_id}.ppm",
+            'webpage_url': f"https://www.youtube.com/watch?v={video_id}",
+        }
+        if self.media == 'progressive':
+            info['formats'] = [{
+                'format_id': '18', 'url': f"{base}/progressive.mp4", 'ext': 'mp4',
+                'vcodec': 'avc1.42001E', 'acodec': 'mp4a.40.2', 'height': 360, 'width': 640,
+                'filesize': self.media_size,
+            }]
+            return info
+        formats = []
+        for kind, format_id, fields in (
+                ('v', '137', {'vcodec': 'avc1.640028', 'acodec': 'none', 'height': 1080, 'width': 1920}),
+                ('a', '140', {'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 128})):
+            size, count = self.track(kind)
+            formats.append(dict(fields, **{
+                'format_id': format_id, 'ext': 'mp4' if kind == 'v' else 'm4a',
+                'protocol': 'http_dash_segments', 'url': f"{base}/{kind}/seg0",
+                'fragment_base_url': f"{base}/{kind}/",
+                'fragments': [{'path': f"seg{i}", 'duration': self.duration / count} for i in range(count)],
+                'filesize': size,
+            }))
+        info['formats'] = formats
+        return info
+
+
+class FakeMediaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive (앱의 공용 연결 풀과 같은 조건)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        match = re.fullmatch(r'/info/([\w-]+)\.json', self.path)
+        if match:
+            self._send(200, json.dumps(server.info(match.group(1))).encode(), 'application/json')
+            return
+        if re.fullmatch(r'/thumb/[\w-]+\.ppm', self.path):
+            self._send(200, server.thumbnail, 'image/x-portable-pixmap')
+            return
+        match = re.fullmatch(r'/media/([\w-]+)/(?:progressive\.mp4|([va])/seg(\d+))', self.path)
+        if not match:
+            self._send(404, b'', 'text/plain')
+            return
+
+        video_id, kind, index = match.group(1), match.group(2), match.group(3)
+        start, end = server.segment_range(kind, int(index)) if kind else (0, server.media_size)
+        fail = server.should_fail()
+        if fail and server.error_kind != 'reset':
+            self._send(int(server.error_kind), b'', 'text/plain')
+            return
+        self._send_media(video_id, start, end, cut=fail)
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_media(self, video_id, start, end, cut=False):
+        server = self.server
+        size = end - start
+        status = 200
+        requested = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if requested:
+            offset = start + int(requested.group(1))
+            last = start + int(requested.group(2)) + 1 if requested.group(2) else end
+            if offset >= end:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{size}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            status, first, end = 206, offset, min(last, end)
+        else:
+            first = start
+        self.send_response(status)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(end - first))
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f"bytes {first - start}-{end - start - 1}/{size}")
+        self.end_headers()
+
+        stop = first + (end - first) // 2 if cut else end  # 'reset': 절반만 보내고 연결 끊기
+        started = time.monotonic()
+        for offset in range(first, stop, CHUNK):
+            block = server.payload[offset:min(offset + CHUNK, stop)]
+            if server.bandwidth:
+                ahead = (offset - first) / server.bandwidth - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+            self.wfile.write(block)
+            with server.lock:
+                server.media_bytes += len(block)
+                server.first_byte.setdefault(video_id, time.perf_counter())
+        if cut:
+            self.close_connection = True
+
+
+# --- yt-dlp 추출기 ---
+def install_stub_extractor(base_url):
+    """
+    유튜브 형식 URL을 base_url 서버의 /info/ID.json으로 처리하는 추출기를 가장 먼저 확인하도록 등록.
+    이후에 만들어지는 YoutubeDL(앱의 YoutubeDL 풀 포함)에 모두 적용된다.
+    """
+    from yt_dlp.extractor import import_extractors
+    from yt_dlp.extractor.common import InfoExtractor
+    from yt_dlp.globals import extractors
+
+    class FakeMediaIE(InfoExtractor):
+        IE_NAME = 'fakemedia'
+        _VALID_URL = (r'https?://(?:www\.)?(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/)|youtu\.be/)'
+                      r'(?P<id>[\w-]{11})')
+
+        def _real_extract(self, url):
+            video_id = self._match_id(url)
+            return self._download_json(f"{base_url}/info/{video_id}.json", video_id, note=False)
+
+    import_extractors()
+    others = {name: ie for name, ie in extractors.value.items() if name != 'FakeMediaIE'}
+    extractors.value = {'FakeMediaIE': FakeMediaIE, **others}
+    return FakeMediaIE
@@ -0,0 +1,440 @@
+"""
+구간 클립 엔진
+
+DASH/HLS처럼 조각으로 나뉜 스트림에서 요청한 구간과 겹치는 조각만 받아 로컬에서 자른다.
+  1. 포맷별 조각 목록(시작 시각/길이)을 만들고 구간들과 겹치는 조각만 고름
+     여러 구간이면 이어지는 조각끼리 묶어(run) 겹치는 조각은 한 번만 받음
+  2. 고른 조각만 yt-dlp 조각 다운로더로 한 번에 받음 (진행률/속도 제한/동시성 제어 공유)
+  3. 영상은 키프레임 사이를 스트림 복사하고 앞뒤 경계 GOP만 재인코딩 (h264)
+     그 외 코덱은 시작 직전 키프레임부터 스트림 복사
+  4. 음성은 영상이 실제로 시작하는 시각에 맞춰 잘라 A/V 싱크 유지
+  5. 구간이 여러 개면 받은 파일에서 클립들을 병렬로 자름
+     자르기는 다운로드 슬롯을 반납한 뒤 후처리 풀에서 실행 (download_range_sources + cut_clips)
+조각 정보를 알 수 없는 스트림이면 ClipUnsupported를 올려 기존 방식(ffmpeg 외부 다운로더)으로 넘긴다.
+"""
+import os
+import subprocess
+from urllib.parse import urljoin
+
+from metacache import select_formats, unselected_info
+
+FRAGMENT_PROTOCOLS = ('m3u8_native', 'm3u8', 'http_dash_segments')
+# 경계 GOP 재인코딩이 가능한 코덱 -> 인코더 (나머지는 키프레임 기준 스트림 복사)
+SMART_CUT_ENCODERS = {'h264': 'libx264'}
+EPSILON = 0.05  # 이 정도 차이는 키프레임과 같은 위치로 봄 (초)
+AUDIO_ENCODERS = {'mp4': ('aac', '192k'), 'mkv': ('aac', '192k'), 'mp3': ('libmp3lame', '192k'),
+                  'm4a': ('aac', '192k'), 'opus': ('libopus', '160k')}
+# 음성만 저장할 때 형식별 ffmpeg muxer (.part 임시 파일명으로는 형식을 알 수 없음)
+AUDIO_MUXERS = {'mp4': 'mp4', 'mkv': 'matroska', 'mp3': 'mp3', 'm4a': 'ipod', 'opus': 'ogg'}
+AUDIO_ONLY_FORMATS = ('mp3', 'm4a', 'opus')
+# 클립을 동시에 자르는 수 (재인코딩이 CPU를 쓰므로 코어 수의 절반까지)
+CUT_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+class ClipUnsupported(Exception):
+    """조각 단위로 받을 수 없는 스트림 (기존 방식으로 처리)"""
+
+
+def audio_encoder_args(fmt, mp3_quality=None):
+    """fmt로 음성을 재인코딩하는 ffmpeg 인자. mp3는 mp3_quality(설정값)를 따름"""
+    encoder, bitrate = AUDIO_ENCODERS.get(fmt, AUDIO_ENCODERS['mp4'])
+    if fmt == 'mp3' and mp3_quality:
+        quality = str(mp3_quality)
+        # yt-dlp와 같은 규칙: 10 미만은 VBR 등급, 그 이상은 비트레이트(kbps)
+        if quality.isdigit() and int(quality) < 10:
+            return ['-c:a', encoder, '-q:a', quality]
+        return ['-c:a', encoder, '-b:a', f"{quality}k"]
+    return ['-c:a', encoder, '-b:a', bitrate]
+
+
+# --- 조각 목록 ---
+def parse_m3u8_segments(text, base_url):
+    """HLS 미디어 재생목록 -> (초기화 조각 URL 또는 None, [(URL, 길이)])"""
+    init_url = None
+    segments = []
+    duration = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#EXT-X-STREAM-INF'):
+            raise ClipUnsupported("마스터 재생목록")
+        if line.startswith('#EXT-X-KEY') and 'METHOD=NONE' not in line:
+            raise ClipUnsupported("암호화된 조각")
+        if line.startswith('#EXT-X-BYTERANGE'):
+            raise ClipUnsupported("바이트 범위 조각")
+        if line.startswith('#EXT-X-MAP'):
+            uri = line.split('URI="', 1)[1].split('"', 1)[0]
+            init_url = urljoin(base_url, uri)
+        elif line.startswith('#EXTINF:'):
+            duration = float(line[len('#EXTINF:'):].split(',', 1)[0])
+        elif not line.startswith('#'):
+            if duration is None:
+                raise ClipUnsupported("조각 길이 없음")
+            segments.append((urljoin(base_url, line), duration))
+            duration = None
+    if not segments:
+        raise ClipUnsupported("조각 없음")
+    return init_url, segments
+
+
+def stream_segments(ydl, fmt):
+    """포맷 하나의 (초기화 조각 URL, [(URL, 길이)])"""
+    protocol = fmt.get('protocol')
+    if protocol == 'http_dash_segments':
+        fragments = fmt.get('fragments')
+        if not isinstance(fragments, list) or not fragments:
+            raise ClipUnsupported("조각 목록 없음")
+        base = fmt.get('fragment_base_url')
+        init_url = None
+        segments = []
+        for i, fragment in enumerate(fragments):
+            url = fragment.get('url') or urljoin(base, fragment['path'])
+            if fragment.get('duration') is None:
+                if i == 0:
+                    init_url = url  # 길이가 없는 첫 조각은 초기화 조각
+                    continue
+                raise ClipUnsupported("조각 길이 없음")
+            segments.append((url, fragment['duration']))
+        return init_url, segments
+
+    if protocol in ('m3u8_native', 'm3u8'):
+        from yt_dlp.networking import Request
+        response = ydl.urlopen(Request(fmt['url'], headers=fmt.get('http_headers') or {}))
+        text = response.read().decode('utf-8', 'replace')
+        return parse_m3u8_segments(text, response.url or fmt['url'])
+
+    raise ClipUnsupported(f"조각 스트림이 아님 ({protocol})")
+
+
+def select_segments(segments, start, end):
+    """[start, end]와 겹치는 조각의 (첫 번호, 마지막 번호)"""
+    chosen = []
+    position = 0.0
+    for i, (url, duration) in enumerate(segments):
+        seg_start, seg_end = position, position + duration
+        position = seg_end
+        if seg_end > start and seg_start < end:
+            chosen.append(i)
+    if not chosen:
+        raise ClipUnsupported("구간이 영상 길이를 벗어남")
+    return chosen[0], chosen[-1]
+
+
+def plan_runs(segments, ranges):
+    """
+    여러 구간에 필요한 조각을 이어지는 묶음(run)으로 나눈다.
+    묶음마다 파일 하나로 받으므로 떨어진 구간 사이의 조각은 받지 않고, 겹치는 조각은 한 번만 받는다.
+    """
+    starts = []
+    position = 0.0
+    for _, duration in segments:
+        starts.append(position)
+        position += duration
+    needed = set()
+    for start, end in ranges:
+        first, last = select_segments(segments, start, end)
+        needed.update(range(first, last + 1))
+    runs = []
+    for i in sorted(needed):
+        if runs and runs[-1]['last'] == i - 1:
+            runs[-1]['last'] = i
+        else:
+            runs.append({'first': i, 'last': i, 'offset': starts[i], 'path': None})
+    return runs
+
+
+def _stream_kind(fmt):
+    # 코덱을 모르는 경우(None)는 들어 있는 것으로 봄
+    has_video = fmt.get('vcodec') != 'none'
+    has_audio = fmt.get('acodec') != 'none'
+    if has_video and has_audio:
+        return 'muxed'
+    return 'video' if has_video else 'audio'
+
+
+def plan_clip(ydl, info, ranges):
+    """
+    조각 스트림 중 ydl의 format 설정에 맞는 포맷을 골라 포맷별로 받을 조각 묶음을 정한다.
+    반환: [{'format', 'kind', 'init_url', 'segments', 'runs', 'total_duration'}]
+    """
+    formats = [f for f in info.get('formats') or [] if f.get('protocol') in FRAGMENT_PROTOCOLS]
+    if not formats:
+        raise ClipUnsupported("조각 스트림 포맷 없음")
+    try:
+        requested = select_formats(ydl, info, formats)
+    except Exception as e:
+        raise ClipUnsupported(f"포맷 선택 실패: {e}")
+
+    plan = []
+    for fmt in requested:
+        init_url, segments = stream_segments(ydl, fmt)
+        plan.append({
+            'format': fmt,
+            'kind': _stream_kind(fmt),
+            'init_url': init_url,
+            'segments': segments,
+            'runs': plan_runs(segments, ranges),
+            'total_duration': sum(duration for _, duration in segments),
+        })
+    return plan
+
+
+# --- 다운로드 ---
+def _part_ext(stream):
+    fmt = stream['format']
+    if fmt.get('protocol') == 'http_dash_segments':
+        return fmt.get('ext') or 'mp4'
+    # HLS: 초기화 조각이 있으면 fMP4, 없으면 MPEG-TS
+    return 'mp4' if stream['init_url'] else 'ts'
+
+
+def download_plan(ydl, info, plan, base_path):
+    """계획한 조각 묶음을 한 번에 받아 묶음마다 run['path']에 임시 파일 경로를 기록"""
+    requested = []
+    for stream in plan:
+        fmt = stream['format']
+        format_id = fmt.get('format_id') or str(len(requested))
+        size = fmt.get('filesize') or fmt.get('filesize_approx')
+        if not size and fmt.get('tbr') and stream['total_duration']:
+            size = fmt['tbr'] * 125 * stream['total_duration']
+        for n, run in enumerate(stream['runs']):
+            chosen = stream['segments'][run['first']:run['last'] + 1]
+            fragments = [{'url': url, 'duration': duration} for url, duration in chosen]
+            if stream['init_url']:
+                fragments.insert(0, {'url': stream['init_url']})
+            # 진행률이 포맷 ID별로 합산되므로 묶음마다 구분
+            run_id = format_id if len(stream['runs']) == 1 else f"{format_id}-{n}"
+            run['path'] = f"{base_path}.clip-f{run_id}.{_part_ext(stream)}"
+            run_duration = sum(duration for _, duration in chosen)
+            estimated = int(size * run_duration / stream['total_duration']) if size and stream['total_duration'] else None
+            requested.append(dict(fmt, format_id=run_id, protocol='http_dash_segments', fragments=fragments,
+                                  fragment_base_url=None, filepath=run['path'], filesize=None,
+                                  filesize_approx=estimated))
+
+    download_info = dict(unselected_info(info), protocol='http_dash_segments',
+                         url=requested[0]['fragments'][0]['url'], requested_formats=requested,
+                         fragments=requested[0]['fragments'],
+                         http_headers=requested[0].get('http_headers') or info.get('http_headers'))
+    download_info.pop('is_live', None)
+    if not ydl.dl(base_path, download_info):
+        raise Exception("조각 다운로드 실패")
+
+
+def clip_sources(plan, start, end):
+    """구간 하나를 자를 때 쓸 [(종류, 파일의 원본 기준 시작 시각, 경로)]"""
+    sources = []
+    for stream in plan:
+        first, last = select_segments(stream['segments'], start, end)
+        run = next(r for r in stream['runs'] if r['first'] <= first and last <= r['last'])
+        sources.append((stream['kind'], run['offset'], run['path']))
+    return sources
+
+
+# --- 로컬 자르기 ---
+class ClipCutter:
+    def __init__(self, ffmpeg, ffprobe, workdir_base, mp3_quality=None):
+        self.ffmpeg = ffmpeg
+        self.ffprobe = ffprobe
+        self.base = workdir_base
+        self.mp3_quality = mp3_quality  # mp3 인코딩 음질 (설정의 mp3_quality)
+        self.temp_files = []
+
+    def _run(self, args):
+        kwargs = {}
+        if os.name == 'nt':
+            kwargs['creationflags'] = 0x08000000  # CREATE_NO_WINDOW
+        result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+        if result.returncode != 0:
+            message = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+            raise Exception(f"구간 자르기 실패: {message[-1] if message else result.returncode}")
+        return result.stdout.decode('utf-8', 'replace')
+
+    def _temp(self, suffix):
+        path = f"{self.base}.cut{len(self.temp_files)}{suffix}"
+        self.temp_files.append(path)
+        return path
+
+    def cleanup(self):
+        for path in self.temp_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def probe_video(self, path):
+        """(코덱 이름, 파일 시작 기준 키프레임 시각 목록)"""
+        out = self._run([self.ffprobe, '-v', 'error', '-select_streams', 'v:0',
+                         '-show_entries', 'stream=codec_name:format=start_time', '-of', 'default=nw=1', path])
+        values = dict(line.split('=', 1) for line in out.splitlines() if '=' in line)
+        codec = values.get('codec_name', '')
+        try:
+            file_start = float(values.get('start_time', 0))
+        except ValueError:
+            file_start = 0.0
+        out = self._run([self.ffprobe, '-v', 'error', '-select_streams', 'v:0', '-skip_frame', 'nokey',
+                         '-show_entries', 'frame=best_effort_timestamp_time', '-of', 'csv=p=0', path])
+        keyframes = []
+        for line in out.splitlines():
+            try:
+                keyframes.append(float(line.strip().rstrip(',')) - file_start)
+            except ValueError:
+                continue
+        return codec, sorted(keyframes)
+
+    def _copy(self, src, start, duration, dst, stream='v'):
+        self._run([self.ffmpeg, '-y', '-v', 'error', '-ss', f"{start:.3f}", '-i', src, '-t', f"{duration:.3f}",
+                   '-map', f'0:{stream}:0', '-c', 'copy', dst])
+
+    def _encode(self, src, start, duration, dst, encoder):
+        self._run([self.ffmpeg, '-y', '-v', 'error', '-ss', f"{start:.3f}", '-i', src, '-t', f"{duration:.3f}",
+                   '-map', '0:v:0', '-c:v', encoder, '-preset', 'veryfast', '-crf', '18', dst])
+
+    def cut_video(self, src, start, end):
+        """
+        파일 기준 [start, end] 영상만 잘라 (결과 경로, 실제 시작 위치) 반환.
+        h264는 정확한 위치로, 그 외 코덱은 start 직전 키프레임부터 자른다.
+        """
+        codec, keyframes = self.probe_video(src)
+        encoder = SMART_CUT_ENCODERS.get(codec)
+
+        if encoder is None:
+            # 재인코딩 없이 직전 키프레임부터 복사 (음성도 같은 위치부터 잘라 싱크 유지)
+            before = [k for k in keyframes if k <= start + EPSILON]
+            actual_start = before[-1] if before else 0.0
+            dst = self._temp('.mkv')
+            self._copy(src, actual_start, end - actual_start, dst)
+            return dst, actual_start
+
+        inner = [k for k in keyframes if start - EPSILON <= k <= end + EPSILON]
+        if len(inner) < 2:
+            # 구간이 GOP 하나 안에 있으면 구간 전체 재인코딩
+            dst = self._temp('.ts')
+            self._encode(src, start, end - start, dst, encoder)
+            return dst, start
+
+        first, last = inner[0], inner[-1]
+        pieces = []
+        if first - start > EPSILON:
+            pieces.append(self._temp('.ts'))
+            self._encode(src, start, first - start, pieces[-1], encoder)
+        pieces.append(self._temp('.ts'))
+        self._copy(src, first, last - first, pieces[-1])
+        if end - last > EPSILON:
+            pieces.append(self._temp('.ts'))
+            self._encode(src, last, end - last, pieces[-1], encoder)
+
+        if len(pieces) == 1:
+            return pieces[0], start
+        list_file = self._temp('.txt')
+        with open(list_file, 'w', encoding='utf-8') as f:
+            for piece in pieces:
+                escaped = os.path.abspath(piece).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        dst = self._temp('.ts')
+        self._run([self.ffmpeg, '-y', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', list_file,
+                   '-c', 'copy', dst])
+        return dst, start
+
+    def cut_audio(self, src, start, duration, dst, fmt, muxer=None):
+        """음성은 정확한 위치에서 잘라 재인코딩 (짧은 클립이라 비용이 작음)"""
+        args = [self.ffmpeg, '-y', '-v', 'error', '-ss', f"{start:.3f}", '-i', src, '-t', f"{duration:.3f}",
+                '-map', '0:a:0', '-vn'] + audio_encoder_args(fmt, self.mp3_quality)
+        if muxer:
+            args += ['-f', muxer]
+        self._run(args + [dst])
+
+    def mux(self, video, audio, dst, fmt):
+        args = [self.ffmpeg, '-y', '-v', 'error', '-i', video]
+        if audio:
+            args += ['-i', audio, '-map', '0:v:0', '-map', '1:a:0']
+        args += ['-c', 'copy']
+        if fmt == 'mp4':
+            args += ['-movflags', '+faststart', '-f', 'mp4']
+        else:
+            args += ['-f', 'matroska']
+        self._run(args + [dst])
+
+
+def cut_clip(cutter, sources, start, end, out_path, fmt):
+    """sources([(종류, 시작 시각, 경로)])에서 [start, end] 구간을 잘라 out_path로 저장"""
+    video = next((src for src in sources if src[0] in ('video', 'muxed')), None)
+    audio = next((src for src in sources if src[0] == 'audio'), None)
+    if audio is None:
+        # 영상+음성이 한 스트림에 들어 있는 경우 (HLS 등)
+        audio = next((src for src in sources if src[0] == 'muxed'), None)
+    temp_out = f"{out_path}.part"
+
+    if fmt in AUDIO_ONLY_FORMATS or video is None:
+        if audio is None:
+            raise ClipUnsupported("음성 스트림 없음")
+        _, offset, path = audio
+        cutter.cut_audio(path, max(start - offset, 0), end - start, temp_out, fmt, muxer=AUDIO_MUXERS[fmt])
+        os.replace(temp_out, out_path)
+        return
+
+    _, v_offset, v_path = video
+    video_cut, actual_start = cutter.cut_video(v_path, max(start - v_offset, 0), end - v_offset)
+    clip_start = v_offset + actual_start  # 영상이 실제로 시작하는 (원본 기준) 시각
+
+    audio_cut = None
+    if audio is not None:
+        _, a_offset, a_path = audio
+        audio_cut = cutter._temp('.m4a' if fmt == 'mp4' else '.mka')
+        cutter.cut_audio(a_path, max(clip_start - a_offset, 0), end - clip_start, audio_cut, fmt)
+    cutter.mux(video_cut, audio_cut, temp_out, fmt)
+    os.replace(temp_out, out_path)
+
+
+def find_ffmpeg(ydl):
+    """yt-dlp와 같은 규칙으로 찾은 (ffmpeg, ffprobe) 경로. 없으면 ClipUnsupported"""
+    from yt_dlp.postprocessor.ffmpeg import FFmpegPostProcessor
+
+    ffmpeg = FFmpegPostProcessor(ydl)
+    if not ffmpeg.available or not ffmpeg.probe_available:
+        raise ClipUnsupported("ffmpeg/ffprobe 없음")
+    return ffmpeg.executable, ffmpeg.probe_executable
+
+
+def cut_clips(tools, jobs, fmt, on_clip_done=None, mp3_quality=None):
+    """
+    jobs([(sources, start, end, out_path)])를 병렬로 자른다. mp3는 mp3_quality 음질로 인코딩.
+    클립 하나가 끝날 때마다 on_clip_done(out_path) 호출. 실패한 클립이 있으면 나머지를 마친 뒤 예외를 올린다.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def cut_one(job):
+        sources, start, end, out_path = job
+        cutter = ClipCutter(tools[0], tools[1], os.path.splitext(out_path)[0], mp3_quality)
+        try:
+            cut_clip(cutter, sources, start, end, out_path, fmt)
+        finally:
+            cutter.cleanup()
+        if on_clip_done is not None:
+            on_clip_done(out_path)
+
+    errors = []
+    with ThreadPoolExecutor(max_workers=min(CUT_WORKERS, len(jobs))) as pool:
+        for future in [pool.submit(cut_one, job) for job in jobs]:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+    if errors:
+        raise errors[0]
+
+
+def download_range_sources(ydl, info, clips):
+    """
+    clips([(start, end, out_path)])에 걸친 조각만 한 번 받음. 자르기는 호출자가 cut_clips로 (후처리 풀에서).
+    반환: (ffmpeg 경로, cut_clips에 넘길 jobs, 자른 뒤 지울 받은 파일 목록)
+    조각 단위로 처리할 수 없으면 아무것도 받지 않고 ClipUnsupported를 올린다.
+    """
+    tools = find_ffmpeg(ydl)
+    if any(end <= start for start, end, _ in clips):
+        raise ClipUnsupported("잘못된 구간")
+
+    plan = plan_clip(ydl, info, [(start, end) for start, end, _ in clips])
+    download_plan(ydl, info, plan, os.path.splitext(clips[0][2])[0])
+    jobs = [(clip_sources(plan, start, end), start, end, out_path) for start, end, out_path in clips]
+    return tools, jobs, [run['path'] for stream in plan for run in stream['runs']]
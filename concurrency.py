@@ -0,0 +1,252 @@
+import threading
+import time
+import weakref
+
+from scheduler import host_of
+
+MIN_LEVEL = 1
+MAX_LEVEL = 16  # yt-dlp 조각 스레드 수 (실제 동시 요청 수는 level로 제한)
+INITIAL_LEVEL = 4
+WINDOW = 1.5  # 처리량을 측정하는 구간 (초)
+GAIN_THRESHOLD = 0.05  # 동시 요청을 늘렸을 때 이만큼 이상 빨라져야 유지
+HOLD_WINDOWS = 4  # 한계 도달 후 다시 늘려보기까지 기다리는 구간 수
+CEILING_WINDOWS = 20  # 오류가 났던 수준을 다시 시도하기까지 기다리는 구간 수
+BACKOFF_STATUS = (403, 429, 503)  # 서버가 제한을 거는 응답
+MAX_BACKOFF = 4.0  # 연속 오류 시 재시도 전 최대 대기 (초)
+
+
+def media_host(url):
+    """
+    적정 동시성을 기억할 미디어 서버 도메인.
+    조각은 페이지(youtube.com)가 아니라 CDN(rr3---sn-xxxx.googlevideo.com)에서 받고
+    CDN 노드 이름은 영상마다 달라지므로 마지막 두 단계 도메인(googlevideo.com)으로 묶는다.
+    """
+    host = host_of(url)
+    if host.replace('.', '').isdigit() or ':' in host:
+        return host  # IP 주소
+    return '.'.join(host.split('.')[-2:])
+
+
+# --- 작업별 조각 동시성 제어 (AIMD) ---
+class FragmentConcurrency:
+    """
+    작업 하나의 동시 HTTP 요청 수(level)를 정한다.
+    - 슬롯이 모두 사용 중이면 측정 구간마다 1씩 늘려보고 (additive increase)
+    - 늘렸는데 작업/전체 처리량이 GAIN_THRESHOLD 이상 늘지 않으면 한 단계 되돌리고 한동안 유지 (knee)
+    - 403/429/503 또는 전송 오류가 나면 절반으로 줄인다 (multiplicative decrease)
+      오류가 난 수준 바로 아래(ceiling)까지는 확인 없이 다시 늘리고, 그 이상은 한동안 시도하지 않음
+    """
+
+    def __init__(self, registry, initial=INITIAL_LEVEL):
+        self.registry = registry
+        self.host = None  # 첫 요청의 미디어 서버 도메인 (bind에서 정함)
+        self.level = max(MIN_LEVEL, min(MAX_LEVEL, initial))
+        self.throughput = 0.0  # 마지막 측정 구간의 처리량 (bytes/s)
+        self.errors = 0
+        self._consecutive_errors = 0
+        self._cond = threading.Condition()
+        self._active = 0
+        self._saturated = False  # 이번 구간에 슬롯이 부족해 기다린 요청이 있었는지
+        self._bytes = 0
+        self._window_start = time.monotonic()
+        self._window_errors = 0
+        self._hold = 0
+        self._probe = None  # 늘리기 직전의 (작업 처리량, 전체 처리량)
+        self._ceiling = None  # 오류 없이 쓸 수 있었던 최대 수준
+        self._ceiling_age = 0
+
+    def bind(self, url):
+        """첫 요청 URL의 미디어 서버에서 지난 작업이 찾은 수준부터 시작. 이미 정해졌으면 무시"""
+        if self.host is not None:
+            return
+        host = media_host(url)
+        level = self.registry.host_level(host)
+        with self._cond:
+            if self.host is not None:
+                return
+            self.host = host
+            if level is not None:
+                self.level = level
+                self._cond.notify_all()
+
+    # --- 요청 슬롯 ---
+    def acquire(self, should_stop=lambda: False):
+        with self._cond:
+            while self._active >= self.level and not should_stop():
+                self._saturated = True
+                self._cond.wait(0.25)
+            self._active += 1
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    # --- 측정 ---
+    def on_bytes(self, count):
+        with self._cond:
+            self._bytes += count
+            now = time.monotonic()
+            if now - self._window_start >= WINDOW:
+                self._decide(now)
+
+    def on_error(self, status=None):
+        """요청 실패. 같은 구간에서는 한 번만 줄이고, 재시도 전에 기다릴 시간을 반환"""
+        with self._cond:
+            self.errors += 1
+            self._consecutive_errors += 1
+            self._window_errors += 1
+            if self._window_errors == 1:
+                self._ceiling = max(MIN_LEVEL, self.level - 1)
+                self._ceiling_age = 0
+                self.level = max(MIN_LEVEL, self.level // 2)
+                self._hold = 1
+                self._probe = None
+            return min(MAX_BACKOFF, 0.1 * 2 ** self._consecutive_errors)
+
+    def on_success(self):
+        with self._cond:
+            self._consecutive_errors = 0
+
+    def _decide(self, now):
+        self.throughput = self._bytes / (now - self._window_start)
+        aggregate = self.registry.aggregate_throughput()
+
+        if self._ceiling is not None:
+            self._ceiling_age += 1
+            if self._ceiling_age >= CEILING_WINDOWS:
+                self._ceiling = None
+
+        if self._window_errors:
+            pass  # on_error에서 이미 줄였음
+        elif self._hold > 0:
+            self._hold -= 1
+        elif self._ceiling is not None and self.level < self._ceiling:
+            # 오류 없이 쓰던 수준까지는 바로 회복
+            if self._saturated:
+                self.level += 1
+                self._cond.notify_all()
+        elif self._ceiling is not None:
+            pass  # 오류가 났던 수준은 한동안 시도하지 않음
+        elif self._probe is not None:
+            job_before, aggregate_before = self._probe
+            self._probe = None
+            gained = (self.throughput > job_before * (1 + GAIN_THRESHOLD)
+                      and aggregate > aggregate_before * (1 + GAIN_THRESHOLD / 2))
+            if not gained:
+                # 더 늘려도 빨라지지 않는 지점: 한 단계 되돌리고 유지
+                self.level = max(MIN_LEVEL, self.level - 1)
+                self._hold = HOLD_WINDOWS
+        elif self._saturated and self.level < MAX_LEVEL:
+            self._probe = (self.throughput, aggregate)
+            self.level += 1
+            self._cond.notify_all()
+
+        self._bytes = 0
+        self._window_start = now
+        self._window_errors = 0
+        self._saturated = False
+
+    def finish(self):
+        self.registry._unregister(self)
+
+    # --- yt-dlp 연결 ---
+    def wrap_urlopen(self, urlopen, should_stop=lambda: False):
+        """YoutubeDL.urlopen을 감싸 동시 요청 수를 제한하고 처리량/오류를 측정"""
+        controller = self
+
+        def gated_urlopen(req, *args, **kwargs):
+            controller.bind(req if isinstance(req, str) else req.url)
+            controller.acquire(should_stop)
+            try:
+                response = urlopen(req, *args, **kwargs)
+            except Exception as e:
+                controller.release()
+                status = getattr(getattr(e, 'response', None), 'status', None) or getattr(e, 'status', None)
+                if status is None or status in BACKOFF_STATUS:
+                    # yt-dlp는 조각을 곧바로 재시도하므로 여기서 간격을 두어 재시도 횟수를 다 쓰지 않게 함
+                    delay = controller.on_error(status)
+                    end = time.monotonic() + delay
+                    while time.monotonic() < end and not should_stop():
+                        time.sleep(0.05)
+                raise
+            controller.on_success()
+            _track_response(controller, response)
+            return response
+
+        return gated_urlopen
+
+
+def _track_response(controller, response):
+    """응답 본문을 다 읽거나 닫으면 슬롯 반납. 둘 다 없이 버려진 응답은 GC될 때 반납"""
+    read, close = response.read, response.close
+    # finalize는 처음 한 번만 release를 호출하므로 EOF/close/GC 중 먼저 오는 쪽만 반납
+    release = weakref.finalize(response, controller.release)
+
+    def tracked_read(*args, **kwargs):
+        try:
+            data = read(*args, **kwargs)
+        except Exception:
+            release()
+            controller.on_error()
+            raise
+        if data:
+            controller.on_bytes(len(data))
+        else:
+            release()
+        return data
+
+    def tracked_close():
+        release()
+        return close()
+
+    response.read = tracked_read
+    response.close = tracked_close
+
+
+# --- 전체 작업 관리 ---
+class ConcurrencyRegistry:
+    """진행 중인 작업들의 컨트롤러와 미디어 서버 도메인별로 마지막에 찾은 적정 동시성을 기억"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._controllers = []
+        self._host_levels = {}
+
+    def create(self):
+        """새 작업의 컨트롤러. 시작 수준은 첫 요청의 미디어 서버로 정함 (FragmentConcurrency.bind)"""
+        with self._lock:
+            controller = FragmentConcurrency(self)
+            self._controllers.append(controller)
+        return controller
+
+    def host_level(self, host):
+        with self._lock:
+            return self._host_levels.get(host)
+
+    def _unregister(self, controller):
+        with self._lock:
+            if controller in self._controllers:
+                self._controllers.remove(controller)
+                # 같은 미디어 서버에서 받는 다음 작업은 이번에 찾은 값부터 시작
+                if controller.host is not None:
+                    self._host_levels[controller.host] = controller.level
+
+    def aggregate_throughput(self):
+        with self._lock:
+            return sum(c.throughput for c in self._controllers)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'jobs': [{'host': c.host, 'level': c.level, 'throughput': c.throughput, 'errors': c.errors}
+                         for c in self._controllers],
+                'host_levels': dict(self._host_levels),
+            }
+
+
+_registry = ConcurrencyRegistry()
+
+
+def get_concurrency_registry():
+    return _registry
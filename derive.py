@@ -0,0 +1,192 @@
+"""
+로컬 파생 출력
+
+이미 받은 파일에서 다른 형식/화질의 파일을 네트워크 없이 만든다.
+  - 컨테이너만 다르면 스트림 복사 (remux)
+  - 화질이 더 낮거나 목표 컨테이너에 담을 수 없는 코덱이면 그 스트림만 재인코딩
+  - 음성 전용 형식은 음성 스트림만 꺼내며 코덱이 같으면 복사
+원본은 목표보다 화질이 같거나 높아야 한다 (can_derive).
+"""
+import json
+import os
+import subprocess
+
+from clipper import AUDIO_MUXERS, AUDIO_ONLY_FORMATS, audio_encoder_args
+
+VIDEO_FORMATS = ('mp4', 'mkv')
+OUTPUT_FORMATS = VIDEO_FORMATS + AUDIO_ONLY_FORMATS
+# 목표 형식별로 재인코딩 없이 담을 수 있는 음성 코덱
+AUDIO_COPY_CODECS = {
+    'mp3': ('mp3',),
+    'm4a': ('aac', 'alac'),
+    'opus': ('opus',),
+    'mp4': ('aac', 'mp3', 'opus', 'ac3', 'eac3', 'alac', 'flac'),
+    'mkv': None,  # mkv는 모든 코덱 가능
+}
+# mp4에 그대로 담을 수 있는 영상 코덱 (그 외는 h264로 재인코딩)
+MP4_VIDEO_CODECS = ('h264', 'hevc', 'av1', 'vp9')
+
+
+class DeriveUnsupported(Exception):
+    """원본에 필요한 스트림이 없거나 ffmpeg를 찾을 수 없음"""
+
+
+def quality_rank(quality):
+    """'최고' > '1080p' > '720p' ... 비교용 값"""
+    if not quality or quality == '최고':
+        return float('inf')
+    try:
+        return int(str(quality).rstrip('p'))
+    except ValueError:
+        return float('inf')
+
+
+def can_derive(src_format, src_quality, fmt, quality):
+    """src_format/src_quality로 받은 파일에서 fmt/quality 출력을 화질 손해 없이 만들 수 있는지"""
+    if fmt in AUDIO_ONLY_FORMATS:
+        # mp3는 이미 재인코딩된 음성이라 다른 음성 형식의 원본으로 쓰지 않음
+        return src_format != 'mp3' or fmt == 'mp3'
+    if src_format in AUDIO_ONLY_FORMATS:
+        return False
+    return quality_rank(src_quality) >= quality_rank(quality)
+
+
+def job_outputs(options):
+    """작업이 만들 출력 [(형식, 화질)]. 주 형식이 맨 앞이고 'extra_outputs'가 뒤따른다 (중복 제외)"""
+    outputs = []
+    for fmt, quality in [(options['format'], options['quality'])] + [
+            (extra['format'], extra.get('quality') or options['quality'])
+            for extra in options.get('extra_outputs') or []]:
+        if fmt in AUDIO_ONLY_FORMATS:
+            quality = options['quality']  # 음성 전용은 화질 무관
+        if (fmt, quality) not in outputs:
+            outputs.append((fmt, quality))
+    return outputs
+
+
+def with_outputs(options, outputs):
+    """outputs(job_outputs 형식)만 만들도록 바꾼 options 사본"""
+    options = dict(options)
+    (options['format'], options['quality']), extras = outputs[0], outputs[1:]
+    options['extra_outputs'] = [{'format': fmt, 'quality': quality} for fmt, quality in extras]
+    return options
+
+
+def fetch_output(outputs):
+    """
+    네트워크로 받을 출력 하나. 나머지는 모두 이 파일에서 만든다.
+    주 형식이 다른 출력을 모두 만들 수 있으면 주 형식, 아니면 그럴 수 있는 첫 출력
+    (예: mp3 + mp4면 mp4를 받아 mp3를 뽑음, 720p + 1080p면 1080p를 받아 줄임).
+    """
+    for fmt, quality in outputs:
+        if all(can_derive(fmt, quality, f, q) for f, q in outputs):
+            return fmt, quality
+    return outputs[0]
+
+
+def pick_source(candidates, fmt, quality):
+    """
+    candidates([(format, quality, file_path)]) 중 fmt/quality를 만들 원본 경로. 없으면 None.
+    재인코딩이 적은 쪽(같은 형식 > 같은 화질의 영상 > 음성 파일 > 높은 화질)을 고른다.
+    """
+    usable = [c for c in candidates if can_derive(c[0], c[1], fmt, quality)]
+    if not usable:
+        return None
+
+    def cost(candidate):
+        src_format, src_quality = candidate[0], candidate[1]
+        if fmt in AUDIO_ONLY_FORMATS:
+            return (src_format != fmt, src_format in VIDEO_FORMATS)
+        return (quality_rank(src_quality) != quality_rank(quality), quality_rank(src_quality), src_format != fmt)
+
+    return min(usable, key=cost)[2]
+
+
+def find_tools():
+    """yt-dlp와 같은 규칙으로 찾은 (ffmpeg, ffprobe) 경로"""
+    import yt_dlp
+    from clipper import find_ffmpeg, ClipUnsupported
+
+    with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+        try:
+            return find_ffmpeg(ydl)
+        except ClipUnsupported:
+            raise DeriveUnsupported("다른 형식으로 만들려면 ffmpeg/ffprobe가 필요합니다")
+
+
+def _run(args):
+    kwargs = {}
+    if os.name == 'nt':
+        kwargs['creationflags'] = 0x08000000  # CREATE_NO_WINDOW
+    result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+    if result.returncode != 0:
+        message = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise Exception(f"형식 변환 실패: {message[-1] if message else result.returncode}")
+    return result.stdout.decode('utf-8', 'replace')
+
+
+def probe_streams(ffprobe, path):
+    """첫 영상/음성 스트림의 코덱과 영상 높이 {'video', 'audio', 'height'}"""
+    out = _run([ffprobe, '-v', 'error', '-show_entries', 'stream=codec_type,codec_name,height',
+                '-of', 'json', path])
+    result = {'video': None, 'audio': None, 'height': 0}
+    for stream in json.loads(out).get('streams', []):
+        kind = stream.get('codec_type')
+        if kind == 'video' and result['video'] is None:
+            # 표지 이미지(mjpeg/png)는 영상으로 보지 않음
+            if stream.get('codec_name') in ('mjpeg', 'png'):
+                continue
+            result['video'] = stream.get('codec_name')
+            result['height'] = stream.get('height') or 0
+        elif kind == 'audio' and result['audio'] is None:
+            result['audio'] = stream.get('codec_name')
+    return result
+
+
+def _audio_args(fmt, codec, mp3_quality):
+    copyable = AUDIO_COPY_CODECS.get(fmt)
+    if copyable is None or codec in copyable:
+        return ['-c:a', 'copy']
+    return audio_encoder_args(fmt, mp3_quality)
+
+
+def derive_output(tools, src, dst, fmt, quality=None, mp3_quality=None):
+    """
+    src에서 fmt/quality 출력을 dst로 만든다.
+    .part 파일에 쓴 뒤 이름을 바꾸므로 중간에 실패해도 dst는 생기지 않는다.
+    """
+    ffmpeg, ffprobe = tools
+    streams = probe_streams(ffprobe, src)
+    args = [ffmpeg, '-y', '-v', 'error', '-i', src]
+
+    if fmt in AUDIO_ONLY_FORMATS:
+        if not streams['audio']:
+            raise DeriveUnsupported("원본에 음성이 없습니다")
+        args += ['-map', '0:a:0', '-vn'] + _audio_args(fmt, streams['audio'], mp3_quality)
+    else:
+        if not streams['video']:
+            raise DeriveUnsupported("원본에 영상이 없습니다")
+        target = quality_rank(quality)
+        if streams['height'] > target:
+            video_args = ['-vf', f"scale=-2:{target}", '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '20']
+        elif fmt == 'mp4' and streams['video'] not in MP4_VIDEO_CODECS:
+            video_args = ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '18']
+        else:
+            video_args = ['-c:v', 'copy']
+        args += ['-map', '0:v:0', '-map', '0:a:0?'] + video_args
+        if streams['audio']:
+            args += _audio_args(fmt, streams['audio'], mp3_quality)
+        if fmt == 'mp4':
+            args += ['-movflags', '+faststart']
+
+    temp_path = f"{dst}.part"
+    args += ['-f', AUDIO_MUXERS[fmt], temp_path]
+    try:
+        _run(args)
+        os.replace(temp_path, dst)
+    finally:
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
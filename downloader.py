@@ -1,8 +1,47 @@
-import os
-import yt_dlp
-from PyQt5.QtCore import QThread, pyqtSignal
-from yt_dlp.utils import sanitize_filename
-from utils import hms_to_seconds
+import time
+from collections import OrderedDict
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from engine import DownloadJob, extract_video_info, iter_collection_entries
+from metacache import summarize, get_metadata_cache
+from utils import video_key
+from progress import STAGE_POSTPROCESS
+
+# --- 재생목록/채널 펼치기 워커 ---
+class PlaylistWorker(QThread):
+    entries_found = pyqtSignal(list)
+    error_occurred = pyqtSignal(str)
+
+    BATCH_SIZE = 25
+    BATCH_INTERVAL = 0.3  # 초
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self.is_stopped = False
+        self.count = 0
+
+    def run(self):
+        batch = []
+        last_emit = time.monotonic()
+        try:
+            for entry in iter_collection_entries(self.url, lambda: self.is_stopped):
+                batch.append(entry)
+                self.count += 1
+                # 항목마다 신호를 보내지 않고 일정 개수/시간마다 묶어서 전달
+                if len(batch) >= self.BATCH_SIZE or time.monotonic() - last_emit >= self.BATCH_INTERVAL:
+                    self.entries_found.emit(batch)
+                    batch = []
+                    last_emit = time.monotonic()
+            if batch and not self.is_stopped:
+                self.entries_found.emit(batch)
+        except Exception as e:
+            if batch and not self.is_stopped:
+                self.entries_found.emit(batch)
+            if not self.is_stopped:
+                self.error_occurred.emit(str(e))
+
+    def stop(self):
+        self.is_stopped = True
 
 # --- 메타데이터 워커 ---
 class MetadataWorker(QThread):
@@ -12,205 +51,145 @@ class MetadataWorker(QThread):
     def __init__(self, url):
         super().__init__()
         self.url = url
+        self.info = None  # 다운로드 작업에 넘겨줄 전체 info dict
 
     def run(self):
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'nocheckcertificate': True,
-            'writesubtitles': False,
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            },
-        }
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(self.url, download=False)
-                duration = info.get('duration', 0)
-                self.info_fetched.emit({'duration': duration, 'title': info.get('title')})
+            info = extract_video_info(self.url)
+            self.info = info
+            duration = info.get('duration', 0)
+            self.info_fetched.emit({'duration': duration, 'title': info.get('title'), 'url': self.url,
+                                    'heights': summarize(info)['heights']})
         except Exception as e:
             self.error_occurred.emit(str(e))
 
-# --- 다운로드 워커 ---
+# --- URL 입력 중 메타데이터 미리 가져오기 ---
+class MetadataPrefetcher(QObject):
+    """
+    입력이 멈추면(delay_ms) 마지막 URL만 분석한다. 같은 영상은 한 번만 분석하고
+    새 URL이 들어오면 이전 요청은 기다리지 않고 결과만 버린다 (분석은 백그라운드에서 끝까지 진행되어 캐시에 남음).
+    분석한 전체 info는 take()로 다운로드 작업에 넘겨 다시 분석하지 않게 한다.
+    """
+    info_fetched = pyqtSignal(dict)  # 현재 URL의 요약 {'duration', 'title', 'url', 'heights'}
+
+    MAX_RUNNING = 2  # 동시에 분석하는 영상 수 (버린 요청 포함)
+    KEEP = 8  # take()를 기다리며 보관하는 info 수
+    MAX_AGE = 30 * 60  # 보관한 info를 넘겨줄 수 있는 시간 (초, 포맷 URL 만료 대비)
+
+    def __init__(self, delay_ms=400, parent=None):
+        super().__init__(parent)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._start)
+        self._pending = None  # 지연 시간이 지나면 분석할 URL
+        self._waiting = None  # 동시 분석 수가 다 차서 자리가 나기를 기다리는 URL
+        self._current = None  # 화면에 보여줄 영상 키 (이 키의 결과만 알림)
+        self._workers = {}  # 영상 키 -> 실행 중인 MetadataWorker (끝날 때까지 참조를 유지하고 종료 시 기다림)
+        self._infos = OrderedDict()  # 영상 키 -> (받은 시각, info, 요약)
+
+    def request(self, url):
+        """URL 입력/변경 시 호출. 지연 시간 안에 다시 호출되면 이전 URL은 분석하지 않음"""
+        self._pending = url
+        self._current = video_key(url)
+        self._timer.start()
+
+    def cancel(self):
+        """입력이 지워지거나 올바른 URL이 아닐 때. 실행 중인 분석은 멈추지 않고 결과만 알리지 않음"""
+        self._timer.stop()
+        self._pending = None
+        self._waiting = None
+        self._current = None
+
+    def wait(self, timeout):
+        """앱 종료 시: 실행 중인 분석이 끝나기를 최대 timeout초 기다림 (추출은 중간에 멈출 수 없음). 모두 끝났으면 True"""
+        deadline = time.monotonic() + timeout
+        for worker in list(self._workers.values()):
+            if not worker.wait(int(max(deadline - time.monotonic(), 0) * 1000)):
+                return False
+        return True
+
+    def take(self, url):
+        """미리 분석한 전체 info (없거나 오래되었으면 None). 한 번만 넘겨줌"""
+        entry = self._infos.pop(video_key(url), None)
+        if entry is None or time.monotonic() - entry[0] > self.MAX_AGE:
+            return None
+        return entry[1]
+
+    def _start(self):
+        url, self._pending = self._pending, None
+        if url is None:
+            return
+        key = video_key(url)
+        entry = self._infos.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= self.MAX_AGE:
+            self.info_fetched.emit(entry[2])
+            return
+        if key in self._workers:
+            return  # 같은 영상을 이미 분석 중 (끝나면 알림)
+        # 캐시에 요약이 있으면 분석을 기다리지 않고 먼저 표시
+        summary = get_metadata_cache().get_summary(url)
+        if summary:
+            self.info_fetched.emit(dict(summary, url=url))
+        if len(self._workers) >= self.MAX_RUNNING:
+            self._waiting = url
+            return
+        worker = MetadataWorker(url)
+        worker.info_fetched.connect(lambda summary, key=key, worker=worker: self._on_fetched(key, worker, summary))
+        worker.finished.connect(lambda key=key: self._on_finished(key))
+        self._workers[key] = worker
+        worker.start()
+
+    def _on_fetched(self, key, worker, summary):
+        self._infos[key] = (time.monotonic(), worker.info, summary)
+        self._infos.move_to_end(key)
+        while len(self._infos) > self.KEEP:
+            self._infos.popitem(last=False)
+        if key == self._current:
+            self.info_fetched.emit(summary)
+
+    def _on_finished(self, key):
+        worker = self._workers.pop(key, None)
+        if worker is not None:
+            worker.deleteLater()
+        if self._waiting is not None and video_key(self._waiting) == self._current:
+            self._pending, self._waiting = self._waiting, None
+            self._start()
+
+# --- 다운로드 워커 (DownloadJob을 QThread에서 실행하고 결과를 신호로 전달) ---
 class DownloadWorker(QThread):
-    progress_signal = pyqtSignal(float, str)
+    """
+    스레드(finished)는 다운로드 단계가 끝나면 종료되어 슬롯을 반납한다.
+    병합/변환이 후처리 풀로 넘어간 경우 완료/오류 신호는 그 뒤에 오며, 작업이 완전히 끝나면 done_signal.
+    """
     finished_signal = pyqtSignal(str, str)
     error_signal = pyqtSignal(str)
     info_signal = pyqtSignal(dict)
+    resume_signal = pyqtSignal(dict)
+    done_signal = pyqtSignal()
 
-    def __init__(self, url, options):
+    def __init__(self, url, options, info=None, resume=None):
         super().__init__()
         self.url = url
         self.options = options
-        self.is_stopped = False
+        self.job = DownloadJob(url, options, info=info, resume=resume,
+                               on_info=self.info_signal.emit,
+                               on_finished=self.finished_signal.emit,
+                               on_error=self.error_signal.emit,
+                               on_resume_data=self.resume_signal.emit,
+                               on_done=self.done_signal.emit)
+        # 진행률은 신호 대신 여기에 누적하고 GUI가 주기적으로 읽어감 (ProgressHub)
+        self.progress = self.job.progress
+
+    @property
+    def is_stopped(self):
+        return self.job.is_stopped
+
+    def is_postprocessing(self):
+        return self.job.stage == STAGE_POSTPROCESS
 
     def run(self):
-        if "clip/" in self.url:
-            video_type = "클립"
-        elif "shorts/" in self.url:
-            video_type = "쇼츠"
-        else:
-            video_type = "일반"
-
-        is_clip_mode = self.options.get('mode') == 'clip'
-        start_time_str = self.options.get('start_time', '00:00:00')
-        end_time_str = self.options.get('end_time', '00:00:00')
-        save_path = self.options['path']
-        fmt = self.options['format']
-        quality = self.options['quality']
-
-        # [Step 1] 메타데이터 추출 (파일명 생성용)
-        extract_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'nocheckcertificate': True,
-            'writesubtitles': False,
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            },
-        }
-
-        try:
-            final_filename = None
-
-            with yt_dlp.YoutubeDL(extract_opts) as ydl:
-                info = ydl.extract_info(self.url, download=False)
-
-                title = info.get('title', 'video')
-                safe_title = sanitize_filename(title)
-                ext = 'mp3' if fmt == 'mp3' else fmt
-
-                if is_clip_mode:
-                    base_name = f"{safe_title}_clip"
-                    video_type = "구간 클립"
-                else:
-                    base_name = safe_title
-
-                # 중복 처리
-                filename_candidate = f"{base_name}.{ext}"
-                full_path_candidate = os.path.join(save_path, filename_candidate)
-
-                counter = 1
-                while os.path.exists(full_path_candidate):
-                    filename_candidate = f"{base_name} ({counter}).{ext}"
-                    full_path_candidate = os.path.join(save_path, filename_candidate)
-                    counter += 1
-
-                final_save_name_no_ext = os.path.splitext(full_path_candidate)[0]
-
-            # [Step 2] 다운로드 옵션 설정
-            ydl_opts = {
-                'outtmpl': f"{final_save_name_no_ext}.%(ext)s",
-                'progress_hooks': [self.progress_hook],
-                'noplaylist': True,
-                'quiet': True,
-                'no_warnings': True,
-                'nocheckcertificate': True,
-                'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                },
-                'retries': 10,
-                'format_sort': ['res', 'ext:mp4:m4a', 'codec:h264:aac'],
-            }
-
-            # [핵심 변경] 클립 모드 처리 방식 변경
-            if is_clip_mode:
-                # yt-dlp의 download_ranges 대신 FFmpeg를 외부 다운로더로 지정
-                # FFmpeg가 직접 URL에 접속해서 지정된 시간만큼만 데이터를 가져옴
-                # 이 방식이 오디오 싱크 문제 해결에 가장 확실함
-                ydl_opts['external_downloader'] = {'default': 'ffmpeg'}
-                ydl_opts['external_downloader_args'] = {
-                    'ffmpeg_i': ['-ss', start_time_str, '-to', end_time_str]
-                }
-            else:
-                # 일반 모드에서는 병렬 다운로드 활성화 (속도 향상)
-                ydl_opts['concurrent_fragment_downloads'] = 8
-
-            if fmt == 'mp3':
-                ydl_opts.update({
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                })
-            else:
-                if quality == '최고':
-                    ydl_opts['format'] = "bestvideo+bestaudio/best"
-                else:
-                    height = quality.replace('p', '')
-                    ydl_opts['format'] = f"bestvideo[height<={height}]+bestaudio/best[height<={height}]"
-
-                ydl_opts['merge_output_format'] = fmt
-
-            # [Step 3] 다운로드 실행
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                filesize = info.get('filesize') or info.get('filesize_approx')
-                if filesize:
-                    size_mb = f"{filesize / (1024 * 1024):.1f}MB"
-                else:
-                    size_mb = "계산 중..."
-
-                duration_sec = info.get('duration', 0)
-                m, s = divmod(duration_sec, 60)
-                h, m = divmod(m, 60)
-                duration_str = f"{int(h):02d}:{int(m):02d}:{int(s):02d}"
-
-                if is_clip_mode:
-                    display_duration = f"{start_time_str} ~ {end_time_str}"
-                else:
-                    display_duration = duration_str
-
-                self.info_signal.emit({
-                    'title': title,
-                    'thumbnail': info.get('thumbnail', ''),
-                    'duration': display_duration,
-                    'filesize': size_mb,
-                    'ext': fmt,
-                    'video_type': video_type
-                })
-
-                if self.is_stopped: return
-
-                ydl.download([self.url])
-
-                final_filename = full_path_candidate
-
-            # 실제 파일 크기 확인
-            final_size_str = "알 수 없음"
-            if final_filename and os.path.exists(final_filename):
-                size_bytes = os.path.getsize(final_filename)
-                final_size_str = f"{size_bytes / (1024 * 1024):.1f}MB"
-
-            if not self.is_stopped and final_filename:
-                self.finished_signal.emit(final_filename, final_size_str)
-
-        except Exception as e:
-            if not self.is_stopped:
-                self.error_signal.emit(str(e))
-
-    def progress_hook(self, d):
-        if self.is_stopped:
-            raise Exception("다운로드 중지됨")
-
-        if d['status'] == 'downloading':
-            try:
-                p_str = d.get('_percent_str', '').replace('%', '')
-                if p_str:
-                    progress = float(p_str)
-                else:
-                    downloaded = d.get('downloaded_bytes', 0)
-                    total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
-                    if total > 0:
-                        progress = (downloaded / total) * 100
-                    else:
-                        progress = 0
-                self.progress_signal.emit(progress, "다운로드 중...")
-            except:
-                pass
-        elif d['status'] == 'finished':
-            self.progress_signal.emit(100, "변환 및 저장 중...")
+        self.job.run()
 
     def stop(self):
-        self.is_stopped = True
\ No newline at end of file
+        self.job.stop()
@@ -0,0 +1,730 @@
+import copy
+import os
+import threading
+from concurrent.futures import Future
+from utils import is_collection_url, hms_to_seconds, seconds_to_hms, video_key
+from metacache import get_metadata_cache, unselected_info, select_formats
+from progress import (JobProgress, STAGE_DOWNLOAD, STAGE_POSTPROCESS, STAGE_DONE, STATUS_POSTPROCESSING,
+                      STATUS_POSTPROCESS_QUEUED)
+from postprocess import get_postprocess_pool
+from archive import get_download_archive
+from filenames import get_filename_reservations
+from bandwidth import get_bandwidth_governor
+from concurrency import get_concurrency_registry, MAX_LEVEL
+from clipper import download_range_sources, cut_clips, find_ffmpeg, ClipUnsupported, AUDIO_ONLY_FORMATS
+from sessions import get_ydl_pool, YTDL_CACHE_DIR
+from derive import job_outputs, fetch_output, pick_source, find_tools, derive_output, DeriveUnsupported
+from metrics import JobTimings, get_metrics
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# 음성 전용 형식: 원본 스트림을 그대로 담을 수 있는 포맷을 먼저 골라 재인코딩 없이 컨테이너만 바꿈
+# (FFmpegExtractAudio는 원본 코덱이 목표 코덱과 같으면 -acodec copy로 처리)
+AUDIO_FORMATS = {
+    'mp3': 'bestaudio/best',  # mp3 원본은 없으므로 항상 인코딩 (음질은 mp3_quality)
+    'm4a': 'bestaudio[acodec^=mp4a]/bestaudio/best',  # AAC 그대로
+    'opus': 'bestaudio[acodec=opus]/bestaudio/best',  # Opus 그대로 (ogg)
+}
+DEFAULT_MP3_QUALITY = '192'
+
+def audio_postprocessor(fmt, mp3_quality=None):
+    """음성 전용 형식의 FFmpegExtractAudio 설정"""
+    extract_audio = {'key': 'FFmpegExtractAudio', 'preferredcodec': fmt}
+    if fmt == 'mp3':
+        # 비트레이트(kbps) 또는 0~9 (VBR, 0이 최고 음질)
+        extract_audio['preferredquality'] = str(mp3_quality or DEFAULT_MP3_QUALITY)
+    return extract_audio
+
+# 후처리 단계 표시 이름 (yt-dlp PostProcessor 이름 -> 화면 표시)
+POSTPROCESSOR_LABELS = {
+    'Merger': '병합',
+    'ExtractAudio': '음성 변환',
+    'MoveFiles': '저장',
+}
+
+# 메타데이터 추출용 공통 옵션 (MetadataWorker / DownloadWorker 공용)
+EXTRACT_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'nocheckcertificate': True,
+    'writesubtitles': False,
+    'http_headers': {
+        'User-Agent': USER_AGENT
+    },
+    'cachedir': YTDL_CACHE_DIR,
+}
+
+# yt_dlp는 import에만 수백 ms가 걸리므로 실제로 필요할 때 가져온다 (앱 시작 속도)
+def warm_up():
+    """백그라운드 스레드에서 미리 yt_dlp를 불러오고 추출기 하나를 만들어 두어 첫 다운로드 지연을 없앰"""
+    import yt_dlp
+    import yt_dlp.utils
+    with get_ydl_pool().extractor(EXTRACT_OPTS):
+        pass
+    return yt_dlp
+
+# 진행 중인 영상 분석 (video_key -> Future). 미리 가져오기와 다운로드 작업이 같은 영상을 동시에 분석하지 않도록 공유
+_inflight_lock = threading.Lock()
+_inflight = {}
+
+def extract_video_info(url, use_cache=True):
+    """
+    영상 페이지를 한 번만 분석하여 info dict 반환 (다운로드 단계에서 그대로 재사용).
+    반환하는 info는 포맷 선택 결과를 지운 상태라 형식/화질 설정이 달라도 다시 포맷을 고를 수 있다.
+    포맷 URL이 아직 유효한 캐시가 있으면 네트워크 요청 없이 캐시를 반환한다.
+    같은 영상을 이미 다른 스레드가 분석 중이면 새로 요청하지 않고 그 결과(복사본)를 기다린다.
+    """
+    cache = get_metadata_cache() if use_cache else None
+    if cache is not None:
+        info = cache.get_info(url)
+        if info is not None:
+            return unselected_info(info)  # 예전 버전이 저장한 항목에는 선택 결과가 남아 있음
+
+    key = video_key(url)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+            future.waiting = 0
+        else:
+            future.waiting += 1
+    if not owner:
+        return copy.deepcopy(future.result())
+
+    try:
+        info = _extract_video_info(url, cache)
+    except BaseException as e:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        future.set_exception(e)
+        raise
+    with _inflight_lock:
+        _inflight.pop(key, None)
+        waiting = future.waiting
+    # 반환한 info는 호출한 쪽이 다운로드 중에 바꾸므로 기다리는 쪽에는 그 전에 떠 둔 복사본을 넘김
+    future.set_result(copy.deepcopy(info) if waiting else None)
+    return info
+
+def _extract_video_info(url, cache):
+    import yt_dlp
+    # 풀의 추출기를 재사용 (플레이어 JS/서명 해석 결과와 HTTP 연결을 작업 간에 공유)
+    with get_ydl_pool().extractor(EXTRACT_OPTS) as ydl:
+        info = unselected_info(ydl.extract_info(url, download=False))
+
+    if cache is not None:
+        try:
+            cache.put(url, yt_dlp.YoutubeDL.sanitize_info(info))
+        except Exception as e:
+            print(f"메타데이터 캐시 저장 실패: {e}")
+    return info
+
+# 재생목록 펼치기용 옵션: 영상별 분석 없이 목록만 페이지 단위로 받아옴
+FLAT_EXTRACT_OPTS = dict(EXTRACT_OPTS, extract_flat='in_playlist', lazy_playlist=True)
+
+def iter_collection_entries(url, should_stop=lambda: False, _depth=0):
+    """
+    재생목록/채널 URL의 영상 항목을 받아오는 즉시 하나씩 반환하는 제너레이터.
+    각 항목은 {'url', 'title', 'duration'}이며 영상별 전체 분석은 다운로드 시점으로 미룬다.
+    채널 홈처럼 탭(동영상/쇼츠/라이브)을 담은 결과는 각 탭을 다시 펼친다.
+    """
+    with get_ydl_pool().extractor(FLAT_EXTRACT_OPTS) as ydl:
+        result = ydl.extract_info(url, download=False, process=False)
+        if result.get('_type') in ('playlist', 'multi_video'):
+            entries = result.get('entries') or []
+        else:
+            entries = [result]
+        for entry in entries:
+            if should_stop():
+                return
+            if not entry:
+                continue
+            entry_url = entry.get('url') or entry.get('webpage_url')
+            if entry.get('_type') == 'playlist' or (entry_url and is_collection_url(entry_url)):
+                if _depth < 2 and entry_url:
+                    yield from iter_collection_entries(entry_url, should_stop, _depth + 1)
+                continue
+            if entry.get('ie_key') == 'Youtube' or not entry_url:
+                entry_url = f"https://www.youtube.com/watch?v={entry['id']}"
+            yield {'url': entry_url, 'title': entry.get('title'), 'duration': entry.get('duration')}
+
+# --- 다운로드 작업 (Qt 없이 콜백으로 동작하는 공용 엔진) ---
+class DownloadJob:
+    """
+    영상 한 개를 분석/다운로드하는 작업. GUI(DownloadWorker)와 헤드리스 모드가 함께 사용한다.
+    on_info(dict), on_finished(path, size_str), on_error(msg), on_resume_data(dict) 콜백은
+    작업을 실행한 스레드에서 호출된다.
+
+    resume에 이전 실행의 {'target_path', 'format_id'}를 넘기면 같은 파일명과 포맷으로
+    남아 있는 .part 파일에 이어서 받는다.
+
+    클립 모드 구간은 options의 'chapters'(True면 챕터마다), 'ranges'([{'start', 'end', 'title'}]),
+    'start_time'/'end_time' 순으로 정한다. 구간이 여러 개여도 원본은 한 번만 받는다.
+
+    options의 'extra_outputs'([{'format', 'quality'}])로 여러 형식을 한 번에 만들 수 있다. 그중 하나(fetch_output)만
+    받고 나머지는 받은 파일에서 로컬로 만든다. 다운로드 기록에 화질이 같거나 더 좋은 파일이 있으면
+    ('derive_local', 기본 True) 네트워크 없이 그 파일에서 모든 출력을 만든다.
+
+    병합/음성 변환은 공용 후처리 풀에서 실행되므로 run()은 원본 스트림을 다 받으면 바로 반환한다
+    (다운로드 슬롯 반납). 작업이 완전히 끝나면(완료/오류/중지, 후처리 포함) on_done()이 한 번 호출된다.
+
+    단계별(분석, 파일 이름 예약, 다운로드, 변환) 시각과 바이트 수는 timings에 기록되고
+    끝나면 전체 통계(metrics)에 더해진다.
+    """
+
+    def __init__(self, url, options, info=None, on_info=None, on_finished=None, on_error=None,
+                 resume=None, on_resume_data=None, on_done=None):
+        self.url = url
+        self.options = options
+        self.info = info  # 미리 추출된 info dict가 있으면 재추출하지 않음
+        self.resume = resume or {}
+        self.is_stopped = False
+        self.on_info = on_info or (lambda info: None)
+        self.on_finished = on_finished or (lambda path, size: None)
+        self.on_error = on_error or (lambda msg: None)
+        self.on_resume_data = on_resume_data or (lambda data: None)
+        self.on_done = on_done or (lambda: None)
+        self.stage = STAGE_DOWNLOAD
+        self._reserved_paths = []  # 이 작업이 예약한 저장 경로 (끝나면 반납)
+        self._completed = False
+        self._deferred = []  # 후처리 풀로 넘길 (filename, info, files_to_move)
+        self._outputs = []  # 만들 출력 [(형식, 화질, 경로)] (일반 모드, 주 형식이 맨 앞)
+        self._clip_cut = None  # 후처리 풀에서 자를 (ffmpeg 경로, 클립 작업, 형식) (클립 모드)
+        self._clip_temp = []  # 자르고 나면 지울 받은 조각/원본 파일
+        self._pp_done = 0
+        self._pp_total = 1
+        self.target_path = None
+        self._format_ids = []  # 이번 다운로드에서 고른 포맷 (일반 모드)
+        self._resume_reported = False
+        self.bandwidth_share = None  # 다운로드 중에만 전역 대역폭을 나눠 받음
+        self.concurrency = None  # 조각 동시 요청 수 컨트롤러 (일반 모드)
+        # 'auto'(기본)면 처리량에 맞춰 조절, 숫자면 고정
+        fragments = options.get('fragment_concurrency', 'auto')
+        self.fixed_fragment_concurrency = None if fragments == 'auto' else int(fragments)
+        # 진행률은 콜백 대신 여기에 누적하고 호출자가 주기적으로 읽어감
+        self.progress = JobProgress()
+        self.timings = JobTimings()
+        self._bytes_lock = threading.Lock()
+        self._bytes_seen = {}  # 받는 파일 -> progress hook이 마지막으로 알린 누적 바이트
+        self._partial_sizes = {}  # 받는 파일 -> 작업 시작 때 남아 있던 .part 크기 (이어받을 바이트)
+        self.bytes_received = 0  # 이번 실행에서 실제로 받은 바이트
+
+    def run(self):
+        get_metrics().job_started()
+        handed_off = False
+        try:
+            handed_off = self._download()
+        finally:
+            if not handed_off:
+                self._end()
+
+    def _end(self):
+        """작업 종료 (다운로드 단계 또는 후처리 후). 예약한 파일 이름을 반납하고 on_done 호출"""
+        reservations = get_filename_reservations()
+        for path in self._reserved_paths:
+            reservations.release(path, self._completed)
+        self._reserved_paths = []
+        # 자르기 전에 중지/실패해도 받아 둔 조각/원본은 남기지 않음
+        for path in self._clip_temp:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._clip_temp = []
+        self.stage = STAGE_DONE
+        get_metrics().job_done(self.url, self.timings, self._completed, self.is_stopped)
+        self.on_done()
+
+    def _fail(self, error):
+        if not self.is_stopped:
+            get_metrics().job_failed(str(error))
+            self.on_error(str(error))
+
+    def _reserve(self, save_path, base_name, ext):
+        path = get_filename_reservations().reserve(save_path, base_name, ext)
+        self._reserved_paths.append(path)
+        return path
+
+    def _reserve_outputs(self, outputs, path, fetched):
+        """outputs 각각의 저장 경로. fetched 출력은 path, 나머지는 path와 같은 이름에 확장자만 다르게"""
+        self._outputs = []
+        for fmt, quality in outputs:
+            if (fmt, quality) == fetched:
+                output_path = path
+            else:
+                output_path = get_filename_reservations().reserve_sibling(path, fmt)
+                self._reserved_paths.append(output_path)
+            self._outputs.append((fmt, quality, output_path))
+
+    def _local_source(self, outputs, fetched):
+        """다운로드 기록에서 fetched 출력을 만들 수 있는 파일. 없으면 None"""
+        save_dir = os.path.normcase(os.path.abspath(self.options['path']))
+        candidates = []
+        for src_format, src_quality, path in get_download_archive().files(self.url):
+            same_dir = os.path.normcase(os.path.dirname(os.path.abspath(path))) == save_dir
+            if same_dir and any(src_format == f and (src_quality == q or f in AUDIO_ONLY_FORMATS)
+                                for f, q in outputs):
+                continue  # 같은 폴더의 같은 출력을 다시 받기로 한 경우
+            candidates.append((src_format, src_quality, path))
+        source = pick_source(candidates, *fetched)
+        if source:
+            try:
+                find_tools()
+            except DeriveUnsupported:
+                return None  # ffmpeg가 없으면 평소처럼 받음
+        return source
+
+    def _start_local(self, source, outputs, video_type):
+        """기록된 파일에서 모든 출력을 만드는 작업을 후처리 풀에 넘김 (네트워크 요청 없음)"""
+        from yt_dlp.utils import sanitize_filename
+
+        summary = self.info or get_metadata_cache().get_summary(self.url) or {}
+        title = summary.get('title') or os.path.splitext(os.path.basename(source))[0]
+        with self.timings.phase('reserve'):
+            path = self._reserve(self.options['path'], sanitize_filename(title), outputs[0][0])
+            self._reserve_outputs(outputs, path, outputs[0])
+        self.target_path = path
+        self.on_info({
+            'title': title,
+            'thumbnail': summary.get('thumbnail', ''),
+            'duration': seconds_to_hms(summary.get('duration') or 0),
+            'filesize': f"{os.path.getsize(source) / (1024 * 1024):.1f}MB",
+            'ext': '+'.join(f for f, _ in outputs),
+            'video_type': f"{video_type} (로컬 변환)"
+        })
+        self.stage = STAGE_POSTPROCESS
+        self.progress.set_stage(STAGE_POSTPROCESS, STATUS_POSTPROCESS_QUEUED)
+        get_postprocess_pool().submit(lambda: self._post_process(None, source, []))
+        return True
+
+    def _download(self):
+        """다운로드 단계. 후처리를 풀에 넘겼으면 True (완료 알림은 후처리 후)"""
+        from yt_dlp.utils import sanitize_filename
+
+        if "clip/" in self.url:
+            video_type = "클립"
+        elif "shorts/" in self.url:
+            video_type = "쇼츠"
+        else:
+            video_type = "일반"
+
+        is_clip_mode = self.options.get('mode') == 'clip'
+        save_path = self.options['path']
+        fmt = self.options['format']
+        quality = self.options['quality']
+        outputs = [(fmt, quality)] if is_clip_mode else job_outputs(self.options)
+        # 여러 형식이면 나머지를 모두 만들 수 있는 형식 하나만 받음
+        fmt, quality = fetched = fetch_output(outputs)
+
+        try:
+            final_filename = None
+
+            if not is_clip_mode and self.options.get('derive_local', True):
+                source = self._local_source(outputs, fetched)
+                if source:
+                    return self._start_local(source, outputs, video_type)
+
+            # [Step 1] 메타데이터 추출 (작업당 1회, 미리 추출된 정보가 있으면 생략)
+            if self.info is None:
+                with self.timings.phase('extract'):
+                    self.info = extract_video_info(self.url)
+            info = self.info
+
+            if self.is_stopped: return
+
+            title = info.get('title', 'video')
+            safe_title = sanitize_filename(title)
+            ext = fmt
+
+            self.timings.begin('reserve')
+            clips = []  # 클립 모드: [(시작 초, 끝 초, 저장 경로)]
+            if is_clip_mode:
+                video_type = "구간 클립"
+                ranges = self._clip_ranges(info)
+                if len(ranges) == 1:
+                    start, end, _ = ranges[0]
+                    clips.append((start, end, self._reserve(save_path, f"{safe_title}_clip", ext)))
+                else:
+                    for n, (start, end, label) in enumerate(ranges, 1):
+                        base_name = f"{safe_title}_clip{n:02d}"
+                        if label:
+                            base_name += f"_{sanitize_filename(label)}"
+                        clips.append((start, end, self._reserve(save_path, base_name, ext)))
+                full_path_candidate = clips[0][2]
+            else:
+                resume_path = self.resume.get('target_path')
+                if (resume_path
+                        and os.path.normpath(os.path.dirname(resume_path)) == os.path.normpath(save_path)
+                        and get_filename_reservations().claim(resume_path)):
+                    # 이전 세션의 파일명을 그대로 사용해야 남은 .part 파일에 이어서 받을 수 있음
+                    full_path_candidate = resume_path
+                    self._reserved_paths.append(resume_path)
+                else:
+                    # 중복 처리: 같은 제목의 다른 작업과 겹치지 않는 이름을 원자적으로 예약
+                    full_path_candidate = self._reserve(save_path, safe_title, ext)
+                self._reserve_outputs(outputs, full_path_candidate, fetched)
+            self.target_path = full_path_candidate
+            self.timings.end('reserve')
+
+            final_save_name_no_ext = os.path.splitext(full_path_candidate)[0]
+            self._partial_sizes = self._find_partials(final_save_name_no_ext)
+
+            # [Step 2] 다운로드 옵션 설정
+            ydl_opts = {
+                'outtmpl': f"{final_save_name_no_ext}.%(ext)s",
+                'progress_hooks': [self.progress_hook],
+                'postprocessor_hooks': [self.postprocessor_hook],
+                'noplaylist': True,
+                'quiet': True,
+                'no_warnings': True,
+                'noprogress': True,  # 진행률은 progress hook으로만 전달 (표준 출력 오염 방지)
+                'nocheckcertificate': True,
+                'http_headers': {
+                    'User-Agent': USER_AGENT
+                },
+                'cachedir': YTDL_CACHE_DIR,
+                'retries': 10,
+                'continuedl': True,  # .part/.ytdl(조각 진행 상태)가 있으면 Range 요청으로 이어받기
+                'format_sort': ['res', 'ext:mp4:m4a', 'codec:h264:aac'],
+            }
+
+            # 클립 모드는 구간에 걸친 조각만 받아 로컬에서 자름 (clipper)
+            # 조각 스트림이 아니면 아래 Step 3에서 기존 방식(ffmpeg 외부 다운로더)으로 전환
+            if self.fixed_fragment_concurrency:
+                ydl_opts['concurrent_fragment_downloads'] = self.fixed_fragment_concurrency
+            else:
+                # 일반 모드에서는 조각 병렬 다운로드 (스레드는 최대로 두고 실제 동시 요청 수는 컨트롤러가 조절)
+                ydl_opts['concurrent_fragment_downloads'] = MAX_LEVEL
+
+            if fmt in AUDIO_FORMATS:
+                ydl_opts.update({
+                    'format': AUDIO_FORMATS[fmt],
+                    'postprocessors': [audio_postprocessor(fmt, self.options.get('mp3_quality'))],
+                })
+            else:
+                if quality == '최고':
+                    ydl_opts['format'] = "bestvideo+bestaudio/best"
+                else:
+                    height = quality.replace('p', '')
+                    ydl_opts['format'] = f"bestvideo[height<={height}]+bestaudio/best[height<={height}]"
+
+                ydl_opts['merge_output_format'] = fmt
+
+            # 이어받기: 이전에 고른 포맷을 우선 사용 (더 이상 없으면 원래 조건으로 선택)
+            resume_format = self.resume.get('format_id')
+            if resume_format and not is_clip_mode and full_path_candidate == self.resume.get('target_path'):
+                ydl_opts['format'] = f"{resume_format}/{ydl_opts['format']}"
+
+            # [Step 3] 다운로드 실행 (재추출 없음)
+            with get_ydl_pool().downloader(ydl_opts) as ydl:
+                size_mb = "계산 중..."
+                if not is_clip_mode:
+                    # 이 작업의 설정으로 고를 포맷 (표시할 크기, 이어받기에 기록할 포맷 ID)
+                    selected = select_formats(ydl, info)
+                    self._format_ids = [f.get('format_id') for f in selected]
+                    sizes = [f.get('filesize') or f.get('filesize_approx') for f in selected]
+                    if all(sizes):
+                        size_mb = f"{sum(sizes) / (1024 * 1024):.1f}MB"
+
+                duration_sec = info.get('duration', 0)
+                m, s = divmod(duration_sec, 60)
+                h, m = divmod(m, 60)
+                duration_str = f"{int(h):02d}:{int(m):02d}:{int(s):02d}"
+
+                if len(clips) > 1:
+                    display_duration = f"{len(clips)}개 구간"
+                elif is_clip_mode:
+                    display_duration = f"{seconds_to_hms(clips[0][0])} ~ {seconds_to_hms(clips[0][1])}"
+                else:
+                    display_duration = duration_str
+
+                self.on_info({
+                    'title': title,
+                    'thumbnail': info.get('thumbnail', ''),
+                    'duration': display_duration,
+                    'filesize': size_mb,
+                    'ext': '+'.join(f for f, _ in outputs),
+                    'video_type': video_type
+                })
+
+                if self.is_stopped: return
+
+                # Step 1의 info를 그대로 넘겨 페이지/플레이어 재분석 없이 포맷 선택과 다운로드만 수행
+                self.bandwidth_share = get_bandwidth_governor().register(
+                    weight=self.options.get('bandwidth_weight', 1.0),
+                    cap_mbps=self.options.get('bandwidth_cap_mbps'))
+                if not self.fixed_fragment_concurrency:
+                    self.concurrency = get_concurrency_registry().create()
+                    ydl.urlopen = self.concurrency.wrap_urlopen(ydl.urlopen, lambda: self.is_stopped)
+                if not is_clip_mode:
+                    # 병합/변환은 후처리 풀에서 (클립 모드는 구간 자르기만 후처리 풀에서)
+                    ydl.post_process = self._defer_post_process
+                self.timings.begin('download')
+                try:
+                    clipped = False
+                    if is_clip_mode:
+                        clipped = self._download_clips(ydl, info, clips, fmt)
+                    if not clipped:
+                        ydl.process_ie_result(unselected_info(info), download=True)
+                finally:
+                    # 끝난 작업의 몫은 남은 작업들에 다시 배분
+                    self.bandwidth_share.release()
+                    if self.concurrency is not None:
+                        self.concurrency.finish()
+                    self.timings.end('download', self.bytes_received)
+
+                final_filename = full_path_candidate
+
+            if (self._deferred or self._clip_cut or len(self._outputs) > 1) and not self.is_stopped:
+                # 이 스레드(다운로드 슬롯)는 바로 반납하고 CPU 작업은 후처리 풀에서 차례를 기다림
+                self.stage = STAGE_POSTPROCESS
+                self.progress.set_stage(STAGE_POSTPROCESS, STATUS_POSTPROCESS_QUEUED)
+                get_postprocess_pool().submit(lambda: self._post_process(ydl, final_filename, clips))
+                return True
+
+            self._finish(final_filename, clips)
+
+        except Exception as e:
+            self._fail(e)
+        return False
+
+    def _defer_post_process(self, filename, info, files_to_move=None):
+        """YoutubeDL.post_process 대신 호출되어 병합/변환을 후처리 풀로 미룸"""
+        # yt-dlp는 반환 후 영상 공통 필드(ext 등)를 info에서 지우므로 사본을 보관
+        self._deferred.append((filename, dict(info), files_to_move))
+        info['filepath'] = filename
+        return info
+
+    def _post_process(self, ydl, final_filename, clips):
+        """
+        후처리 풀에서 실행: 미뤄 둔 병합/변환(클립 모드는 구간 자르기) 후 나머지 형식을 final_filename에서 만들고 완료 알림.
+        ydl이 None이면 final_filename은 다운로드 기록에 있던 파일이다.
+        """
+        from yt_dlp import YoutubeDL
+
+        self.timings.begin('postprocess')
+        try:
+            if self.is_stopped:
+                return
+            derived = [output for output in self._outputs if output[2] != final_filename]
+            # 진행률은 실행할 후처리기 수 기준 (병합, 보정, 음성 변환, 파일 이동, 다른 형식 만들기)
+            self._pp_done = 0
+            self._pp_total = len(derived)
+            if self._clip_cut is not None:
+                self._pp_total += len(self._clip_cut[1])
+            if self._deferred:
+                pps = ydl._pps
+                self._pp_total += sum(len(info.get('__postprocessors') or []) + len(pps['post_process'])
+                                      + len(pps['after_move']) + 1 for _, info, _ in self._deferred)
+            self.progress.set_status(STATUS_POSTPROCESSING, 0)
+            for filename, info, files_to_move in self._deferred:
+                YoutubeDL.post_process(ydl, filename, info, files_to_move)
+            if self._clip_cut is not None:
+                self._cut_clips()
+            if derived:
+                if ydl is not None:
+                    # 다른 형식 만들기가 실패해도 다시 시도할 때 받은 파일에서 바로 만들 수 있도록 먼저 기록
+                    for output in self._outputs:
+                        if output[2] == final_filename:
+                            self._record(*output)
+                self._derive(final_filename, derived)
+            self._finish(final_filename, clips)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._deferred = []
+            self.timings.end('postprocess', sum(os.path.getsize(path) for _, _, path in self._outputs
+                                                if os.path.exists(path)) or None)
+            self._end()
+
+    def _derive(self, source, derived):
+        """source 파일에서 derived([(형식, 화질, 경로)])를 차례로 만듦"""
+        tools = find_tools()
+        for fmt, quality, path in derived:
+            if self.is_stopped:
+                raise Exception("다운로드 중지됨")
+            percent = min(self._pp_done / max(self._pp_total, 1) * 100, 99.0)
+            self.progress.set_status(f"변환 중: {fmt} 만들기", percent)
+            derive_output(tools, source, path, fmt, quality, self.options.get('mp3_quality'))
+            self._pp_done += 1
+
+    def _cut_clips(self):
+        """받아 둔 조각(또는 원본)에서 모든 구간을 자름"""
+        tools, jobs, fmt = self._clip_cut
+        lock = threading.Lock()
+
+        def clip_done(path):
+            with lock:
+                self._pp_done += 1
+                percent = min(self._pp_done / max(self._pp_total, 1) * 100, 99.0)
+                self.progress.set_status(f"변환 중: 구간 자르기 ({self._pp_done}/{len(jobs)})", percent)
+
+        self.progress.set_status(f"변환 중: 구간 자르기 (0/{len(jobs)})", 0)
+        cut_clips(tools, jobs, fmt, clip_done, self.options.get('mp3_quality'))
+
+    def _finish(self, final_filename, clips):
+        if self._outputs:
+            # 완료 알림은 주 형식 파일 기준 (받은 파일이 다른 형식일 수 있음)
+            final_filename = self._outputs[0][2]
+
+        # 실제 파일 크기 확인
+        final_size_str = "알 수 없음"
+        if len(clips) > 1:
+            size_bytes = sum(os.path.getsize(path) for _, _, path in clips if os.path.exists(path))
+            final_size_str = f"{size_bytes / (1024 * 1024):.1f}MB ({len(clips)}개)"
+        elif final_filename and os.path.exists(final_filename):
+            size_bytes = os.path.getsize(final_filename)
+            final_size_str = f"{size_bytes / (1024 * 1024):.1f}MB"
+            if len(self._outputs) > 1:
+                final_size_str += f" (+{', '.join(f for f, _, _ in self._outputs[1:])})"
+
+        if not self.is_stopped and final_filename:
+            # 같은 폴더/형식/화질로 다시 추가하면 네트워크 요청 없이 건너뛰거나
+            # 다른 형식을 로컬에서 만들 수 있도록 기록 (클립 제외)
+            for output in self._outputs:
+                self._record(*output)
+            self._completed = True
+            self.on_finished(final_filename, final_size_str)
+
+    def _record(self, fmt, quality, path):
+        if not os.path.exists(path):
+            return
+        try:
+            get_download_archive().record(self.url, self.options['path'], fmt, quality, path)
+        except Exception as e:
+            print(f"다운로드 기록 저장 실패: {e}")
+
+    def _clip_ranges(self, info):
+        """자를 구간 목록 [(시작 초, 끝 초, 이름)]"""
+        if self.options.get('chapters'):
+            chapters = info.get('chapters') or []
+            if not chapters:
+                raise Exception("챕터 정보가 없는 영상입니다")
+            return [(c['start_time'], c['end_time'], c.get('title') or '') for c in chapters
+                    if c.get('end_time', 0) > c.get('start_time', 0)]
+        ranges = self.options.get('ranges')
+        if ranges:
+            return [(hms_to_seconds(r['start']), hms_to_seconds(r['end']), r.get('title') or '') for r in ranges]
+        return [(hms_to_seconds(self.options.get('start_time', '00:00:00')),
+                 hms_to_seconds(self.options.get('end_time', '00:00:00')), '')]
+
+    def _download_clips(self, ydl, info, clips, fmt):
+        """
+        구간 조각만 받음 (자르기는 후처리 풀에서 _cut_clips). 조각 스트림이 아니면
+        - 구간 하나: ffmpeg 외부 다운로더 방식으로 설정하고 False 반환 (Step 3에서 그 구간만 받음)
+        - 구간 여럿: 원본을 한 번 받아 로컬에서 모든 구간을 자름
+        """
+        try:
+            tools, jobs, self._clip_temp = download_range_sources(ydl, info, clips)
+            self._clip_cut = (tools, jobs, fmt)
+            return True
+        except ClipUnsupported:
+            pass
+        if len(clips) > 1:
+            self._cut_from_source(ydl, info, clips, fmt)
+            return True
+        # 기존 방식: FFmpeg가 직접 URL에 접속해서 지정된 시간만큼만 데이터를 가져옴 (A/V 싱크 유지)
+        start, end, _ = clips[0]
+        ydl.params['external_downloader'] = {'default': 'ffmpeg'}
+        ydl.params['external_downloader_args'] = {
+            'ffmpeg_i': ['-ss', seconds_to_hms(start), '-to', seconds_to_hms(end)]
+        }
+        return False
+
+    def _cut_from_source(self, ydl, info, clips, fmt):
+        """원본 전체를 임시 파일로 한 번 받고 모든 구간 자르기를 준비 (임시 파일은 작업이 끝나면 지움)"""
+        import glob
+
+        tools = find_ffmpeg(ydl)
+        source_base = f"{os.path.splitext(clips[0][2])[0]}.source"
+        ydl.params['outtmpl'] = {'default': f"{source_base}.%(ext)s"}
+        ydl.params['merge_output_format'] = 'mkv'  # 어떤 코덱 조합이든 합칠 수 있도록
+        ydl.process_ie_result(unselected_info(info), download=True)
+        sources = [p for p in glob.glob(f"{glob.escape(source_base)}.*") if not p.endswith(('.part', '.ytdl'))]
+        self._clip_temp = sources
+        if not sources:
+            raise Exception("원본 다운로드 실패")
+        jobs = [([('muxed', 0.0, sources[0])], start, end, out_path) for start, end, out_path in clips]
+        self._clip_cut = (tools, jobs, fmt)
+
+    @staticmethod
+    def _find_partials(base):
+        """base로 시작하는 .part 파일 -> 크기 (yt-dlp가 이어받으면 이 크기부터 누적 바이트를 알림)"""
+        import glob
+
+        sizes = {}
+        for part in glob.glob(f"{glob.escape(base)}.*.part"):
+            try:
+                sizes[part[:-len('.part')]] = os.path.getsize(part)
+            except OSError:
+                pass
+        return sizes
+
+    def _resume_offset(self, d):
+        """이 스트림에서 이번 실행 전에 이미 받아 둔 바이트 (새로 받는 스트림이면 0)"""
+        offset = self._partial_sizes.get(d.get('filename'), 0)
+        # .part가 있어도 yt-dlp가 처음부터 다시 받으면(.ytdl 손상 등) 누적 바이트가 더 작게 옴
+        return offset if (d.get('downloaded_bytes') or 0) >= offset else 0
+
+    def progress_hook(self, d):
+        if self.is_stopped:
+            raise Exception("다운로드 중지됨")
+
+        if d['status'] in ('downloading', 'finished'):
+            if self.concurrency is not None and d.get('fragment_count'):
+                self.progress.set_concurrency(self.concurrency.level)
+            self.progress.update(d)
+            self._count_bytes(d)
+
+        if d['status'] == 'downloading' and self.bandwidth_share is not None:
+            # 훅은 다운로드(조각) 스레드에서 호출되므로 여기서 재우면 실제 전송 속도가 제한됨
+            info = d.get('info_dict') or {}
+            key = info.get('format_id') or d.get('filename') or ''
+            self.bandwidth_share.consume(key, d.get('downloaded_bytes') or 0, lambda: self.is_stopped,
+                                         offset=self._resume_offset(d))
+
+        if d['status'] == 'downloading' and not self._resume_reported:
+            # 실제로 받기 시작한 파일명/포맷을 알려 중단 시 이어받을 수 있게 함
+            self._resume_reported = True
+            # 병합할 스트림은 하나씩 받으므로 훅의 info에는 그 스트림만 있음 -> 작업에서 고른 포맷 전체를 기록
+            format_ids = self._format_ids or [(d.get('info_dict') or {}).get('format_id')]
+            self.on_resume_data({
+                'target_path': self.target_path,
+                'format_id': '+'.join(fid for fid in format_ids if fid),
+                'part_file': d.get('tmpfilename'),
+            })
+
+    def _count_bytes(self, d):
+        """progress hook의 누적 바이트에서 새로 받은 만큼을 작업/전체 통계에 더함"""
+        # 받는 중에는 tmpfilename(.part)도 오지만 'finished'에는 filename만 오므로 filename 기준
+        key = d.get('filename') or d.get('tmpfilename') or ''
+        downloaded = d.get('downloaded_bytes') or 0
+        with self._bytes_lock:
+            previous = self._bytes_seen.get(key)
+            if previous is None:
+                previous = self._resume_offset(d)  # 이어받은 스트림의 첫 보고에는 이미 받아 둔 크기가 포함됨
+            delta = downloaded - previous
+            self._bytes_seen[key] = max(downloaded, previous)
+            if delta <= 0:
+                return
+            self.bytes_received += delta
+        get_metrics().add_bytes(delta)
+
+    def postprocessor_hook(self, d):
+        if self.is_stopped:
+            raise Exception("다운로드 중지됨")
+        name = d.get('postprocessor') or ''
+        label = POSTPROCESSOR_LABELS.get(name, '보정' if name.startswith('Fixup') else name)
+        if d['status'] == 'finished':
+            self._pp_done += 1
+        percent = min(self._pp_done / max(self._pp_total, 1) * 100, 99.0)
+        self.progress.set_status(f"변환 중: {label}", percent)
+
+    def set_bandwidth_weight(self, weight):
+        """다운로드 중에도 대역폭 가중치 변경 가능"""
+        self.options['bandwidth_weight'] = weight
+        if self.bandwidth_share is not None:
+            self.bandwidth_share.set_weight(weight)
+
+    def stop(self):
+        self.is_stopped = True
\ No newline at end of file
@@ -0,0 +1,135 @@
+import os
+import re
+import threading
+
+# yt-dlp가 다운로드 중에 만드는 임시 파일 접미사
+PARTIAL_SUFFIXES = ('.part', '.ytdl')
+# 병합 전 포맷별 파일 (title.f137.mp4) / 이어받기 조각 (title.mp4.part-Frag3)
+FORMAT_SUFFIX_REGEX = re.compile(r'\.f[0-9A-Za-z_-]+$')
+FRAGMENT_SUFFIX_REGEX = re.compile(r'\.part-Frag\d+(?:\.part)?$')
+
+
+def _stem(name):
+    """파일 이름에서 확장자/임시 접미사/포맷 접미사를 떼어낸 기본 이름 (대소문자 무시)"""
+    name = FRAGMENT_SUFFIX_REGEX.sub('', name)
+    for suffix in PARTIAL_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    name = os.path.splitext(name)[0]
+    return FORMAT_SUFFIX_REGEX.sub('', name).lower()
+
+
+class _DirectoryIndex:
+    """폴더 하나의 파일 이름 색인. 처음 사용할 때 한 번만 목록을 읽는다"""
+
+    def __init__(self, path):
+        self.names = set()  # 폴더에 있는 파일 이름 (소문자)
+        self.partial_stems = set()  # 임시 파일(.part/.ytdl)이 남아 있는 기본 이름 (중단된 다운로드)
+        self.reserved = {}  # 작업 중인 기본 이름 -> 예약 수
+        self.next_counter = {}  # (기본 이름, 확장자) -> 다음에 시도할 번호
+        try:
+            entries = os.listdir(path)
+        except OSError:
+            entries = []
+        for name in entries:
+            self.names.add(name.lower())
+            if name.endswith(PARTIAL_SUFFIXES) or FRAGMENT_SUFFIX_REGEX.search(name):
+                self.partial_stems.add(_stem(name))
+
+
+# --- 저장 파일 이름 예약 ---
+class FilenameReservations:
+    """
+    저장 폴더별로 이미 있는 파일과 작업 중인 파일 이름을 메모리에 색인하고 이름을 원자적으로 배정한다.
+    - "제목.ext", "제목 (1).ext" ... 중 비어 있는 이름을 후보마다 stat하지 않고 색인으로 고름
+    - 예약은 기본 이름(확장자/임시 접미사 제외) 단위라 동시에 실행되는 작업의 임시 파일도 겹치지 않음
+    - 다른 항목이 이어받을 .part 파일이 남아 있는 이름은 새 작업에 배정하지 않음
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirs = {}  # 정규화한 폴더 경로 -> _DirectoryIndex
+
+    def _index(self, save_path):
+        key = os.path.normcase(os.path.abspath(save_path))
+        index = self._dirs.get(key)
+        if index is None:
+            index = self._dirs[key] = _DirectoryIndex(save_path)
+        return index
+
+    def reserve(self, save_path, base_name, ext):
+        """비어 있는 "base_name.ext" 또는 "base_name (n).ext" 경로를 예약해 반환"""
+        with self._lock:
+            index = self._index(save_path)
+            counter_key = (base_name.lower(), ext.lower())
+            counter = index.next_counter.get(counter_key, 0)
+            while True:
+                name = f"{base_name}.{ext}" if counter == 0 else f"{base_name} ({counter}).{ext}"
+                stem = _stem(name)
+                counter += 1
+                if name.lower() in index.names or stem in index.partial_stems or stem in index.reserved:
+                    continue
+                path = os.path.join(save_path, name)
+                if os.path.exists(path):
+                    # 앱 밖에서 생긴 파일 (색인을 만든 뒤 추가됨)
+                    index.names.add(name.lower())
+                    continue
+                index.next_counter[counter_key] = counter
+                index.reserved[stem] = index.reserved.get(stem, 0) + 1
+                return path
+
+    def reserve_sibling(self, path, ext):
+        """
+        이 작업이 예약한 path와 기본 이름이 같고 확장자만 다른 경로를 예약 (한 작업의 여러 형식 출력).
+        그 이름의 파일이 이미 있으면 reserve()와 같은 규칙으로 번호를 붙인다.
+        """
+        save_path, name = os.path.split(path)
+        base_name = os.path.splitext(name)[0]
+        sibling = f"{base_name}.{ext}"
+        with self._lock:
+            index = self._index(save_path)
+            sibling_path = os.path.join(save_path, sibling)
+            if sibling.lower() not in index.names and not os.path.exists(sibling_path):
+                stem = _stem(sibling)
+                index.reserved[stem] = index.reserved.get(stem, 0) + 1
+                return sibling_path
+        return self.reserve(save_path, base_name, ext)
+
+    def claim(self, path):
+        """
+        정해진 경로(이어받기)를 예약. 다른 작업이 쓰는 중이거나 파일이 이미 완성되어 있으면 False.
+        자기 자신의 .part 파일은 남아 있어도 되므로 partial_stems는 보지 않는다.
+        """
+        save_path, name = os.path.split(path)
+        with self._lock:
+            index = self._index(save_path)
+            stem = _stem(name)
+            if stem in index.reserved or name.lower() in index.names or os.path.exists(path):
+                return False
+            index.reserved[stem] = 1
+            index.partial_stems.discard(stem)
+            return True
+
+    def release(self, path, completed):
+        """작업 종료 시 호출. 완료되지 않았으면 이어받을 임시 파일이 남아 있을 수 있으므로 계속 피한다"""
+        save_path, name = os.path.split(path)
+        with self._lock:
+            index = self._index(save_path)
+            stem = _stem(name)
+            count = index.reserved.get(stem, 0) - 1
+            if count > 0:
+                index.reserved[stem] = count
+            else:
+                index.reserved.pop(stem, None)
+            if completed:
+                index.names.add(name.lower())
+            else:
+                index.partial_stems.add(stem)
+
+
+_reservations = FilenameReservations()
+
+
+def get_filename_reservations():
+    """모든 DownloadJob이 공유하는 이름 예약"""
+    return _reservations
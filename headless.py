@@ -0,0 +1,293 @@
+"""
+헤드리스(화면 없음) 일괄 다운로드 모드
+
+    python headless.py urls.txt -o ./download -j 3 -f mp4 -q 1080p
+    cat urls.txt | python headless.py - -f mp3
+    python headless.py urls.txt -f mkv --also mp3,mp4:720p   (한 번만 받고 mp3/720p mp4는 로컬에서 변환)
+
+URL 목록은 한 줄에 하나씩 적는다. 줄 끝에 시작/종료 시간을 적으면 클립 모드로 받는다.
+    https://youtu.be/XXXXXXXXXXX 00:01:00 00:02:30
+시작/종료 쌍을 여러 개 적거나 chapters를 적으면 원본을 한 번만 받아 구간(챕터)마다 파일로 자른다.
+    https://youtu.be/XXXXXXXXXXX 00:01:00 00:02:30 00:10:00 00:11:00
+    https://youtu.be/XXXXXXXXXXX chapters
+빈 줄과 #으로 시작하는 줄은 무시한다.
+진행 상황과 결과는 표준 출력에 JSON Lines 형식으로 기록한다.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from engine import DownloadJob, iter_collection_entries
+from scheduler import DownloadScheduler
+from bandwidth import configure_bandwidth
+from archive import get_download_archive
+from derive import job_outputs, with_outputs
+from metrics import register_gauges, start_metrics_server
+from utils import load_settings, validate_url, is_collection_url, video_key, DEFAULT_SETTINGS
+
+FORMATS = ["mp4", "mkv", "mp3", "m4a", "opus"]
+QUALITIES = ["최고", "1080p", "720p", "480p", "360p"]
+
+
+# --- JSON Lines 출력 ---
+class JsonLinesReporter:
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {'event': event, 'time': round(time.time(), 3)}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+
+# --- 스케줄러에 넣을 작업 (스레드에서 DownloadJob 실행) ---
+class HeadlessJob:
+    def __init__(self, runner, url, options):
+        self.runner = runner
+        self.url = url
+        self.options = options
+        self.result = None
+        self.job = DownloadJob(url, options,
+                               on_info=self.on_info,
+                               on_finished=self.on_finished,
+                               on_error=self.on_error,
+                               on_done=self.on_done)
+
+    def start_download(self):
+        self.runner.reporter.emit('started', url=self.url)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            self.job.run()
+        finally:
+            # 다운로드 슬롯은 바로 반납 (병합/변환은 후처리 풀에서 이어짐)
+            self.runner.scheduler.job_done(self)
+
+    def on_done(self):
+        if self.result is None:
+            self.result = 'stopped'
+            self.runner.reporter.emit('stopped', url=self.url)
+        timings = self.job.timings.summary()
+        if timings:
+            self.runner.reporter.emit('timings', url=self.url, phases=timings)
+        self.runner.job_done(self)
+
+    def on_info(self, info):
+        self.runner.reporter.emit('info', url=self.url, **info)
+
+    def on_finished(self, path, size):
+        self.result = 'finished'
+        self.runner.reporter.emit('finished', url=self.url, path=path, size=size)
+
+    def on_error(self, msg):
+        self.result = 'error'
+        self.runner.reporter.emit('error', url=self.url, message=msg)
+
+
+# --- 실행기 ---
+class HeadlessRunner:
+    def __init__(self, options, max_concurrent=3, per_host_limit=None, progress_interval=1.0, reporter=None,
+                 use_archive=True):
+        self.options = options
+        self.archive = get_download_archive() if use_archive else None
+        self.progress_interval = progress_interval
+        self.reporter = reporter or JsonLinesReporter()
+        self.scheduler = DownloadScheduler(max_concurrent=max_concurrent, per_host_limit=per_host_limit)
+        self.jobs = []
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._all_done = threading.Event()
+
+    def add(self, url, options=None):
+        options = options or dict(self.options)
+        key = video_key(url)  # youtu.be/ID, watch?v=ID&t=30, shorts/ID는 같은 영상
+        if key in self._seen:
+            self.reporter.emit('skipped', url=url, reason='duplicate')
+            return
+        self._seen.add(key)
+        if self.archive is not None and options.get('mode') != 'clip':
+            # 같은 폴더에 같은 형식/화질로 이미 받은 영상 (네트워크 요청 없이 판단)
+            outputs = job_outputs(options)
+            pending = self.archive.pending_outputs(url, options['path'], outputs)
+            if not pending:
+                path = self.archive.lookup(url, options['path'], *outputs[0])
+                self.reporter.emit('skipped', url=url, reason='archived', path=path)
+                return
+            if len(pending) < len(outputs):
+                # 받아 둔 형식은 빼고 나머지만 만듦
+                options = with_outputs(options, pending)
+        job = HeadlessJob(self, url, options)
+        with self._lock:
+            self.jobs.append(job)
+            self._pending += 1
+            self._all_done.clear()
+        self.reporter.emit('queued', url=url)
+        self.scheduler.submit(job)
+
+    def add_line(self, line):
+        parts = line.split()
+        url = parts[0]
+        if not validate_url(url):
+            self.reporter.emit('skipped', url=url, reason='invalid_url')
+            return
+        options = dict(self.options)
+        if len(parts) == 2:
+            if parts[1] != 'chapters':
+                self.reporter.emit('skipped', url=url, reason='invalid_ranges')
+                return
+            options.update({'mode': 'clip', 'chapters': True})
+        elif len(parts) == 3:
+            options.update({'mode': 'clip', 'start_time': parts[1], 'end_time': parts[2]})
+        elif len(parts) > 3:
+            times = parts[1:]
+            if len(times) % 2:
+                self.reporter.emit('skipped', url=url, reason='invalid_ranges')
+                return
+            options.update({'mode': 'clip', 'ranges': [{'start': times[i], 'end': times[i + 1]}
+                                                      for i in range(0, len(times), 2)]})
+
+        if is_collection_url(url):
+            if options.get('mode') == 'clip':
+                self.reporter.emit('skipped', url=url, reason='clip_playlist')
+                return
+            # 재생목록/채널은 펼치면서 받은 항목부터 바로 대기열에 넣음
+            count = 0
+            try:
+                for entry in iter_collection_entries(url):
+                    self.add(entry['url'], dict(options))
+                    count += 1
+            except Exception as e:
+                self.reporter.emit('error', url=url, message=str(e))
+            self.reporter.emit('expanded', url=url, count=count)
+            return
+
+        self.add(url, options)
+
+    def job_done(self, job):
+        """작업이 후처리까지 완전히 끝났을 때"""
+        with self._lock:
+            self._pending -= 1
+            if self._pending <= 0:
+                self._all_done.set()
+
+    def _report_progress(self):
+        while not self._all_done.wait(self.progress_interval):
+            for job in list(self.jobs):
+                if job.result is not None:
+                    continue
+                snap = job.job.progress.snapshot()
+                if snap:
+                    self.reporter.emit('progress', url=job.url, **snap)
+
+    def run(self, lines):
+        """모든 줄을 처리하고 작업이 끝날 때까지 대기. 실패한 작업이 있으면 1 반환"""
+        reporter_thread = threading.Thread(target=self._report_progress, daemon=True)
+        reporter_thread.start()
+        try:
+            for line in lines:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    self.add_line(line)
+            if self.jobs:
+                while not self._all_done.wait(0.5):
+                    pass
+        except KeyboardInterrupt:
+            for job in self.jobs:
+                self.scheduler.cancel(job)
+                job.job.stop()
+            self.reporter.emit('interrupted')
+        self._all_done.set()
+
+        results = [job.result for job in self.jobs]
+        summary = {key: results.count(key) for key in ('finished', 'error', 'stopped')}
+        self.reporter.emit('summary', total=len(self.jobs), **summary)
+        return 0 if summary['error'] == 0 and summary['stopped'] == 0 else 1
+
+
+def parse_extra_outputs(text):
+    """'mp3,mp4:720p' -> [{'format': 'mp3'}, {'format': 'mp4', 'quality': '720p'}]"""
+    outputs = []
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        fmt, _, quality = part.partition(':')
+        if fmt not in FORMATS or (quality and quality not in QUALITIES):
+            raise argparse.ArgumentTypeError(f"알 수 없는 형식: {part}")
+        outputs.append({'format': fmt, 'quality': quality} if quality else {'format': fmt})
+    return outputs
+
+
+def parse_args(argv):
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="YouTube Downloader 헤드리스 일괄 다운로드")
+    parser.add_argument('input', nargs='?', default='-', help="URL 목록 파일 ('-'이면 표준 입력)")
+    parser.add_argument('-o', '--output', default=settings.get('save_path', DEFAULT_SETTINGS['save_path']),
+                        help="저장 경로")
+    parser.add_argument('-f', '--format', choices=FORMATS, default='mp4', help="파일 형식")
+    parser.add_argument('-q', '--quality', choices=QUALITIES, default='최고', help="화질")
+    parser.add_argument('-j', '--jobs', type=int,
+                        default=settings.get('max_concurrent_downloads', DEFAULT_SETTINGS['max_concurrent_downloads']),
+                        help="동시 다운로드 수")
+    parser.add_argument('--per-host', type=int,
+                        default=settings.get('max_downloads_per_host', DEFAULT_SETTINGS['max_downloads_per_host']),
+                        help="호스트별 동시 다운로드 수 (생략하면 전체 동시 다운로드 수까지)")
+    parser.add_argument('--limit-mbps', type=float,
+                        default=settings.get('bandwidth_limit_mbps', DEFAULT_SETTINGS['bandwidth_limit_mbps']),
+                        help="전체 다운로드 속도 제한 (Mbit/s, 0이면 무제한)")
+    parser.add_argument('--fragments',
+                        default=str(settings.get('fragment_concurrency', DEFAULT_SETTINGS['fragment_concurrency'])),
+                        help="조각 동시 요청 수 ('auto'면 처리량에 맞춰 자동 조절)")
+    parser.add_argument('--mp3-quality',
+                        default=str(settings.get('mp3_quality', DEFAULT_SETTINGS['mp3_quality'])),
+                        help="mp3 음질 (kbps, 또는 0~9 = VBR)")
+    parser.add_argument('--also', type=parse_extra_outputs,
+                        default=','.join(settings.get('extra_formats', DEFAULT_SETTINGS['extra_formats'])),
+                        help="함께 만들 형식 (쉼표로 구분, 형식:화질 가능. 예: mp3,mp4:720p)")
+    parser.add_argument('--ignore-archive', action='store_true',
+                        help="이미 받은 기록이 있어도 다시 받기")
+    parser.add_argument('--no-derive', action='store_true',
+                        help="받아 둔 파일에서 변환하지 않고 항상 새로 받기")
+    parser.add_argument('--progress-interval', type=float, default=1.0, help="진행률 출력 간격 (초)")
+    parser.add_argument('--metrics-port', type=int,
+                        default=settings.get('metrics_port', DEFAULT_SETTINGS['metrics_port']),
+                        help="127.0.0.1에서 /metrics(Prometheus), /metrics.json을 제공할 포트 (0이면 끔)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    os.makedirs(args.output, exist_ok=True)
+    configure_bandwidth(limit_mbps=args.limit_mbps,
+                        schedule=load_settings().get('bandwidth_schedule', DEFAULT_SETTINGS['bandwidth_schedule']))
+    options = {
+        'path': args.output,
+        'format': args.format,
+        'quality': args.quality,
+        'mode': 'normal',
+        'fragment_concurrency': args.fragments,
+        'mp3_quality': args.mp3_quality,
+        'extra_outputs': args.also,
+        'derive_local': not args.no_derive and load_settings().get('derive_from_local',
+                                                                   DEFAULT_SETTINGS['derive_from_local']),
+    }
+    use_archive = (not args.ignore_archive
+                   and load_settings().get('use_download_archive', DEFAULT_SETTINGS['use_download_archive']))
+    runner = HeadlessRunner(options, max_concurrent=args.jobs, per_host_limit=args.per_host,
+                            progress_interval=args.progress_interval, use_archive=use_archive)
+    register_gauges(runner.scheduler)
+    start_metrics_server(args.metrics_port)
+    if args.input == '-':
+        return runner.run(sys.stdin)
+    with open(args.input, 'r', encoding='utf-8') as f:
+        return runner.run(f.readlines())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils import HISTORY_FILE, load_history
+
+HISTORY_DB_FILE = 'history.db'
+
+# DownloadItem.get_state() 키 중 별도 컬럼으로 저장하는 항목 (나머지는 extra에 JSON으로 저장)
+COLUMNS = ('url', 'title', 'meta_text', 'progress', 'is_completed', 'saved_path', 'thumbnail', 'state')
+
+
+# --- 히스토리 저장소 ---
+class HistoryStore:
+    """
+    다운로드 히스토리를 SQLite(WAL)에 항목 단위로 저장한다.
+    상태가 바뀔 때마다 해당 행만 트랜잭션으로 기록하므로 비정상 종료 시에도
+    마지막으로 기록된 상태가 남고, 히스토리 크기와 무관하게 저장 비용이 일정하다.
+    """
+
+    def __init__(self, path=HISTORY_DB_FILE):
+        self.path = path
+        self.closed = False
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                title TEXT,
+                meta_text TEXT,
+                progress REAL DEFAULT 0,
+                is_completed INTEGER DEFAULT 0,
+                saved_path TEXT,
+                thumbnail TEXT,
+                state TEXT,
+                extra TEXT,
+                created REAL,
+                updated REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_completed ON history(is_completed)")
+        self._conn.commit()
+
+    # --- 변환 ---
+    @staticmethod
+    def _row_values(state):
+        extra = {k: v for k, v in state.items() if k not in COLUMNS and k not in ('settings', 'history_id')}
+        return (
+            state.get('url', ''),
+            json.dumps(state.get('settings', {}), ensure_ascii=False),
+            state.get('title'),
+            state.get('meta_text'),
+            float(state.get('progress', 0) or 0),
+            1 if state.get('is_completed') else 0,
+            state.get('saved_path'),
+            state.get('thumbnail', ''),
+            state.get('state'),
+            json.dumps(extra, ensure_ascii=False, default=str),
+        )
+
+    @staticmethod
+    def _row_to_state(row):
+        (history_id, url, settings, title, meta_text, progress, is_completed,
+         saved_path, thumbnail, state, extra) = row
+        data = json.loads(extra) if extra else {}
+        data.update({
+            'history_id': history_id,
+            'url': url,
+            'settings': json.loads(settings),
+            'title': title,
+            'meta_text': meta_text,
+            'progress': progress,
+            'is_completed': bool(is_completed),
+            'saved_path': saved_path,
+            'thumbnail': thumbnail or '',
+            'state': state,
+        })
+        return data
+
+    _SELECT = ("SELECT id, url, settings, title, meta_text, progress, is_completed, "
+               "saved_path, thumbnail, state, extra FROM history")
+
+    # --- 기록 ---
+    def add(self, state):
+        """새 항목 추가 후 history_id 반환"""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO history (url, settings, title, meta_text, progress, is_completed, saved_path, "
+                "thumbnail, state, extra, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row_values(state) + (now, now))
+            self._conn.commit()
+            return cur.lastrowid
+
+    def update(self, history_id, state):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE history SET url = ?, settings = ?, title = ?, meta_text = ?, progress = ?, "
+                "is_completed = ?, saved_path = ?, thumbnail = ?, state = ?, extra = ?, updated = ? WHERE id = ?",
+                self._row_values(state) + (time.time(), history_id))
+            self._conn.commit()
+
+    def update_many(self, states):
+        """(history_id, state) 목록을 한 트랜잭션으로 기록"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE history SET url = ?, settings = ?, title = ?, meta_text = ?, progress = ?, "
+                "is_completed = ?, saved_path = ?, thumbnail = ?, state = ?, extra = ?, updated = ? WHERE id = ?",
+                [self._row_values(state) + (now, history_id) for history_id, state in states])
+            self._conn.commit()
+
+    def remove(self, history_id):
+        self.remove_many([history_id])
+
+    def remove_completed(self):
+        """완료된 항목 전체 삭제 (아직 화면에 불러오지 않은 항목 포함)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM history WHERE is_completed = 1")
+            self._conn.commit()
+
+    def remove_many(self, history_ids):
+        with self._lock:
+            self._conn.executemany("DELETE FROM history WHERE id = ?", [(i,) for i in history_ids])
+            self._conn.commit()
+
+    # --- 조회 ---
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def load_page(self, offset=0, limit=200, completed_only=False):
+        """최신 항목부터 limit개"""
+        where = " WHERE is_completed = 1" if completed_only else ""
+        with self._lock:
+            rows = self._conn.execute(
+                self._SELECT + where + " ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        return [self._row_to_state(row) for row in rows]
+
+    def load_before(self, history_id, limit=200, completed_only=False):
+        """history_id보다 오래된 항목 limit개 (스크롤 시 이어서 불러오기용)"""
+        where = " AND is_completed = 1" if completed_only else ""
+        with self._lock:
+            rows = self._conn.execute(
+                self._SELECT + " WHERE id < ?" + where + " ORDER BY id DESC LIMIT ?", (history_id, limit)).fetchall()
+        return [self._row_to_state(row) for row in rows]
+
+    def incomplete(self):
+        """완료되지 않은 모든 항목 (최신 항목부터)"""
+        with self._lock:
+            rows = self._conn.execute(
+                self._SELECT + " WHERE is_completed = 0 ORDER BY id DESC").fetchall()
+        return [self._row_to_state(row) for row in rows]
+
+    # --- 마이그레이션 ---
+    def migrate_json(self, json_path=HISTORY_FILE):
+        """기존 history.json을 가져온 뒤 .bak으로 이름 변경. 가져온 항목 수 반환"""
+        if not os.path.exists(json_path):
+            return 0
+        history = load_history(json_path)
+        now = time.time()
+        # history.json은 최신 항목이 앞쪽이므로 역순으로 넣어 id 순서를 맞춤
+        rows = [self._row_values(state) + (now, now) for state in reversed(history) if state.get('url')]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO history (url, settings, title, meta_text, progress, is_completed, saved_path, "
+                "thumbnail, state, extra, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+        try:
+            os.replace(json_path, json_path + '.bak')
+        except OSError as e:
+            print(f"history.json 백업 실패: {e}")
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._conn.close()
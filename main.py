@@ -1,27 +1,109 @@
 import sys
 import os
+import threading
+import time
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
                              QLineEdit, QPushButton, QLabel, QComboBox, QFileDialog,
-                             QScrollArea, QMessageBox, QMenu, QAction, QRadioButton, QButtonGroup)
-from PyQt5.QtCore import Qt, QEvent
-
-from utils import load_settings, save_settings, validate_url, load_history, save_history, seconds_to_hms, hms_to_seconds
-from widgets import DownloadItemWidget
-from downloader import MetadataWorker
+                             QMessageBox, QRadioButton, QButtonGroup, QCheckBox, QMenu, QAction)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+
+from utils import (load_settings, save_settings, validate_url, is_collection_url, seconds_to_hms, hms_to_seconds,
+                   parse_ranges, video_key, DEFAULT_SETTINGS)
+from widgets import DownloadItem, DownloadListView, ProgressHub, wait_for_workers
+from downloader import MetadataPrefetcher, PlaylistWorker
+from scheduler import DownloadScheduler
+from metacache import configure_metadata_cache
+from history import HistoryStore
+from engine import warm_up
+from postprocess import get_postprocess_pool
+from bandwidth import configure_bandwidth
+from archive import get_download_archive
+from derive import OUTPUT_FORMATS, job_outputs, with_outputs
+from metrics import register_gauges, start_metrics_server, get_metrics
+from theme import apply_theme
+
+# 속도 제한 선택지 (표시 이름, Mbit/s). None은 설정의 기본값/시간대 일정을 따름, 0은 무제한
+BANDWIDTH_CHOICES = [("자동 (일정)", None), ("무제한", 0), ("5 Mbps", 5), ("10 Mbps", 10),
+                     ("20 Mbps", 20), ("50 Mbps", 50), ("100 Mbps", 100)]
+# 종료 시 중지한 다운로드/후처리가 끝나기를 기다리는 최대 시간 (초)
+SHUTDOWN_TIMEOUT = 5
 
 class YouTubeDownloaderApp(QMainWindow):
+    # 창 표시 이후 히스토리 복원과 yt_dlp 준비가 모두 끝나면 발생
+    startup_finished = pyqtSignal()
+    engine_ready = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.settings = load_settings()
-        self.meta_worker = None
+        configure_metadata_cache(
+            max_mb=self.settings.get('metadata_cache_max_mb', DEFAULT_SETTINGS['metadata_cache_max_mb']),
+            ttl_hours=self.settings.get('metadata_cache_ttl_hours', DEFAULT_SETTINGS['metadata_cache_ttl_hours']),
+        )
+        self.bandwidth = configure_bandwidth(
+            limit_mbps=self.settings.get('bandwidth_limit_mbps', DEFAULT_SETTINGS['bandwidth_limit_mbps']),
+            schedule=self.settings.get('bandwidth_schedule', DEFAULT_SETTINGS['bandwidth_schedule']),
+        )
+        self.bandwidth.set_override(self.settings.get('bandwidth_override_mbps'))
+        self.history_store = HistoryStore()
+        self.playlist_workers = []
+        # URL을 붙여넣으면 바로 분석 시작 (분석한 info는 다운로드 작업에 넘겨 다시 분석하지 않음)
+        self.prefetcher = MetadataPrefetcher(
+            delay_ms=self.settings.get('metadata_prefetch_delay_ms', DEFAULT_SETTINGS['metadata_prefetch_delay_ms']),
+            parent=self)
+        self.prefetcher.info_fetched.connect(self.apply_metadata)
         self.current_video_duration = 0
+        self.scheduler = DownloadScheduler(
+            max_concurrent=self.settings.get('max_concurrent_downloads', DEFAULT_SETTINGS['max_concurrent_downloads']),
+            per_host_limit=self.settings.get('max_downloads_per_host', DEFAULT_SETTINGS['max_downloads_per_host']),
+            host_limits=self.settings.get('host_download_limits', {}),
+        )
+        self.progress_hub = ProgressHub(interval_ms=100, parent=self)
+        # 작업/대기열 통계는 통계 창과 localhost 조회 서버(/metrics, /metrics.json)에서 확인
+        register_gauges(self.scheduler)
+        self.metrics_server = start_metrics_server(
+            self.settings.get('metrics_port', DEFAULT_SETTINGS['metrics_port']))
+        self.stats_panel = None
         self.init_ui()
+        self.progress_hub.flushed.connect(self.list_model.flush_changes)
+        get_metrics().add_provider('gui', self.list_view.frame_stats)  # 목록 화면 갱신 시간
+        # 히스토리 복원과 무거운 모듈 로딩은 첫 화면을 그린 뒤로 미룸
+        self._startup_started = False
+        self._history_restored = False
+        self._engine_ready = False
+        self.engine_ready.connect(self.on_engine_ready)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._startup_started:
+            self._startup_started = True
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        threading.Thread(target=self._warm_up_engine, daemon=True).start()
+        self.history_store.migrate_json()  # 기존 history.json은 첫 실행 시 한 번만 가져옴
         self.restore_history_items()
+        self._history_restored = True
+        self._check_startup_finished()
+
+    def _warm_up_engine(self):
+        try:
+            warm_up()
+        except Exception as e:
+            print(f"yt_dlp 로드 실패: {e}")
+        self.engine_ready.emit()
+
+    def on_engine_ready(self):
+        self._engine_ready = True
+        self._check_startup_finished()
+
+    def _check_startup_finished(self):
+        if self._history_restored and self._engine_ready:
+            self.startup_finished.emit()
 
     def init_ui(self):
         self.setWindowTitle("YouTube Downloader")
         self.setGeometry(100, 100, 750, 650)
-        self.setStyleSheet("background-color: #1e1e1e; color: #ffffff;")
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -39,11 +121,10 @@ class YouTubeDownloaderApp(QMainWindow):
         path_label.setFixedWidth(80)
         self.path_input = QLineEdit()
         self.path_input.setText(self.settings.get('save_path', ''))
-        self.path_input.setStyleSheet("padding: 5px; background-color: #333; border: 1px solid #555; color: white;")
 
         self.btn_find = QPushButton("찾기")
         self.btn_find.setFixedWidth(60)
-        self.btn_find.setStyleSheet("background-color: #444; padding: 5px;")
+        self.btn_find.setProperty("role", "primary")
         self.btn_find.clicked.connect(self.select_directory)
 
         lbl_quality = QLabel("화질")
@@ -51,7 +132,6 @@ class YouTubeDownloaderApp(QMainWindow):
         self.combo_quality = QComboBox()
         self.combo_quality.addItems(["최고", "1080p", "720p", "480p", "360p"])
         self.combo_quality.setCurrentIndex(self.settings.get('quality_index', 0))
-        self.combo_quality.setStyleSheet("background-color: #333; color: white; padding: 3px;")
         self.combo_quality.setFixedWidth(80)
 
         input_grid.addWidget(path_label, 0, 0)
@@ -67,11 +147,6 @@ class YouTubeDownloaderApp(QMainWindow):
         self.rb_clip = QRadioButton("클립 모드")
         self.rb_normal.setChecked(True) # 기본값
 
-        # 스타일 설정
-        rb_style = "QRadioButton { color: white; } QRadioButton::indicator:checked { background-color: #3498db; border: 2px solid white; border-radius: 6px; }"
-        self.rb_normal.setStyleSheet(rb_style)
-        self.rb_clip.setStyleSheet(rb_style)
-
         # 그룹 설정 (배타적 선택)
         self.btn_group = QButtonGroup()
         self.btn_group.addButton(self.rb_normal)
@@ -85,6 +160,38 @@ class YouTubeDownloaderApp(QMainWindow):
         mode_layout.addWidget(self.rb_clip)
         mode_layout.addStretch(1)
 
+        # 주 형식과 함께 만들 형식 (한 번만 받고 나머지는 로컬에서 변환)
+        self.btn_extra_formats = QPushButton()
+        extra_menu = QMenu(self.btn_extra_formats)
+        self.extra_format_actions = []
+        saved_extras = self.settings.get('extra_formats', DEFAULT_SETTINGS['extra_formats'])
+        for name in OUTPUT_FORMATS:
+            action = QAction(name, extra_menu)
+            action.setCheckable(True)
+            action.setChecked(name in saved_extras)
+            action.toggled.connect(self.update_extra_formats_label)
+            extra_menu.addAction(action)
+            self.extra_format_actions.append(action)
+        self.btn_extra_formats.setMenu(extra_menu)
+        self.update_extra_formats_label()
+        mode_layout.addWidget(self.btn_extra_formats)
+
+        # 전체 속도 제한 (다운로드 중에도 즉시 반영)
+        lbl_bandwidth = QLabel("속도 제한")
+        self.combo_bandwidth = QComboBox()
+        for label, mbps in BANDWIDTH_CHOICES:
+            self.combo_bandwidth.addItem(label, mbps)
+        override = self.settings.get('bandwidth_override_mbps')
+        self.combo_bandwidth.setCurrentIndex(max(self.combo_bandwidth.findData(override), 0))
+        self.combo_bandwidth.setFixedWidth(110)
+        self.combo_bandwidth.currentIndexChanged.connect(self.on_bandwidth_changed)
+        mode_layout.addWidget(lbl_bandwidth)
+        mode_layout.addWidget(self.combo_bandwidth)
+
+        self.btn_stats = QPushButton("통계")
+        self.btn_stats.clicked.connect(self.show_stats_panel)
+        mode_layout.addWidget(self.btn_stats)
+
         input_grid.addWidget(mode_label, 1, 0)
         input_grid.addLayout(mode_layout, 1, 1, 1, 4)
 
@@ -92,21 +199,19 @@ class YouTubeDownloaderApp(QMainWindow):
         url_label = QLabel("링크 URL :")
         url_label.setFixedWidth(80)
         self.url_input = QLineEdit()
-        self.url_input.setStyleSheet("padding: 5px; background-color: #333; border: 1px solid #555; color: white;")
         self.url_input.returnPressed.connect(self.add_download_task)
-        self.url_input.installEventFilter(self)
+        self.url_input.textChanged.connect(self.fetch_metadata)
 
         self.btn_input = QPushButton("입력")
         self.btn_input.setFixedWidth(60)
-        self.btn_input.setStyleSheet("background-color: #444; padding: 5px;")
+        self.btn_input.setProperty("role", "primary")
         self.btn_input.clicked.connect(self.add_download_task)
 
         lbl_fmt = QLabel("파일 형식")
         lbl_fmt.setAlignment(Qt.AlignCenter)
         self.combo_format = QComboBox()
-        self.combo_format.addItems(["mp4", "mkv", "mp3"])
+        self.combo_format.addItems(["mp4", "mkv", "mp3", "m4a", "opus"])
         self.combo_format.setCurrentIndex(self.settings.get('format_index', 0))
-        self.combo_format.setStyleSheet("background-color: #333; color: white; padding: 3px;")
         self.combo_format.setFixedWidth(80)
 
         input_grid.addWidget(url_label, 2, 0)
@@ -126,7 +231,6 @@ class YouTubeDownloaderApp(QMainWindow):
         self.input_start = QLineEdit("00:00:00")
         self.input_start.setFixedWidth(100)
         self.input_start.setAlignment(Qt.AlignCenter)
-        self.input_start.setStyleSheet("padding: 5px; background-color: #333; border: 1px solid #555; color: white;")
 
         lbl_tilde = QLabel("~")
         lbl_tilde.setAlignment(Qt.AlignCenter)
@@ -135,7 +239,6 @@ class YouTubeDownloaderApp(QMainWindow):
         self.input_end = QLineEdit("00:00:00")
         self.input_end.setFixedWidth(100)
         self.input_end.setAlignment(Qt.AlignCenter)
-        self.input_end.setStyleSheet("padding: 5px; background-color: #333; border: 1px solid #555; color: white;")
         self.input_end.editingFinished.connect(self.validate_end_time)
 
         time_layout.addWidget(lbl_start)
@@ -143,87 +246,83 @@ class YouTubeDownloaderApp(QMainWindow):
         time_layout.addWidget(lbl_tilde)
         time_layout.addWidget(lbl_end)
         time_layout.addWidget(self.input_end)
-        time_layout.addStretch(1)
+
+        # 여러 구간을 한 번에 (원본은 한 번만 받고 구간마다 파일 생성)
+        self.input_ranges = QLineEdit()
+        self.input_ranges.setPlaceholderText("여러 구간: 00:01:00-00:02:00, 00:05:00-00:06:30")
+        time_layout.addWidget(self.input_ranges, 1)
+
+        self.check_chapters = QCheckBox("챕터별로 자르기")
+        self.check_chapters.toggled.connect(self.toggle_chapter_mode)
+        time_layout.addWidget(self.check_chapters)
 
         main_layout.addWidget(self.time_widget)
         self.time_widget.setVisible(False)
 
         # 구분선
         line = QLabel()
-        line.setStyleSheet("border-top: 1px solid #555; margin-top: 5px; margin-bottom: 5px;")
+        line.setProperty("role", "separator")
         line.setFixedHeight(1)
         main_layout.addWidget(line)
 
-        # 4. 다운로드 리스트
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setStyleSheet("""
-            QScrollArea {
-                border: 2px inset #2a2a2a;
-                background-color: #222;
-            }
-            QScrollBar:vertical {
-                background: #333;
-                width: 10px;
-            }
-            QScrollBar::handle:vertical {
-                background: #555;
-            }
-        """)
-
-        self.list_container = QWidget()
-        self.list_container.setStyleSheet("background-color: #222;")
-        self.list_layout = QVBoxLayout(self.list_container)
-        self.list_layout.setAlignment(Qt.AlignTop)
-        self.list_layout.setSpacing(0)
-        self.list_layout.setContentsMargins(0,0,0,0)
-
-        self.scroll_area.setWidget(self.list_container)
-        self.scroll_area.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.scroll_area.customContextMenuRequested.connect(self.show_list_context_menu)
-
-        main_layout.addWidget(self.scroll_area)
+        # 4. 다운로드 리스트 (보이는 행만 그리는 모델/뷰 방식)
+        self.list_view = DownloadListView()
+        self.list_model = self.list_view.list_model
+        self.list_view.remove_requested.connect(self.remove_item)
+        self.list_view.cleanup_requested.connect(self.clear_finished_items)
+        self.list_view.derive_requested.connect(self.add_derived_item)
+
+        main_layout.addWidget(self.list_view)
 
     # [수정] 매개변수 checked 추가 (오류 해결)
     def toggle_clip_ui(self, checked):
         """라디오 버튼 토글 시 UI 변경"""
         self.time_widget.setVisible(checked)
 
-        # 클립 모드로 켜졌을 때 URL이 있다면 메타데이터 로드
+        # 클립 모드로 켜졌을 때 URL이 있다면 메타데이터 로드 (이미 분석한 영상이면 바로 표시)
         if checked and self.url_input.text().strip():
-            self.fetch_metadata(self.url_input.text().strip())
-
-    def eventFilter(self, source, event):
-        if source == self.url_input and event.type() == QEvent.FocusOut:
-            if self.rb_clip.isChecked():
-                url = self.url_input.text().strip()
-                if url:
-                    self.fetch_metadata(url)
-        return super().eventFilter(source, event)
-
-    def fetch_metadata(self, url):
-        if not validate_url(url): return
-
-        # [안전장치] 이전 워커가 실행 중이면 정리
-        if self.meta_worker and self.meta_worker.isRunning():
-            try:
-                self.meta_worker.quit()
-                self.meta_worker.wait()
-            except:
-                pass
-
-        self.meta_worker = MetadataWorker(url)
-        self.meta_worker.info_fetched.connect(self.on_metadata_fetched)
-        self.meta_worker.start()
-
-    def on_metadata_fetched(self, info):
-        duration = info.get('duration', 0)
+            self.fetch_metadata(self.url_input.text())
+
+    def extra_formats(self):
+        return [action.text() for action in self.extra_format_actions if action.isChecked()]
+
+    def update_extra_formats_label(self):
+        extras = self.extra_formats()
+        self.btn_extra_formats.setText(f"함께 저장: {', '.join(extras)}" if extras else "함께 저장: 없음")
+
+    def toggle_chapter_mode(self, checked):
+        """챕터별로 자를 때는 직접 입력한 구간을 쓰지 않음"""
+        for widget in (self.input_start, self.input_end, self.input_ranges):
+            widget.setEnabled(not checked)
+
+    def fetch_metadata(self, text):
+        """URL 입력이 바뀔 때마다 호출. 입력이 멈추면 마지막 영상만 분석 (모드와 상관없이)"""
+        url = text.strip()
+        if not validate_url(url) or is_collection_url(url):
+            self.prefetcher.cancel()
+            return
+        self.prefetcher.request(url)
+
+    def apply_metadata(self, info):
+        duration = info.get('duration', 0) or 0
         self.current_video_duration = duration
+        self.update_quality_choices(info.get('heights') or [])
 
         self.input_start.setText("00:00:00")
         end_time_str = seconds_to_hms(duration)
         self.input_end.setText(end_time_str)
 
+    def update_quality_choices(self, heights):
+        """영상에 없는 화질(최대 해상도 초과)은 선택 목록에서 비활성화"""
+        model = self.combo_quality.model()
+        max_height = max(heights) if heights else None
+        for i in range(self.combo_quality.count()):
+            text = self.combo_quality.itemText(i)
+            enabled = True
+            if max_height and text.endswith('p'):
+                enabled = int(text[:-1]) <= max_height
+            model.item(i).setEnabled(enabled)
+
     def validate_end_time(self):
         text = self.input_end.text()
         user_seconds = hms_to_seconds(text)
@@ -233,6 +332,22 @@ class YouTubeDownloaderApp(QMainWindow):
             self.input_end.setText(corrected_time)
             QMessageBox.information(self, "알림", f"종료 시간이 영상 길이를 초과하여\n영상 끝 시간({corrected_time})으로 조정되었습니다.")
 
+    def on_bandwidth_changed(self, index):
+        mbps = self.combo_bandwidth.itemData(index)
+        self.bandwidth.set_override(mbps)
+        self.settings['bandwidth_override_mbps'] = mbps
+
+    def show_stats_panel(self):
+        if self.stats_panel is None:
+            from statspanel import StatsPanel  # 통계 창을 처음 열 때 로드
+
+            url = None
+            if self.metrics_server is not None:
+                url = f"http://127.0.0.1:{self.metrics_server.server_port}/metrics"
+            self.stats_panel = StatsPanel(url, parent=self)
+        self.stats_panel.show()
+        self.stats_panel.raise_()
+
     def select_directory(self):
         path = QFileDialog.getExistingDirectory(self, "저장 폴더 선택", self.path_input.text())
         if path:
@@ -246,12 +361,9 @@ class YouTubeDownloaderApp(QMainWindow):
             QMessageBox.warning(self, "오류", "유효하지 않은 유튜브 링크입니다.")
             return
 
-        for i in range(self.list_layout.count()):
-            widget = self.list_layout.itemAt(i).widget()
-            if widget and isinstance(widget, DownloadItemWidget):
-                if widget.url == url and not widget.is_completed:
-                    QMessageBox.warning(self, "알림", "이미 리스트에 있는 영상입니다.")
-                    return
+        if self.list_model.find_active(url) is not None:
+            QMessageBox.warning(self, "알림", "이미 리스트에 있는 영상입니다.")
+            return
 
         save_path = self.path_input.text().strip()
         if not save_path:
@@ -265,81 +377,190 @@ class YouTubeDownloaderApp(QMainWindow):
             return
 
         mode = "clip" if self.rb_clip.isChecked() else "normal"
+        if mode == "clip" and is_collection_url(url):
+            QMessageBox.warning(self, "알림", "클립 모드에서는 재생목록/채널 링크를 사용할 수 없습니다.")
+            return
+
         current_options = {
             'path': save_path,
             'format': self.combo_format.currentText(),
             'quality': self.combo_quality.currentText(),
-            'mode': mode
+            'mode': mode,
+            'fragment_concurrency': self.settings.get('fragment_concurrency', DEFAULT_SETTINGS['fragment_concurrency']),
+            'mp3_quality': self.settings.get('mp3_quality', DEFAULT_SETTINGS['mp3_quality']),
+            'derive_local': self.settings.get('derive_from_local', DEFAULT_SETTINGS['derive_from_local'])
         }
+        if mode == "normal":
+            # 클립은 구간마다 파일이 생기므로 한 형식만
+            current_options['extra_outputs'] = [{'format': fmt} for fmt in self.extra_formats()]
 
         if mode == "clip":
-            self.validate_end_time()
-            current_options['start_time'] = self.input_start.text()
-            current_options['end_time'] = self.input_end.text()
-
-        item_widget = DownloadItemWidget(url, current_options)
-        item_widget.remove_requested.connect(self.remove_item)
-        item_widget.cleanup_requested.connect(self.clear_finished_items)
+            if self.check_chapters.isChecked():
+                current_options['chapters'] = True
+            elif self.input_ranges.text().strip():
+                try:
+                    ranges = parse_ranges(self.input_ranges.text())
+                except ValueError as e:
+                    QMessageBox.warning(self, "오류", str(e))
+                    return
+                current_options['ranges'] = [{'start': start, 'end': end} for start, end in ranges]
+            else:
+                self.validate_end_time()
+                current_options['start_time'] = self.input_start.text()
+                current_options['end_time'] = self.input_end.text()
+
+        if is_collection_url(url):
+            self.start_playlist_expansion(url, current_options)
+            self.url_input.clear()
+            return
 
-        self.list_layout.insertWidget(0, item_widget)
+        if mode == "normal" and self.settings.get('use_download_archive', DEFAULT_SETTINGS['use_download_archive']):
+            outputs = job_outputs(current_options)
+            pending = get_download_archive().pending_outputs(url, save_path, outputs)
+            if not pending:
+                archived = get_download_archive().lookup(url, save_path, *outputs[0])
+                if QMessageBox.question(
+                        self, "알림", f"이미 같은 형식/화질로 받은 영상입니다.\n{archived}\n\n다시 받을까요?",
+                        QMessageBox.Yes | QMessageBox.No, QMessageBox.No) != QMessageBox.Yes:
+                    return
+            elif len(pending) < len(outputs):
+                # 이미 받은 형식은 빼고 나머지만 (받아 둔 파일에서 로컬로 만들어짐)
+                current_options = with_outputs(current_options, pending)
+
+        item = DownloadItem(url, current_options, scheduler=self.scheduler,
+                            info=self.prefetcher.take(url), history=self.history_store,
+                            progress_hub=self.progress_hub)
+        self.list_model.add_item(item)
         self.url_input.clear()
 
         if mode == "clip":
             self.input_start.setText("00:00:00")
             self.input_end.setText("00:00:00")
+            self.input_ranges.clear()
             self.current_video_duration = 0
 
-    def remove_item(self, widget):
-        widget.stop_download()
-        self.list_layout.removeWidget(widget)
-        widget.deleteLater()
-
-    def show_list_context_menu(self, pos):
-        menu = QMenu(self)
-        menu.setStyleSheet("""
-            QMenu { background-color: #333; color: white; border: 1px solid #555; }
-            QMenu::item:selected { background-color: #555; }
-        """)
-        clear_action = QAction("완료된 항목 전체 삭제", self)
-        clear_action.triggered.connect(self.clear_finished_items)
-        menu.addAction(clear_action)
-        menu.exec_(self.scroll_area.mapToGlobal(pos))
+    def start_playlist_expansion(self, url, options):
+        """재생목록/채널을 펼치면서 받은 항목부터 바로 대기열에 추가"""
+        worker = PlaylistWorker(url)
+        skipped = [0]
+
+        def add_entries(entries):
+            skipped[0] += self.add_playlist_entries(entries, options)
+
+        def finish():
+            self.playlist_workers.remove(worker)
+            if skipped[0]:
+                QMessageBox.information(self, "알림", f"이미 받은 영상 {skipped[0]}개는 건너뛰었습니다.")
+
+        worker.entries_found.connect(add_entries)
+        worker.error_occurred.connect(
+            lambda msg: QMessageBox.warning(self, "오류", f"재생목록을 불러오는 중 오류가 발생했습니다.\n{msg}"))
+        worker.finished.connect(finish)
+        self.playlist_workers.append(worker)
+        worker.start()
+
+    def add_playlist_entries(self, entries, options):
+        """펼친 항목을 대기열에 추가하고, 이미 받은 기록이 있어 건너뛴 수를 반환"""
+        archive = get_download_archive() if self.settings.get(
+            'use_download_archive', DEFAULT_SETTINGS['use_download_archive']) else None
+        items = []
+        added = set()
+        skipped = 0
+        for entry in entries:
+            key = video_key(entry['url'])
+            if key in added or self.list_model.find_active(entry['url']) is not None:
+                continue
+            entry_options = dict(options)
+            if archive is not None:
+                # 같은 폴더에 같은 형식/화질로 이미 받은 영상은 건너뜀 (네트워크 요청 없음)
+                outputs = job_outputs(options)
+                pending = archive.pending_outputs(entry['url'], options['path'], outputs)
+                if not pending:
+                    skipped += 1
+                    continue
+                if len(pending) < len(outputs):
+                    entry_options = with_outputs(options, pending)
+            added.add(key)
+            items.append(DownloadItem(entry['url'], entry_options, scheduler=self.scheduler,
+                                      history=self.history_store, progress_hub=self.progress_hub,
+                                      title=entry.get('title')))
+        # 화면에는 먼저 받은 항목이 아래쪽에 오도록 역순으로 추가
+        self.list_model.add_items(list(reversed(items)))
+        return skipped
+
+    def add_derived_item(self, item, fmt):
+        """완료된 항목을 다른 형식으로 저장 (받아 둔 파일에서 로컬로 변환)"""
+        options = dict(item.settings)
+        options.update({'format': fmt, 'extra_outputs': [], 'derive_local': True})
+        new_item = DownloadItem(item.url, options, scheduler=self.scheduler, history=self.history_store,
+                                progress_hub=self.progress_hub)
+        self.list_model.add_item(new_item)
+
+    def remove_item(self, item):
+        item.stop_download()
+        self.list_model.remove_item(item)
+        if item.history_id is not None:
+            self.history_store.remove(item.history_id)
 
     def clear_finished_items(self):
-        for i in range(self.list_layout.count() - 1, -1, -1):
-            widget = self.list_layout.itemAt(i).widget()
-            if widget and isinstance(widget, DownloadItemWidget):
-                if widget.is_completed:
-                    self.remove_item(widget)
+        self.list_model.remove_completed()
 
     def restore_history_items(self):
-        history = load_history()
-        for data in reversed(history):
-            item_widget = DownloadItemWidget(data['url'], data['settings'], restore_data=data)
-            item_widget.remove_requested.connect(self.remove_item)
-            item_widget.cleanup_requested.connect(self.clear_finished_items)
-            self.list_layout.insertWidget(0, item_widget)
+        def make_item(data):
+            return DownloadItem(data['url'], data['settings'], restore_data=data,
+                                scheduler=self.scheduler, history=self.history_store,
+                                progress_hub=self.progress_hub)
+
+        # 완료되지 않은 항목은 모두 위쪽에 먼저 불러오고 (이어받기 대상)
+        unfinished = [make_item(data) for data in self.history_store.incomplete()]
+        # 완료된 항목은 첫 페이지만 불러오고 나머지는 스크롤할 때 모델이 이어서 불러옴
+        self.list_model.set_history_source(self.history_store, make_item, completed_only=True)
+        self.list_model.fetchMore()
+        self.list_model.add_items(unfinished)
+
+        if self.settings.get('auto_resume', DEFAULT_SETTINGS['auto_resume']):
+            # 목록 위쪽(최신) 항목이 먼저 시작되도록 역순이 아닌 화면 순서대로 등록
+            for item in unfinished:
+                if item.can_auto_resume():
+                    item.retry_download()
 
     def closeEvent(self, event):
-        new_settings = {
+        new_settings = dict(self.settings)
+        new_settings.update({
             "save_path": self.path_input.text(),
             "format_index": self.combo_format.currentIndex(),
-            "quality_index": self.combo_quality.currentIndex()
-        }
+            "quality_index": self.combo_quality.currentIndex(),
+            "extra_formats": self.extra_formats(),
+            "bandwidth_override_mbps": self.combo_bandwidth.currentData()
+        })
         save_settings(new_settings)
 
-        history_data = []
-        for i in range(self.list_layout.count()):
-            widget = self.list_layout.itemAt(i).widget()
-            if widget and isinstance(widget, DownloadItemWidget):
-                history_data.append(widget.get_state())
-                widget.stop_download()
-
-        save_history(history_data)
+        for worker in self.playlist_workers:
+            worker.stop()
+        self.prefetcher.cancel()
+
+        # 진행 중이던 항목은 중단 상태와 마지막 진행률만 기록 (나머지는 상태 변경 시 이미 저장됨)
+        unfinished = []
+        for item in self.list_model.items():
+            if item.is_running() or item.is_queued():
+                item.interrupt()
+                unfinished.append(item)
+        # 중지한 다운로드 스레드, 후처리, URL 미리 분석이 끝난 뒤에 저장소를 닫음 (끝나면서 상태/이어받기 정보를 기록)
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        wait_for_workers(SHUTDOWN_TIMEOUT)
+        get_postprocess_pool().shutdown(max(deadline - time.monotonic(), 0))
+        self.prefetcher.wait(max(deadline - time.monotonic(), 0))
+        QApplication.processEvents()  # 그동안 도착한 완료/이어받기 신호를 먼저 반영
+        self.history_store.update_many([(item.history_id, item.get_state()) for item in unfinished
+                                        if item.history_id is not None])
+        self.history_store.close()
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
         event.accept()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    apply_theme(app)  # 위젯별 스타일 대신 앱 전체에 한 번만
     window = YouTubeDownloaderApp()
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,234 @@
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+
+from utils import extract_video_id
+
+METADATA_CACHE_FILE = 'metadata_cache.db'
+
+# 포맷 URL에 만료 시각이 없을 때 사용할 기본 유효 시간 (유튜브는 보통 6시간)
+DEFAULT_FORMAT_TTL = 5 * 3600
+# 만료 직전 URL로 다운로드를 시작하지 않도록 두는 여유 시간
+EXPIRY_MARGIN = 10 * 60
+# 읽을 때마다 기록하지 않고 모아 두었다가 한 번에 기록하는 마지막 사용 시각 수
+TOUCH_BATCH = 32
+# 다운로드에 필요 없는 대용량 필드 (캐시 크기 절약)
+DROP_KEYS = ('automatic_captions', 'subtitles', 'heatmap', 'thumbnails', 'requested_subtitles')
+# 포맷 선택/다운로드 후 info 최상위에 붙는 키 (포맷별 필드는 formats 목록의 키로 판단)
+SELECTION_KEYS = ('requested_formats', 'requested_downloads', 'requested_subtitles',
+                  'filepath', '_filename', 'filename')
+# 포맷에도 들어 있을 수 있지만 영상 자체의 정보라 지우지 않는 키
+VIDEO_KEYS = ('id', 'title', 'duration', 'thumbnail', 'webpage_url', 'chapters', 'extractor', 'extractor_key')
+
+
+def _format_expiry(info):
+    """info의 포맷 URL들 중 가장 빠른 만료 시각 (없으면 None)"""
+    expiries = []
+    for f in info.get('formats') or []:
+        for key in ('url', 'manifest_url'):
+            value = f.get(key)
+            if not value:
+                continue
+            expire = parse_qs(urlparse(value).query).get('expire')
+            if not expire:
+                # DASH/HLS manifest URL은 경로에 /expire/<ts>/ 형태로 들어있음
+                parts = urlparse(value).path.split('/')
+                if 'expire' in parts and parts.index('expire') + 1 < len(parts):
+                    expire = [parts[parts.index('expire') + 1]]
+            if expire:
+                try:
+                    expiries.append(float(expire[0]))
+                except ValueError:
+                    pass
+    return min(expiries) if expiries else None
+
+
+def summarize(info):
+    """UI 표시에 필요한 요약 정보 (제목, 길이, 썸네일, 사용 가능한 화질)"""
+    heights = sorted({f.get('height') for f in info.get('formats') or [] if f.get('height')}, reverse=True)
+    return {
+        'title': info.get('title'),
+        'duration': info.get('duration', 0),
+        'thumbnail': info.get('thumbnail', ''),
+        'heights': heights,
+    }
+
+
+def unselected_info(info):
+    """
+    포맷 선택 결과를 지운 info 사본 (분석 직후 상태).
+    extract_info는 고른 포맷의 필드(format_id, url, ext, requested_formats 등)를 최상위에 합쳐 두므로
+    그대로 다시 process_ie_result에 넘기면 새로 고른 포맷에 이전 선택이 섞인다 (음성만 골라도 영상+음성 병합).
+    """
+    formats = info.get('formats')
+    # formats가 없으면 최상위가 곧 유일한 포맷이므로 선택 결과 키만 지움
+    format_keys = set().union(*formats) - set(VIDEO_KEYS) if formats else set()
+    return {k: v for k, v in info.items() if k not in format_keys and k not in SELECTION_KEYS}
+
+
+def select_formats(ydl, info, formats=None):
+    """ydl의 format 설정으로 고를 포맷 목록 (받지 않고 선택만). formats를 주면 그중에서만 고름"""
+    candidate = unselected_info(info)
+    if formats is not None:
+        candidate['formats'] = formats
+    selected = ydl.process_ie_result(candidate, download=False)
+    return selected.get('requested_formats') or [selected]
+
+
+# --- 메타데이터 캐시 ---
+class MetadataCache:
+    """
+    영상 ID 기준 디스크 메타데이터 캐시 (SQLite).
+    전체 info는 포맷 URL 만료 전까지만 다운로드에 재사용하고,
+    제목/길이/썸네일/화질 목록 요약은 ttl 동안 보관한다.
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제한다.
+    마지막 사용 시각은 메모리에 모아 두고 TOUCH_BATCH개가 차거나 삭제 판단(put), 종료 때 한 번에 기록한다.
+    """
+
+    def __init__(self, path=METADATA_CACHE_FILE, max_bytes=64 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}  # 아직 기록하지 않은 마지막 사용 시각 (video_id -> 시각)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS metadata (
+                video_id TEXT PRIMARY KEY,
+                info TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                formats_expire REAL NOT NULL,
+                expire REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("DELETE FROM metadata WHERE expire < ?", (time.time(),))
+        self._conn.commit()
+
+    def _key(self, url_or_id):
+        return extract_video_id(url_or_id) or url_or_id
+
+    def _touch(self, key, now):
+        self._touched[key] = now
+        if len(self._touched) >= TOUCH_BATCH:
+            self._flush_touches()
+            self._conn.commit()
+
+    def _flush_touches(self):
+        """모아 둔 마지막 사용 시각 기록 (커밋은 호출한 쪽에서)"""
+        if self._touched:
+            self._conn.executemany("UPDATE metadata SET last_access = ? WHERE video_id = ?",
+                                   [(now, key) for key, now in self._touched.items()])
+            self._touched.clear()
+
+    def get_info(self, url):
+        """다운로드에 바로 쓸 수 있는(포맷 URL이 유효한) 전체 info. 없으면 None"""
+        key = self._key(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT info FROM metadata WHERE video_id = ? AND formats_expire > ?", (key, now)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(key, now)
+        return json.loads(row[0])
+
+    def get_summary(self, url):
+        """제목/길이/썸네일/화질 목록. 포맷 URL이 만료되었어도 ttl 안이면 반환"""
+        key = self._key(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM metadata WHERE video_id = ? AND expire > ?", (key, now)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(key, now)
+        return json.loads(row[0])
+
+    def put(self, url, info):
+        key = self._key(url)
+        now = time.time()
+        slim = {k: v for k, v in unselected_info(info).items() if k not in DROP_KEYS}
+        try:
+            data = json.dumps(slim, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            return
+        formats_expire = _format_expiry(info) or (now + DEFAULT_FORMAT_TTL + EXPIRY_MARGIN)
+        formats_expire -= EXPIRY_MARGIN
+        summary = json.dumps(summarize(info), ensure_ascii=False)
+        size = len(data.encode('utf-8')) + len(summary.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._touched.pop(key, None)  # 방금 넣은 시각이 최신
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, data, summary, size, formats_expire, now + self.ttl, now))
+            self._evict()
+            self._conn.commit()
+
+    def invalidate(self, url):
+        key = self._key(url)
+        with self._lock:
+            self._touched.pop(key, None)
+            self._conn.execute("DELETE FROM metadata WHERE video_id = ?", (key,))
+            self._conn.commit()
+
+    def _evict(self):
+        self._flush_touches()  # 최근에 읽은 항목이 오래된 것으로 보이지 않도록
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM metadata").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for video_id, size in self._conn.execute(
+                "SELECT video_id, size FROM metadata ORDER BY last_access ASC").fetchall():
+            self._conn.execute("DELETE FROM metadata WHERE video_id = ?", (video_id,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM metadata").fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': count, 'bytes': total}
+
+    def close(self):
+        with self._lock:
+            try:
+                self._flush_touches()
+                self._conn.commit()
+            except sqlite3.ProgrammingError:
+                pass  # 이미 닫힌 캐시 (configure_metadata_cache가 이전 캐시를 닫을 때)
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def configure_metadata_cache(path=METADATA_CACHE_FILE, max_mb=64, ttl_hours=168):
+    """설정값으로 공용 캐시 생성 (앱 시작 시 한 번 호출)"""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = MetadataCache(path, max_bytes=int(max_mb * 1024 * 1024), ttl=int(ttl_hours * 3600))
+    return _cache
+
+
+def get_metadata_cache():
+    """MetadataWorker / DownloadWorker가 함께 쓰는 공용 캐시"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MetadataCache()
+        return _cache
@@ -0,0 +1,309 @@
+import json
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 작업 단계 (표시/기록 순서)
+PHASES = ('extract', 'reserve', 'download', 'postprocess', 'thumbnail')
+PHASE_LABELS = {
+    'extract': '분석',
+    'reserve': '파일 이름',
+    'download': '다운로드',
+    'postprocess': '변환',
+    'thumbnail': '썸네일',
+}
+RATE_WINDOW = 5.0  # 전체 처리량(bytes/s)을 계산하는 구간 (초)
+RECENT_JOBS = 50  # 통계 화면에 보여줄 최근 완료 작업 수
+METRICS_PREFIX = 'ytdl'
+
+
+def classify_error(message):
+    """오류 메시지를 집계용 분류로"""
+    text = message.lower()
+    for code in ('403', '404', '429', '500', '503'):
+        if f"http error {code}" in text or f"status {code}" in text:
+            return f"http_{code}"
+    if any(key in text for key in ('ffmpeg', 'ffprobe', '변환 실패', '자르기 실패')):
+        return 'ffmpeg'
+    if any(key in text for key in ('no space', 'errno 28', 'permission denied', 'errno 13')):
+        return 'disk'
+    if any(key in text for key in ('unavailable', 'private video', 'not available', 'sign in')):
+        return 'unavailable'
+    if any(key in text for key in ('timed out', 'timeout', 'connection', 'getaddrinfo', 'network',
+                                   'temporary failure', 'remote end closed')):
+        return 'network'
+    return 'other'
+
+
+# --- 작업별 단계 기록 ---
+class JobTimings:
+    """작업 하나의 단계별 시작/끝 시각과 바이트 수. 다운로드 스레드와 후처리 풀에서 함께 기록한다"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases = {}  # 단계 -> {'start', 'end', 'bytes'}
+
+    def begin(self, phase):
+        with self._lock:
+            self._phases[phase] = {'start': time.time(), 'end': None, 'bytes': None}
+
+    def end(self, phase, nbytes=None):
+        with self._lock:
+            record = self._phases.get(phase)
+            if record is None or record['end'] is not None:
+                return
+            record['end'] = time.time()
+            if nbytes is not None:
+                record['bytes'] = nbytes
+
+    @contextmanager
+    def phase(self, name, nbytes=None):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name, nbytes)
+
+    def summary(self):
+        """[{'phase', 'start', 'seconds', 'bytes', 'throughput'}] (끝난 단계만, PHASES 순서)"""
+        with self._lock:
+            phases = dict(self._phases)
+        result = []
+        for name in PHASES:
+            record = phases.get(name)
+            if record is None or record['end'] is None:
+                continue
+            seconds = max(record['end'] - record['start'], 0.0)
+            nbytes = record['bytes']
+            result.append({
+                'phase': name,
+                'start': record['start'],
+                'seconds': round(seconds, 3),
+                'bytes': nbytes,
+                'throughput': round(nbytes / seconds) if nbytes and seconds > 0 else None,
+            })
+        return result
+
+
+def format_timings(summary):
+    """단계 기록을 한 줄씩 사람이 읽을 수 있는 문자열로"""
+    lines = []
+    for record in summary:
+        line = f"{PHASE_LABELS.get(record['phase'], record['phase'])}: {record['seconds']:.2f}초"
+        if record.get('bytes'):
+            line += f", {record['bytes'] / (1024 * 1024):.1f}MB"
+        if record.get('throughput'):
+            line += f" ({record['throughput'] / (1024 * 1024):.2f}MB/s)"
+        lines.append(line)
+    return lines
+
+
+# --- 전체 집계 ---
+class MetricsRegistry:
+    """
+    모든 작업의 누적 카운터와 현재 값(게이지)을 모은다.
+    게이지는 add_provider()로 등록한 함수(스케줄러 대기열, 후처리 풀 등)를 조회 시점에 호출해 얻는다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counters = Counter()  # jobs_started/finished/failed/stopped, bytes_downloaded
+        self.errors = Counter()  # 오류 분류 -> 수
+        self.phase_seconds = Counter()
+        self.phase_bytes = Counter()
+        self.phase_count = Counter()
+        self.active_jobs = 0
+        self.recent = deque(maxlen=RECENT_JOBS)  # (url, 단계 기록)
+        self._rate_samples = deque()  # (시각, 누적 바이트)
+        self._providers = {}
+
+    def add_provider(self, name, func):
+        """조회 시점에 func()의 dict 값을 '이름_키' 게이지로 내보냄"""
+        with self._lock:
+            self._providers[name] = func
+
+    def remove_provider(self, name):
+        with self._lock:
+            self._providers.pop(name, None)
+
+    # --- 작업 ---
+    def job_started(self):
+        with self._lock:
+            self.counters['jobs_started'] += 1
+            self.active_jobs += 1
+
+    def job_failed(self, message):
+        with self._lock:
+            self.counters['jobs_failed'] += 1
+            self.errors[classify_error(message)] += 1
+
+    def job_done(self, url, timings, completed, stopped):
+        """작업이 후처리까지 끝났을 때 (완료/오류/중지 모두)"""
+        summary = timings.summary()
+        with self._lock:
+            self.active_jobs -= 1
+            if completed:
+                self.counters['jobs_finished'] += 1
+                self.recent.append((url, summary))
+            elif stopped:
+                self.counters['jobs_stopped'] += 1
+            for record in summary:
+                self._observe(record['phase'], record['seconds'], record['bytes'])
+
+    def observe_phase(self, phase, seconds, nbytes=None):
+        """작업 밖에서 측정한 단계 (썸네일 등)"""
+        with self._lock:
+            self._observe(phase, seconds, nbytes)
+
+    def _observe(self, phase, seconds, nbytes):
+        self.phase_count[phase] += 1
+        self.phase_seconds[phase] += seconds
+        if nbytes:
+            self.phase_bytes[phase] += nbytes
+
+    def add_bytes(self, count):
+        """받은 바이트 (progress hook마다 호출)"""
+        now = time.monotonic()
+        with self._lock:
+            self.counters['bytes_downloaded'] += count
+            if not self._rate_samples or now - self._rate_samples[-1][0] >= 0.5:
+                self._rate_samples.append((now, self.counters['bytes_downloaded']))
+
+    def _rate(self):
+        now = time.monotonic()
+        while self._rate_samples and now - self._rate_samples[0][0] > RATE_WINDOW:
+            self._rate_samples.popleft()
+        if not self._rate_samples:
+            return 0.0
+        first_time, first_bytes = self._rate_samples[0]
+        elapsed = max(now - first_time, 0.5)
+        return (self.counters['bytes_downloaded'] - first_bytes) / elapsed
+
+    # --- 조회 ---
+    def snapshot(self):
+        with self._lock:
+            data = {
+                'uptime': round(time.time() - self.started, 1),
+                'active_jobs': self.active_jobs,
+                'bytes_per_second': round(self._rate()),
+                'counters': dict(self.counters),
+                'errors': dict(self.errors),
+                'phases': {phase: {'count': self.phase_count[phase],
+                                   'seconds': round(self.phase_seconds[phase], 3),
+                                   'bytes': self.phase_bytes[phase]}
+                           for phase in PHASES if self.phase_count[phase]},
+                'recent': [{'url': url, 'timings': summary} for url, summary in self.recent],
+            }
+            providers = dict(self._providers)
+        gauges = {}
+        for name, func in providers.items():
+            try:
+                gauges[name] = func()
+            except Exception as e:
+                gauges[name] = {'error': str(e)}
+        data['gauges'] = gauges
+        return data
+
+    def render_prometheus(self):
+        """Prometheus 텍스트 형식"""
+        data = self.snapshot()
+        p = METRICS_PREFIX
+        lines = [
+            f"# TYPE {p}_active_jobs gauge", f"{p}_active_jobs {data['active_jobs']}",
+            f"# TYPE {p}_bytes_per_second gauge", f"{p}_bytes_per_second {data['bytes_per_second']}",
+            f"# TYPE {p}_uptime_seconds gauge", f"{p}_uptime_seconds {data['uptime']}",
+        ]
+        for name in ('jobs_started', 'jobs_finished', 'jobs_failed', 'jobs_stopped', 'bytes_downloaded'):
+            lines += [f"# TYPE {p}_{name}_total counter", f"{p}_{name}_total {data['counters'].get(name, 0)}"]
+        lines.append(f"# TYPE {p}_errors_total counter")
+        for kind, count in sorted(data['errors'].items()):
+            lines.append(f'{p}_errors_total{{class="{kind}"}} {count}')
+        for metric, key in (('phase_seconds_total', 'seconds'), ('phase_bytes_total', 'bytes'),
+                            ('phase_count_total', 'count')):
+            lines.append(f"# TYPE {p}_{metric} counter")
+            for phase, values in data['phases'].items():
+                lines.append(f'{p}_{metric}{{phase="{phase}"}} {values[key]}')
+        for name, values in sorted(data['gauges'].items()):
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"{p}_{name}_{key} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics():
+    """DownloadJob/썸네일 로더/스케줄러가 함께 쓰는 집계"""
+    return _metrics
+
+
+def register_gauges(scheduler, registry=None):
+    """스케줄러 대기열과 공용 풀(후처리, 대역폭, 조각 동시 요청, YoutubeDL, 메타데이터 캐시)을 게이지로 등록"""
+    from postprocess import get_postprocess_pool
+    from bandwidth import get_bandwidth_governor
+    from concurrency import get_concurrency_registry
+    from sessions import get_ydl_pool
+    from metacache import get_metadata_cache
+
+    registry = registry or get_metrics()
+    registry.add_provider('scheduler', lambda: {'running': scheduler.running_count,
+                                                'queued': scheduler.queued_count})
+    registry.add_provider('postprocess', lambda: get_postprocess_pool().stats())
+    registry.add_provider('bandwidth', lambda: get_bandwidth_governor().stats())
+    registry.add_provider('fragments', lambda: {
+        'throughput': get_concurrency_registry().aggregate_throughput(),
+        'jobs': len(get_concurrency_registry().stats()['jobs'])})
+    registry.add_provider('ydl_pool', lambda: get_ydl_pool().stats())
+    registry.add_provider('metadata_cache', lambda: get_metadata_cache().stats())
+    return registry
+
+
+# --- localhost 조회 서버 ---
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        registry = self.server.registry
+        path = self.path.split('?', 1)[0]
+        if path == '/metrics':
+            body = registry.render_prometheus().encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        elif path == '/metrics.json':
+            body = json.dumps(registry.snapshot(), ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port, registry):
+        super().__init__(('127.0.0.1', port), _MetricsHandler)
+        self.registry = registry
+
+
+def start_metrics_server(port, registry=None):
+    """127.0.0.1:port에서 /metrics(Prometheus), /metrics.json 제공. port가 0이거나 열 수 없으면 None"""
+    if not port:
+        return None
+    try:
+        server = MetricsServer(int(port), registry or get_metrics())
+    except OSError as e:
+        print(f"통계 서버를 열 수 없습니다 (포트 {port}): {e}", file=sys.stderr)  # 헤드리스 출력(JSON Lines)과 분리
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True, name='metrics').start()
+    return server
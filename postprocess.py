@@ -0,0 +1,62 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 동시에 실행할 후처리(ffmpeg 병합/변환) 수. ffmpeg가 자체적으로 여러 스레드를 쓰므로 코어 수의 절반
+POSTPROCESS_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+
+# --- 후처리 풀 ---
+class PostProcessPool:
+    """
+    다운로드가 끝난 작업의 병합/변환을 전담하는 크기 제한 풀.
+    다운로드 슬롯은 원본 스트림을 다 받는 즉시 반납되어 다음 다운로드를 시작하고,
+    CPU를 쓰는 ffmpeg 작업은 여기서 최대 max_workers개까지만 동시에 실행된다.
+    """
+
+    def __init__(self, max_workers=POSTPROCESS_WORKERS):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='postprocess')
+        self._lock = threading.Condition()
+        self._queued = 0
+        self._running = 0
+
+    def submit(self, task):
+        """task()를 대기열에 넣음. 예외는 task 안에서 처리해야 한다"""
+        with self._lock:
+            self._queued += 1
+        return self._executor.submit(self._run, task)
+
+    def _run(self, task):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            task()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._lock.notify_all()
+
+    def shutdown(self, timeout=None):
+        """앱 종료 시: 대기 중인 작업은 취소하고 실행 중인 작업이 끝나기를 최대 timeout초 기다림. 모두 끝났으면 True"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            return self._lock.wait_for(lambda: self._running == 0, timeout)
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.max_workers, 'queued': self._queued, 'running': self._running}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_postprocess_pool():
+    """모든 DownloadJob이 공유하는 후처리 풀"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PostProcessPool()
+        return _pool
@@ -0,0 +1,123 @@
+import threading
+
+STATUS_DOWNLOADING = "다운로드 중..."
+STATUS_POSTPROCESSING = "변환 및 저장 중..."
+STATUS_POSTPROCESS_QUEUED = "변환 대기 중..."
+
+# --- 작업 단계 (다운로드 스레드 -> 후처리 풀) ---
+STAGE_DOWNLOAD = 'download'
+STAGE_POSTPROCESS = 'postprocess'
+STAGE_DONE = 'done'
+
+
+# --- 작업별 진행 상태 (워커 스레드에서 갱신, GUI에서 주기적으로 읽음) ---
+class JobProgress:
+    """
+    yt-dlp progress hook 값을 바이트 단위로 누적한다.
+    영상+음성처럼 여러 스트림을 받는 경우 포맷별 바이트를 합산해 작업 전체 진행률을 계산하고,
+    아직 시작하지 않은 스트림은 requested_formats의 예상 크기로 채운다.
+    후처리 단계로 넘어가면 진행률은 후처리 단계 기준으로 다시 계산된다 (set_stage/set_status).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._parts = {}  # format_id -> [downloaded, total, finished]
+        self._expected = None  # format_id -> 예상 크기
+        self._expected_ids = set()  # 받아야 할 스트림 format_id (영상+음성이면 2개)
+        self._speed = None
+        self._eta = None
+        self._status = STATUS_DOWNLOADING
+        self._forced_percent = None
+        self._concurrency = None  # 조각 다운로드의 현재 동시 요청 수
+        self._stage = STAGE_DOWNLOAD
+        self._dirty = False
+
+    def _load_expected(self, info):
+        self._expected = {}
+        for f in info.get('requested_formats') or []:
+            if not f.get('format_id'):
+                continue
+            self._expected_ids.add(f['format_id'])
+            size = f.get('filesize') or f.get('filesize_approx')
+            if size:
+                self._expected[f['format_id']] = size
+
+    def update(self, d):
+        """yt-dlp progress hook dict 반영 (어느 스레드에서든 호출 가능)"""
+        info = d.get('info_dict') or {}
+        key = info.get('format_id') or d.get('filename') or ''
+        downloaded = d.get('downloaded_bytes') or 0
+        total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+        with self._lock:
+            if self._expected is None:
+                self._load_expected(info)
+            if d['status'] == 'downloading':
+                self._parts[key] = [downloaded, total, False]
+                self._speed = d.get('speed')
+                self._eta = d.get('eta')
+                self._status = STATUS_DOWNLOADING
+                self._forced_percent = None
+            elif d['status'] == 'finished':
+                size = total or downloaded or self._expected.get(key, 0)
+                self._parts[key] = [size, size, True]
+                if all(self._parts.get(fid, (0, 0, False))[2] for fid in self._expected_ids):
+                    self._status = STATUS_POSTPROCESSING
+                    self._forced_percent = 100
+                    self._speed = None
+                    self._eta = None
+            self._dirty = True
+
+    def set_concurrency(self, level):
+        with self._lock:
+            if level != self._concurrency:
+                self._concurrency = level
+                self._dirty = True
+
+    def set_stage(self, stage, status, percent=0):
+        with self._lock:
+            self._stage = stage
+            self._concurrency = None
+        self.set_status(status, percent)
+
+    def set_status(self, status, percent=None):
+        with self._lock:
+            self._status = status
+            self._forced_percent = percent
+            self._speed = None
+            self._eta = None
+            self._dirty = True
+
+    def _totals(self):
+        downloaded = sum(part[0] for part in self._parts.values())
+        total = sum(part[1] for part in self._parts.values())
+        total += sum(size for key, size in self._expected.items() if key not in self._parts)
+        return downloaded, total
+
+    def snapshot(self, only_if_dirty=True):
+        """변경이 있을 때만 진행 정보 dict 반환"""
+        with self._lock:
+            if only_if_dirty and not self._dirty:
+                return None
+            self._dirty = False
+            if self._expected is None:
+                self._expected = {}
+            downloaded, total = self._totals()
+            if self._forced_percent is not None:
+                percent = self._forced_percent
+            elif total > 0:
+                percent = min(downloaded / total * 100, 100.0)
+            else:
+                percent = 0.0
+            eta = self._eta
+            if self._speed and total > downloaded:
+                eta = (total - downloaded) / self._speed
+            return {
+                'percent': percent,
+                'status': self._status,
+                'downloaded': downloaded,
+                'total': total,
+                'speed': self._speed,
+                'eta': eta,
+                'concurrency': self._concurrency,
+                'stage': self._stage,
+            }
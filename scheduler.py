@@ -0,0 +1,220 @@
+import heapq
+import itertools
+import threading
+from urllib.parse import urlparse
+
+# --- 작업 상태 ---
+STATE_QUEUED = 'queued'
+STATE_RUNNING = 'running'
+STATE_DONE = 'done'
+
+# --- 우선순위 (값이 클수록 먼저 실행) ---
+PRIORITY_LOW = -1
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 1
+
+# 같은 서비스로 취급할 호스트 별칭
+HOST_ALIASES = {
+    'youtu.be': 'youtube.com',
+    'youtube-nocookie.com': 'youtube.com',
+}
+
+
+def host_of(url):
+    """URL에서 동시 실행 제한에 사용할 호스트 이름 추출"""
+    if '://' not in url:
+        url = 'https://' + url
+    host = (urlparse(url).hostname or '').lower()
+    for prefix in ('www.', 'm.', 'music.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    return HOST_ALIASES.get(host, host)
+
+
+class _Entry:
+    __slots__ = ('job', 'host', 'priority', 'order', 'state', 'heap_item')
+
+    def __init__(self, job, host, priority, order):
+        self.job = job
+        self.host = host
+        self.priority = priority
+        self.order = order
+        self.state = STATE_QUEUED
+        self.heap_item = None  # 호스트별 힙에 들어 있는 현재 항목 (우선순위가 바뀌면 새 항목으로 교체)
+
+    def sort_key(self):
+        return (-self.priority, self.order)
+
+
+# --- 다운로드 스케줄러 ---
+class DownloadScheduler:
+    """
+    다운로드 작업 대기열을 관리하고 동시 실행 수를 제한한다.
+    작업(job)은 url 속성과 start_download() 메서드를 가져야 하며,
+    끝나면(완료/오류/중지) job_done(job)을 호출해 슬롯을 반납해야 한다.
+    per_host_limit가 None이면 호스트별 제한 없이 전체 동시 실행 수까지 실행한다
+    (유튜브 URL은 모두 같은 호스트이므로 기본값으로 호스트 제한을 두면 전체 설정이 의미 없어짐).
+    대기열은 호스트별 우선순위 힙이라 작업을 꺼낼 때 전체를 정렬하지 않는다.
+    """
+
+    def __init__(self, max_concurrent=3, per_host_limit=None, host_limits=None):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.per_host_limit = None if per_host_limit is None else max(1, int(per_host_limit))
+        self.host_limits = dict(host_limits or {})
+        self._entries = {}     # id(job) -> _Entry
+        self._queued = set()   # 대기 중인 _Entry
+        self._heaps = {}       # host -> [(sort_key, 순번, _Entry)] (바뀌거나 빠진 항목은 꺼낼 때 버림)
+        self._heap_seq = itertools.count()
+        self._running = {}     # host -> 실행 중 개수
+        self._order = 0
+        self._front_order = 0
+        self._lock = threading.RLock()
+
+    # --- 설정 ---
+    def set_limits(self, max_concurrent=None, per_host_limit=None, host_limits=None):
+        with self._lock:
+            if max_concurrent is not None:
+                self.max_concurrent = max(1, int(max_concurrent))
+            if per_host_limit is not None:
+                self.per_host_limit = max(1, int(per_host_limit))
+            if host_limits is not None:
+                self.host_limits = dict(host_limits)
+        self._dispatch()
+
+    def limit_for(self, host):
+        default = self.max_concurrent if self.per_host_limit is None else self.per_host_limit
+        return max(1, int(self.host_limits.get(host, default)))
+
+    # --- 상태 조회 ---
+    def state_of(self, job):
+        entry = self._entries.get(id(job))
+        return entry.state if entry else None
+
+    @property
+    def running_count(self):
+        return sum(self._running.values())
+
+    @property
+    def queued_count(self):
+        return len(self._queued)
+
+    def queue_position(self, job):
+        """대기열에서의 순번 (0부터). 대기 중이 아니면 None"""
+        with self._lock:
+            entry = self._entries.get(id(job))
+            if not entry or entry.state != STATE_QUEUED:
+                return None
+            key = entry.sort_key()
+            return sum(1 for other in self._queued if other.sort_key() < key)
+
+    # --- 대기열 (호스트별 힙) ---
+    def _push(self, entry):
+        """대기열에 넣거나 우선순위/순서가 바뀐 항목을 다시 넣음 (이전 힙 항목은 무효)"""
+        entry.heap_item = (entry.sort_key(), next(self._heap_seq), entry)
+        heapq.heappush(self._heaps.setdefault(entry.host, []), entry.heap_item)
+        self._queued.add(entry)
+
+    def _unqueue(self, entry):
+        self._queued.discard(entry)
+        entry.heap_item = None
+
+    def _head(self, host):
+        """host에서 가장 먼저 실행할 대기 항목. 무효가 된 힙 항목은 여기서 버림"""
+        heap = self._heaps.get(host)
+        while heap:
+            item = heap[0]
+            if item[2].heap_item is item:
+                return item[2]
+            heapq.heappop(heap)
+        self._heaps.pop(host, None)
+        return None
+
+    # --- 작업 제어 ---
+    def submit(self, job, priority=PRIORITY_NORMAL):
+        """작업을 대기열에 추가. 슬롯이 비어 있으면 바로 시작된다."""
+        with self._lock:
+            entry = self._entries.get(id(job))
+            if entry and entry.state != STATE_DONE:
+                return
+            self._order += 1
+            entry = _Entry(job, host_of(job.url), priority, self._order)
+            self._entries[id(job)] = entry
+            self._push(entry)
+        self._dispatch()
+
+    def set_priority(self, job, priority):
+        with self._lock:
+            entry = self._entries.get(id(job))
+            if entry and entry.state == STATE_QUEUED and entry.priority != priority:
+                entry.priority = priority
+                self._push(entry)
+        self._dispatch()
+
+    def move_to_front(self, job):
+        """대기 중인 작업을 대기열 맨 앞으로 이동"""
+        with self._lock:
+            entry = self._entries.get(id(job))
+            if not entry or entry.state != STATE_QUEUED:
+                return False
+            self._front_order -= 1
+            # 각 호스트 힙의 맨 앞이 그 호스트에서 우선순위가 가장 높음
+            heads = [self._head(host) for host in list(self._heaps)]
+            entry.priority = max([entry.priority] + [head.priority for head in heads if head])
+            entry.order = self._front_order
+            self._push(entry)
+        self._dispatch()
+        return True
+
+    def cancel(self, job):
+        """대기 중인 작업을 대기열에서 제거. 제거되었으면 True"""
+        with self._lock:
+            entry = self._entries.get(id(job))
+            if not entry or entry.state != STATE_QUEUED:
+                return False
+            self._unqueue(entry)
+            del self._entries[id(job)]
+        return True
+
+    def job_done(self, job):
+        """실행 중이던 작업의 슬롯 반납"""
+        with self._lock:
+            entry = self._entries.pop(id(job), None)
+            if not entry:
+                return
+            if entry.state == STATE_RUNNING:
+                self._running[entry.host] -= 1
+                if self._running[entry.host] <= 0:
+                    del self._running[entry.host]
+            elif entry.state == STATE_QUEUED:
+                self._unqueue(entry)
+            entry.state = STATE_DONE
+        self._dispatch()
+
+    def _next_entry(self):
+        """실행할 수 있는 호스트들의 힙 맨 앞 중 가장 우선인 항목 (호스트 수만큼만 확인)"""
+        if self.running_count >= self.max_concurrent:
+            return None
+        best = None
+        for host in list(self._heaps):
+            if self._running.get(host, 0) >= self.limit_for(host):
+                continue
+            entry = self._head(host)
+            if entry is not None and (best is None or entry.sort_key() < best.sort_key()):
+                best = entry
+        return best
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                entry = self._next_entry()
+                if entry is None:
+                    return
+                self._unqueue(entry)
+                entry.state = STATE_RUNNING
+                self._running[entry.host] = self._running.get(entry.host, 0) + 1
+            try:
+                entry.job.start_download()
+            except Exception as e:
+                print(f"다운로드 시작 실패: {e}")
+                self.job_done(entry.job)
@@ -0,0 +1,155 @@
+import functools
+import inspect
+import json
+import threading
+from contextlib import contextmanager
+
+# yt-dlp가 플레이어 JS/서명 해석 결과를 저장하는 폴더 (재시작 후에도 유지)
+YTDL_CACHE_DIR = 'ytdlp_cache'
+MAX_IDLE_PER_KIND = 4  # 옵션 종류별로 보관할 유휴 추출기 수
+# 이 옵션이 같은 YoutubeDL끼리 HTTP 연결과 쿠키를 함께 쓴다
+NETWORK_KEYS = ('http_headers', 'nocheckcertificate', 'proxy', 'socket_timeout', 'source_address', 'cookiefile')
+# 공유하려고 인스턴스 속성으로 덮어쓰는 YoutubeDL의 cached_property (yt-dlp 2023.07.06 이후 구조)
+SHARED_ATTRS = ('_request_director', 'cookiejar')
+
+
+def _can_share_network(ydl_class):
+    """
+    yt-dlp에는 연결 풀을 넘겨주는 공개 API가 없어 SHARED_ATTRS를 인스턴스 속성으로 덮어써서 공유한다.
+    yt-dlp가 이 구조를 바꾸면 공유하지 않고 인스턴스마다 자기 연결을 쓴다 (tests/test_sessions.py에서 확인).
+    """
+    return all(isinstance(inspect.getattr_static(ydl_class, name, None), functools.cached_property)
+               for name in SHARED_ATTRS)
+
+
+def _options_key(opts, keys=None):
+    if keys is not None:
+        opts = {key: opts.get(key) for key in keys}
+    return json.dumps(opts, sort_keys=True, default=repr)
+
+
+# --- YoutubeDL 컨텍스트 풀 ---
+class YoutubeDLPool:
+    """
+    작업 간에 재사용하는 YoutubeDL 컨텍스트.
+    - 추출용(extractor): 같은 옵션의 인스턴스를 빌려주고 돌려받는다. 추출기 인스턴스가 플레이어 JS와
+      서명 해석 결과를 메모리에 들고 있어 두 번째 영상부터는 다시 받지 않는다.
+    - 다운로드용(downloader): 훅/후처리기/출력 경로가 작업마다 달라 새로 만들지만 HTTP 연결은 공유한다.
+    네트워크 옵션이 같은 컨텍스트는 모두 한 request director(keep-alive 연결 풀)와 쿠키를 쓰므로
+    작업마다 TCP/TLS 연결을 새로 맺지 않는다.
+    """
+
+    def __init__(self, max_idle=MAX_IDLE_PER_KIND):
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle = {}  # 옵션 키 -> [YoutubeDL]
+        self._networks = {}  # 네트워크 옵션 키 -> 연결/쿠키를 가진 YoutubeDL
+        self._share = None  # 설치된 yt-dlp에서 연결/쿠키를 공유할 수 있는지 (처음 만들 때 확인)
+        self.created = 0
+        self.reused = 0
+
+    def _create(self, opts):
+        import yt_dlp
+
+        opts = dict(opts)
+        opts.setdefault('cachedir', YTDL_CACHE_DIR)
+        ydl = yt_dlp.YoutubeDL(opts)
+        network_key = _options_key(opts, NETWORK_KEYS)
+        with self._lock:
+            self.created += 1
+            if self._share is None:
+                self._share = _can_share_network(yt_dlp.YoutubeDL)
+                if not self._share:
+                    print("yt-dlp 구조가 달라 HTTP 연결/쿠키를 공유하지 않습니다")
+            if not self._share:
+                return ydl
+            owner = self._networks.get(network_key)
+            if owner is None:
+                owner = self._networks[network_key] = yt_dlp.YoutubeDL(
+                    {key: opts[key] for key in NETWORK_KEYS if key in opts})
+        # cached_property라 인스턴스 속성으로 덮어쓰면 이 YoutubeDL의 모든 요청이 공용 연결을 사용
+        for name in SHARED_ATTRS:
+            ydl.__dict__[name] = getattr(owner, name)
+        return ydl
+
+    @staticmethod
+    def _discard(ydl):
+        # 공용 연결은 닫지 않도록 떼어낸 뒤 닫음
+        ydl.__dict__.pop('_request_director', None)
+        ydl.close()
+
+    @contextmanager
+    def extractor(self, opts):
+        """추출용 YoutubeDL을 빌려줌. 한 번에 한 스레드만 사용하고 끝나면 풀로 돌아간다"""
+        key = _options_key(opts)
+        ydl = None
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if idle:
+                ydl = idle.pop()
+                self.reused += 1
+        if ydl is None:
+            ydl = self._create(opts)
+        try:
+            yield ydl
+        finally:
+            with self._lock:
+                keep = len(idle) < self.max_idle
+                if keep:
+                    idle.append(ydl)
+            if not keep:
+                self._discard(ydl)
+
+    @contextmanager
+    def downloader(self, opts):
+        """작업 전용 다운로드 YoutubeDL (HTTP 연결만 공유)"""
+        ydl = self._create(opts)
+        try:
+            yield ydl
+        finally:
+            self._discard(ydl)
+
+    def stats(self):
+        with self._lock:
+            return {'created': self.created, 'reused': self.reused,
+                    'idle': sum(len(idle) for idle in self._idle.values()), 'networks': len(self._networks)}
+
+    def close(self):
+        with self._lock:
+            idle = [ydl for ydls in self._idle.values() for ydl in ydls]
+            owners = list(self._networks.values())
+            self._idle.clear()
+            self._networks.clear()
+        for ydl in idle:
+            self._discard(ydl)
+        for owner in owners:
+            owner.close()
+
+
+_pool = YoutubeDLPool()
+
+
+def get_ydl_pool():
+    """추출/다운로드 작업이 함께 쓰는 YoutubeDL 풀"""
+    return _pool
+
+
+# --- yt-dlp 밖의 HTTP 요청 (썸네일 등) ---
+_http_session = None
+_http_lock = threading.Lock()
+
+
+def get_http_session():
+    """keep-alive 연결을 재사용하는 공용 requests 세션"""
+    global _http_session
+    with _http_lock:
+        if _http_session is None:
+            import requests  # 시작 속도를 위해 처음 필요할 때 import
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http_session = session
+        return _http_session
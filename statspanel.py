@@ -0,0 +1,92 @@
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView
+from PyQt5.QtCore import Qt, QTimer
+
+from metrics import get_metrics, PHASE_LABELS
+from utils import format_speed
+from theme import set_state
+
+# --- 통계 창 (metrics 집계를 주기적으로 읽어 표시) ---
+class StatsPanel(QDialog):
+    """진행 중인 작업/대기열/처리량과 단계별 누적 소요 시간. 창이 열려 있는 동안만 갱신한다"""
+
+    COLUMNS = ["단계", "횟수", "합계 (초)", "평균 (초)", "데이터", "평균 속도"]
+
+    def __init__(self, metrics_url=None, parent=None, interval_ms=1000):
+        super().__init__(parent)
+        self.setWindowTitle("통계")
+        self.resize(560, 380)
+
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        self.summary_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.errors_label = QLabel()
+        layout.addWidget(self.errors_label)
+        if metrics_url:
+            endpoint = QLabel(f"외부 수집: {metrics_url}")
+            endpoint.setProperty("role", "hint")
+            endpoint.setTextInteractionFlags(Qt.TextSelectableByMouse)
+            layout.addWidget(endpoint)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        data = get_metrics().snapshot()
+        counters = data['counters']
+        gauges = data['gauges']
+        scheduler = gauges.get('scheduler', {})
+        postprocess = gauges.get('postprocess', {})
+        gui = gauges.get('gui', {})
+        summary = (
+            f"진행 중 {data['active_jobs']}개 (다운로드 {scheduler.get('running', 0)}, "
+            f"변환 {postprocess.get('running', 0)} / 대기 {postprocess.get('queued', 0)}) · "
+            f"대기열 {scheduler.get('queued', 0)}개 · 전체 속도 {format_speed(data['bytes_per_second'])}\n"
+            f"완료 {counters.get('jobs_finished', 0)} · 오류 {counters.get('jobs_failed', 0)} · "
+            f"중지 {counters.get('jobs_stopped', 0)} · "
+            f"받은 데이터 {counters.get('bytes_downloaded', 0) / (1024 * 1024):.1f}MB")
+        if gui.get('frames'):
+            summary += f"\n목록 그리기 {gui['p50_ms']:.1f}ms (p95 {gui['p95_ms']:.1f}ms, 최대 {gui['max_ms']:.1f}ms)"
+        self.summary_label.setText(summary)
+
+        phases = data['phases']
+        self.table.setRowCount(len(phases))
+        for row, (phase, values) in enumerate(phases.items()):
+            count, seconds, nbytes = values['count'], values['seconds'], values['bytes']
+            cells = [
+                PHASE_LABELS.get(phase, phase),
+                str(count),
+                f"{seconds:.1f}",
+                f"{seconds / count:.2f}" if count else "-",
+                f"{nbytes / (1024 * 1024):.1f}MB" if nbytes else "-",
+                format_speed(nbytes / seconds) if nbytes and seconds else "-",
+            ]
+            for column, text in enumerate(cells):
+                cell = QTableWidgetItem(text)
+                if column:
+                    cell.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, cell)
+
+        errors = data['errors']
+        set_state(self.errors_label, 'error' if errors else None)
+        self.errors_label.setText(
+            "오류 종류: " + (", ".join(f"{kind} {count}" for kind, count in sorted(errors.items())) or "없음"))
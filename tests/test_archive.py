@@ -0,0 +1,63 @@
+import pytest
+
+from archive import DownloadArchive
+from utils import video_key
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://youtube.com/watch?feature=share&v=dQw4w9WgXcQ&t=42',
+    'https://m.youtube.com/watch?v=dQw4w9WgXcQ&list=PL0123456789',
+    'https://youtu.be/dQw4w9WgXcQ?si=abc',
+    'https://www.youtube.com/shorts/dQw4w9WgXcQ',
+    'https://www.youtube.com/embed/dQw4w9WgXcQ',
+    'https://www.youtube.com/live/dQw4w9WgXcQ',
+])
+def test_video_key_same_video(url):
+    assert video_key(url) == 'dQw4w9WgXcQ'
+
+
+def test_video_key_clips_and_other_urls():
+    assert video_key('https://www.youtube.com/clip/UgkxAbCdEf') == 'clip:UgkxAbCdEf'
+    assert video_key('  https://example.com/video.mp4 ') == 'https://example.com/video.mp4'
+    # ID 뒤에 글자가 더 이어지면 11자 ID가 아님
+    assert video_key('https://www.youtube.com/watch?v=dQw4w9WgXcQx') == 'https://www.youtube.com/watch?v=dQw4w9WgXcQx'
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = DownloadArchive(str(tmp_path / 'archive.db'))
+    yield archive
+    archive.close()
+
+
+def test_lookup_by_video_folder_format_and_quality(archive, tmp_path):
+    saved = tmp_path / 'video.mp4'
+    saved.write_bytes(b'x')
+    archive.record('https://www.youtube.com/watch?v=dQw4w9WgXcQ', str(tmp_path), 'mp4', '1080p', str(saved))
+
+    # 같은 영상의 다른 URL 형태, 같은 폴더의 다른 표기도 찾음
+    assert archive.lookup('https://youtu.be/dQw4w9WgXcQ', str(tmp_path / '.'), 'mp4', '1080p') == str(saved)
+    assert archive.lookup('https://youtu.be/dQw4w9WgXcQ', str(tmp_path), 'mp4', '720p') is None
+    assert archive.lookup('https://youtu.be/dQw4w9WgXcQ', str(tmp_path), 'mkv', '1080p') is None
+    assert archive.lookup('https://youtu.be/dQw4w9WgXcQ', str(tmp_path / 'other'), 'mp4', '1080p') is None
+    assert archive.pending_outputs('https://youtu.be/dQw4w9WgXcQ', str(tmp_path),
+                                   [('mp4', '1080p'), ('mp3', '최고')]) == [('mp3', '최고')]
+
+
+def test_audio_formats_ignore_quality(archive, tmp_path):
+    saved = tmp_path / 'song.mp3'
+    saved.write_bytes(b'x')
+    archive.record('https://youtu.be/dQw4w9WgXcQ', str(tmp_path), 'mp3', '최고', str(saved))
+    assert archive.lookup('https://youtu.be/dQw4w9WgXcQ', str(tmp_path), 'mp3', '720p') == str(saved)
+
+
+def test_deleted_file_is_forgotten(archive, tmp_path):
+    saved = tmp_path / 'video.mp4'
+    saved.write_bytes(b'x')
+    archive.record('https://youtu.be/dQw4w9WgXcQ', str(tmp_path), 'mp4', '최고', str(saved))
+    saved.unlink()
+
+    assert archive.lookup('https://youtu.be/dQw4w9WgXcQ', str(tmp_path), 'mp4', '최고') is None
+    assert archive.files('https://youtu.be/dQw4w9WgXcQ') == []
+    assert archive.stats()['entries'] == 0
@@ -0,0 +1,48 @@
+import time
+
+from bandwidth import BandwidthGovernor
+
+MB = 1024 * 1024
+
+
+def _share():
+    governor = BandwidthGovernor(limit_mbps=8)  # 1MB/s
+    return governor.register()
+
+
+def test_resumed_stream_is_not_charged_for_existing_part():
+    share = _share()
+    resumed = 500 * MB  # 이어받기 첫 보고에는 이미 받아 둔 .part 크기가 포함됨
+
+    deadline = time.monotonic() + 1.0
+    should_stop = lambda: time.monotonic() > deadline  # 잘못 청구되면 수백 초를 기다리므로 끊고 검사
+    share.consume('137', resumed, should_stop, offset=resumed)
+    share.consume('137', resumed + 64 * 1024, should_stop, offset=resumed)
+    assert time.monotonic() < deadline
+    assert share._tokens > -MB
+
+
+def test_resumed_stream_first_report_charges_new_bytes():
+    share = _share()
+    resumed = 500 * MB
+
+    stop_after = time.monotonic() + 0.2
+    share.consume('137', resumed + 4 * MB, should_stop=lambda: time.monotonic() > stop_after, offset=resumed)
+    assert -5 * MB < share._tokens < -3 * MB  # .part 크기는 빼고 새로 받은 4MB만 청구
+
+
+def test_fresh_stream_first_report_is_charged():
+    share = _share()
+
+    stop_after = time.monotonic() + 0.2
+    share.consume('137', 4 * MB, should_stop=lambda: time.monotonic() > stop_after)
+    assert share._tokens < -3 * MB  # 8Mbit/s(1MB/s)로 4MB는 몇 초를 기다려야 함
+
+
+def test_new_bytes_after_first_report_are_charged():
+    share = _share()
+
+    share.consume('137', 0)
+    stop_after = time.monotonic() + 0.2
+    share.consume('137', 4 * MB, should_stop=lambda: time.monotonic() > stop_after)
+    assert share._tokens < -3 * MB
@@ -0,0 +1,106 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from clipper import ClipCutter, clip_sources, cut_clip, parse_m3u8_segments, plan_runs
+
+FFMPEG = shutil.which('ffmpeg')
+FFPROBE = shutil.which('ffprobe')
+DURATION = 12
+GOP_SECONDS = 2  # 키프레임/조각 간격
+TOLERANCE = 0.15  # 길이 허용 오차 (초, 음성 프레임 경계)
+AV_OFFSET = 0.05  # 영상/음성 시작 시각 차이 허용치 (초)
+
+pytestmark = pytest.mark.skipif(not (FFMPEG and FFPROBE), reason="ffmpeg/ffprobe 없음")
+
+
+def _run(args):
+    return subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True).stdout
+
+
+@pytest.fixture(scope='module')
+def hls(tmp_path_factory):
+    """h264+aac HLS (2초 GOP, 2초 조각) -> 조각 [(경로, 길이)]"""
+    root = tmp_path_factory.mktemp('hls')
+    playlist = root / 'index.m3u8'
+    try:
+        _run([FFMPEG, '-v', 'error', '-f', 'lavfi', '-i', f'testsrc=size=320x240:rate=25:duration={DURATION}',
+              '-f', 'lavfi', '-i', f'sine=frequency=440:sample_rate=48000:duration={DURATION}',
+              '-c:v', 'libx264', '-preset', 'ultrafast', '-g', str(GOP_SECONDS * 25), '-keyint_min', str(GOP_SECONDS * 25),
+              '-sc_threshold', '0', '-c:a', 'aac', '-b:a', '128k',
+              '-f', 'hls', '-hls_time', str(GOP_SECONDS), '-hls_list_size', '0',
+              '-hls_segment_filename', str(root / 'seg%03d.ts'), str(playlist)])
+    except (OSError, subprocess.CalledProcessError) as e:
+        pytest.skip(f"ffmpeg로 테스트 영상을 만들 수 없음 (libx264/aac 필요): {e}")
+    _, segments = parse_m3u8_segments(playlist.read_text(), playlist.as_uri())
+    return [(str(root / url.rsplit('/', 1)[1]), duration) for url, duration in segments]
+
+
+def _download_runs(segments, ranges, workdir):
+    """조각 다운로더 대신 고른 조각들을 이어 붙여 묶음 파일을 만듦 (MPEG-TS는 이어 붙이면 그대로 재생됨)"""
+    runs = plan_runs(segments, ranges)
+    for n, run in enumerate(runs):
+        run['path'] = str(workdir / f'run{n}.ts')
+        with open(run['path'], 'wb') as out:
+            for path, _ in segments[run['first']:run['last'] + 1]:
+                with open(path, 'rb') as f:
+                    out.write(f.read())
+    return [{'kind': 'muxed', 'segments': segments, 'runs': runs}]
+
+
+def _probe(path):
+    data = json.loads(_run([FFPROBE, '-v', 'error', '-show_entries',
+                            'format=duration:stream=codec_type,start_time', '-of', 'json', path]))
+    starts = {s['codec_type']: float(s.get('start_time') or 0) for s in data['streams']}
+    return float(data['format']['duration']), starts
+
+
+@pytest.mark.parametrize('start,end', [
+    (3.3, 8.7),  # 앞뒤 경계 GOP 재인코딩 + 가운데 스트림 복사 + 이어 붙이기
+    (4.0, 8.0),  # 키프레임에 맞는 구간 (스트림 복사만)
+    (5.2, 5.9),  # GOP 하나 안 (전체 재인코딩)
+])
+def test_smart_cut_duration_and_av_sync(hls, tmp_path, start, end):
+    plan = _download_runs(hls, [(start, end)], tmp_path)
+    out = str(tmp_path / 'clip.mp4')
+    cutter = ClipCutter(FFMPEG, FFPROBE, str(tmp_path / 'clip'))
+    try:
+        cut_clip(cutter, clip_sources(plan, start, end), start, end, out, 'mp4')
+    finally:
+        cutter.cleanup()
+
+    duration, starts = _probe(out)
+    assert abs(duration - (end - start)) < TOLERANCE
+    assert set(starts) == {'video', 'audio'}
+    assert abs(starts['video'] - starts['audio']) < AV_OFFSET
+
+
+def test_audio_only_cut(hls, tmp_path):
+    start, end = 2.5, 6.5
+    plan = _download_runs(hls, [(start, end)], tmp_path)
+    out = str(tmp_path / 'clip.m4a')
+    cutter = ClipCutter(FFMPEG, FFPROBE, str(tmp_path / 'clip'))
+    try:
+        cut_clip(cutter, clip_sources(plan, start, end), start, end, out, 'm4a')
+    finally:
+        cutter.cleanup()
+
+    duration, starts = _probe(out)
+    assert abs(duration - (end - start)) < TOLERANCE
+    assert set(starts) == {'audio'}
+
+
+def test_mp3_clip_uses_configured_quality(hls, tmp_path):
+    start, end = 2.5, 6.5
+    plan = _download_runs(hls, [(start, end)], tmp_path)
+    out = str(tmp_path / 'clip.mp3')
+    cutter = ClipCutter(FFMPEG, FFPROBE, str(tmp_path / 'clip'), mp3_quality='96')
+    try:
+        cut_clip(cutter, clip_sources(plan, start, end), start, end, out, 'mp3')
+    finally:
+        cutter.cleanup()
+
+    data = json.loads(_run([FFPROBE, '-v', 'error', '-show_entries', 'stream=bit_rate', '-of', 'json', out]))
+    assert abs(int(data['streams'][0]['bit_rate']) - 96000) < 8000  # 기본값(192k)이 아니라 설정 음질
@@ -0,0 +1,52 @@
+import gc
+
+from concurrency import ConcurrencyRegistry, INITIAL_LEVEL
+
+
+class FakeResponse:
+    def __init__(self, body=b'x' * 10):
+        self.body = body
+
+    def read(self, size=-1):
+        data, self.body = self.body, b''
+        return data
+
+    def close(self):
+        pass
+
+
+def _open(controller, url):
+    return controller.wrap_urlopen(lambda req: FakeResponse())(url)
+
+
+def test_slot_released_on_eof_close_or_drop():
+    controller = ConcurrencyRegistry().create()
+    responses = [_open(controller, f'https://rr1---sn-a.googlevideo.com/{i}') for i in range(3)]
+    assert controller._active == 3
+
+    while responses[0].read():
+        pass
+    responses[1].close()
+    responses[1].close()  # 두 번 닫아도 한 번만 반납
+    assert controller._active == 1
+
+    del responses[2]  # 다 읽지도 닫지도 않고 버린 응답
+    gc.collect()
+    assert controller._active == 0
+
+
+def test_level_remembered_per_media_domain():
+    registry = ConcurrencyRegistry()
+    first = registry.create()
+    _open(first, 'https://rr1---sn-a.googlevideo.com/videoplayback').close()
+    first.level = 7
+    first.finish()
+    assert registry.stats()['host_levels'] == {'googlevideo.com': 7}
+
+    # 다른 CDN 노드라도 같은 도메인이면 찾은 수준부터, 다른 서버는 기본값부터
+    same = registry.create()
+    same.bind('https://rr5---sn-b.googlevideo.com/videoplayback')
+    other = registry.create()
+    other.bind('https://cdn.example.com/seg1.ts')
+    assert same.level == 7
+    assert other.level == INITIAL_LEVEL
@@ -0,0 +1,57 @@
+import pytest
+
+from derive import _audio_args, fetch_output, job_outputs, pick_source
+
+
+@pytest.mark.parametrize('outputs,expected', [
+    ([('mp3', '최고'), ('mp4', '720p')], ('mp4', '720p')),  # 영상을 받아 mp3를 뽑음
+    ([('mp4', '720p'), ('mp4', '1080p')], ('mp4', '1080p')),  # 높은 화질을 받아 줄임
+    ([('mp4', '1080p'), ('mkv', '1080p')], ('mp4', '1080p')),  # 같은 화질이면 주 형식
+    ([('mp3', '최고'), ('m4a', '최고')], ('m4a', '최고')),  # mp3에서는 다른 음성 형식을 만들지 않음
+    ([('m4a', '최고'), ('opus', '최고')], ('m4a', '최고')),
+])
+def test_fetch_output(outputs, expected):
+    assert fetch_output(outputs) == expected
+
+
+def test_job_outputs_dedupes_and_ignores_audio_quality():
+    options = {'format': 'mp4', 'quality': '1080p',
+               'extra_outputs': [{'format': 'mp3', 'quality': '720p'}, {'format': 'mp4'}, {'format': 'mkv'}]}
+    assert job_outputs(options) == [('mp4', '1080p'), ('mp3', '1080p'), ('mkv', '1080p')]
+
+
+CANDIDATES = [
+    ('mp4', '최고', '/dl/a.mp4'),
+    ('mkv', '720p', '/dl/b.mkv'),
+    ('mp4', '1080p', '/dl/c.mp4'),
+    ('m4a', '최고', '/dl/d.m4a'),
+    ('mp3', '최고', '/dl/e.mp3'),
+]
+
+
+@pytest.mark.parametrize('fmt,quality,expected', [
+    ('mp4', '720p', '/dl/b.mkv'),  # 같은 화질이면 컨테이너만 바꿈 (재인코딩 없음)
+    ('mkv', '1080p', '/dl/c.mp4'),
+    ('mp4', '480p', '/dl/b.mkv'),  # 줄여야 하면 가장 가까운 높은 화질에서
+    ('mkv', '최고', '/dl/a.mp4'),
+    ('m4a', '최고', '/dl/d.m4a'),  # 같은 형식
+    ('opus', '최고', '/dl/d.m4a'),  # 음성 파일이 영상보다 우선, mp3는 다른 음성 형식의 원본이 아님
+    ('mp3', '최고', '/dl/e.mp3'),
+])
+def test_pick_source(fmt, quality, expected):
+    assert pick_source(CANDIDATES, fmt, quality) == expected
+
+
+def test_pick_source_without_usable_candidate():
+    assert pick_source([('mp4', '720p', '/dl/a.mp4')], 'mp4', '1080p') is None  # 화질을 올릴 수 없음
+    assert pick_source([('m4a', '최고', '/dl/a.m4a')], 'mp4', '720p') is None  # 음성에서 영상은 못 만듦
+    assert pick_source([('mp3', '최고', '/dl/a.mp3')], 'm4a', '최고') is None
+    assert pick_source([], 'mp4', '최고') is None
+
+
+def test_audio_args_copy_or_encode_with_mp3_quality():
+    assert _audio_args('m4a', 'aac', None) == ['-c:a', 'copy']
+    assert _audio_args('mkv', 'opus', None) == ['-c:a', 'copy']
+    assert _audio_args('m4a', 'opus', None) == ['-c:a', 'aac', '-b:a', '192k']
+    assert _audio_args('mp3', 'aac', '128') == ['-c:a', 'libmp3lame', '-b:a', '128k']
+    assert _audio_args('mp3', 'aac', '2') == ['-c:a', 'libmp3lame', '-q:a', '2']  # 10 미만은 VBR 등급
@@ -0,0 +1,103 @@
+import json
+import threading
+
+import pytest
+
+from benchmarks import fakemedia
+from archive import configure_download_archive
+from engine import AUDIO_FORMATS, DownloadJob, extract_video_info
+from metacache import configure_metadata_cache
+
+MEDIA_SIZE = 256 * 1024
+AUDIO_SIZE = MEDIA_SIZE // 8  # fakemedia의 DASH 음성 트랙 크기
+
+
+@pytest.fixture(scope='module')
+def server():
+    """DASH(영상 137 + 음성 140) 가짜 미디어 서버와 추출기"""
+    server = fakemedia.FakeMediaServer(media='dash', media_size=MEDIA_SIZE)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fakemedia.install_stub_extractor(server.base_url)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def stores(tmp_path, monkeypatch):
+    """작업 디렉터리와 공용 저장소를 테스트마다 임시 폴더로"""
+    monkeypatch.chdir(tmp_path)
+    cache = configure_metadata_cache(path=str(tmp_path / 'metadata_cache.db'))
+    archive = configure_download_archive(path=str(tmp_path / 'download_archive.db'))
+    yield
+    cache.close()
+    archive.close()
+
+
+def audio_job(url, tmp_path, fmt='m4a', **kwargs):
+    options = {'path': str(tmp_path), 'format': fmt, 'quality': '최고', 'mode': 'normal', 'derive_local': False}
+    return DownloadJob(url, options, **kwargs)
+
+
+def run(job):
+    """작업을 이 스레드에서 실행하고 후처리까지 끝날 때까지 기다림"""
+    done = threading.Event()
+    job.on_done = done.set
+    job.run()
+    assert done.wait(30)
+
+
+@pytest.mark.parametrize('fmt', sorted(AUDIO_FORMATS))
+@pytest.mark.parametrize('cached', [False, True])
+def test_audio_download_reuses_extracted_info(server, tmp_path, fmt, cached):
+    url = fakemedia.bench_url(sorted(AUDIO_FORMATS).index(fmt) + 10 * cached)
+    info = extract_video_info(url)  # 기본 포맷 선택(영상+음성)으로 분석한 info
+    if cached:
+        info = extract_video_info(url)  # 메타데이터 캐시 적중
+    assert 'requested_formats' not in info and 'format_id' not in info
+
+    before = server.media_bytes
+    resume = []
+    job = audio_job(url, tmp_path, fmt, info=info, on_resume_data=resume.append)
+    run(job)
+
+    # 음성 스트림만 받아야 함 (이전 선택이 남아 있으면 영상+음성을 받아 병합)
+    assert server.media_bytes - before == AUDIO_SIZE
+    assert job.bytes_received == AUDIO_SIZE
+    assert resume[0]['format_id'] == '140'
+
+
+def _resume_data(tmp_path, url):
+    """이전 실행이 m4a(음성 140)로 받던 작업의 이어받기 정보"""
+    video_id = url.rsplit('=', 1)[1]
+    return {'target_path': str(tmp_path / f"Benchmark {video_id}.m4a"), 'format_id': '140'}
+
+
+def test_resumed_stream_counts_only_new_bytes(server, tmp_path):
+    url = fakemedia.bench_url(20)
+    resume = _resume_data(tmp_path, url)
+    # 조각 8개 중 3개를 받고 멈춘 상태 (.part + 조각 위치를 적은 .ytdl)
+    done_fragments = 3
+    with open(resume['target_path'] + '.part', 'wb') as f:
+        for i in range(done_fragments):
+            start, end = server.segment_range('a', i)
+            f.write(server.payload[start:end])
+    with open(resume['target_path'] + '.ytdl', 'w') as f:
+        json.dump({'downloader': {'current_fragment': {'index': done_fragments}, 'extra_state': {}}}, f)
+    existing = server.segment_range('a', done_fragments)[0]
+
+    before = server.media_bytes
+    job = audio_job(url, tmp_path, info=extract_video_info(url), resume=resume)
+    run(job)
+
+    assert server.media_bytes - before == AUDIO_SIZE - existing
+    assert job.bytes_received == AUDIO_SIZE - existing
+
+
+def test_fresh_stream_in_resumed_job_counts_first_chunk(server, tmp_path):
+    url = fakemedia.bench_url(21)
+    resume = _resume_data(tmp_path, url)  # 이어받기 정보는 있지만 .part는 없음
+
+    job = audio_job(url, tmp_path, info=extract_video_info(url), resume=resume)
+    run(job)
+
+    assert job.bytes_received == AUDIO_SIZE
@@ -0,0 +1,65 @@
+import os
+import threading
+
+from filenames import FilenameReservations
+
+
+def test_concurrent_reservations_get_unique_names(tmp_path):
+    reservations = FilenameReservations()
+    (tmp_path / 'Title.mp4').write_bytes(b'x')  # 이미 있는 파일
+    start = threading.Barrier(16)
+    paths = []
+    lock = threading.Lock()
+
+    def reserve():
+        start.wait()
+        for _ in range(10):
+            path = reservations.reserve(str(tmp_path), 'Title', 'mp4')
+            with lock:
+                paths.append(path)
+
+    threads = [threading.Thread(target=reserve) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    names = sorted(os.path.basename(path) for path in paths)
+    assert len(set(names)) == 160
+    assert 'Title.mp4' not in names
+    assert set(names) == {f'Title ({n}).mp4' for n in range(1, 161)}
+
+
+def test_reserved_stem_blocks_other_extensions_until_released(tmp_path):
+    reservations = FilenameReservations()
+    video = reservations.reserve(str(tmp_path), 'Song', 'mp4')
+    # 같은 기본 이름이면 확장자가 달라도 (작업 중 임시 파일 Song.f140.m4a 등이 겹치므로) 피함
+    audio = reservations.reserve(str(tmp_path), 'Song', 'm4a')
+    assert os.path.basename(audio) == 'Song (1).m4a'
+
+    reservations.release(video, completed=True)
+    assert os.path.basename(reservations.reserve(str(tmp_path), 'Song', 'mkv')) == 'Song.mkv'
+    assert os.path.basename(reservations.reserve(str(tmp_path), 'Song', 'mp4')) == 'Song (2).mp4'
+
+
+def test_interrupted_download_name_is_kept_for_resume(tmp_path):
+    (tmp_path / 'Clip.mp4.part').write_bytes(b'x')
+    (tmp_path / 'Other.f137.mp4.part-Frag3').write_bytes(b'x')
+    reservations = FilenameReservations()
+    assert os.path.basename(reservations.reserve(str(tmp_path), 'Clip', 'mp4')) == 'Clip (1).mp4'
+    assert os.path.basename(reservations.reserve(str(tmp_path), 'Other', 'mkv')) == 'Other (1).mkv'
+
+    # 이어받는 작업은 자기 .part가 남은 경로를 그대로 쓰고, 다른 작업과는 겹치지 않음
+    resumed = str(tmp_path / 'Clip.mp4')
+    assert reservations.claim(resumed)
+    assert not reservations.claim(resumed)
+    reservations.release(resumed, completed=False)
+    assert os.path.basename(reservations.reserve(str(tmp_path), 'Clip', 'mp4')) == 'Clip (2).mp4'
+
+
+def test_sibling_output_shares_base_name(tmp_path):
+    reservations = FilenameReservations()
+    video = reservations.reserve(str(tmp_path), 'Talk', 'mp4')
+    assert os.path.basename(reservations.reserve_sibling(video, 'mp3')) == 'Talk.mp3'
+    (tmp_path / 'Talk.opus').write_bytes(b'x')
+    assert os.path.basename(reservations.reserve_sibling(video, 'opus')) == 'Talk (1).opus'
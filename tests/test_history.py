@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from history import HistoryStore
+
+
+def _state(n, completed=False):
+    return {'url': f'https://youtu.be/video{n:06d}', 'settings': {'format': 'mp4', 'quality': '최고'},
+            'title': f'영상 {n}', 'meta_text': '-', 'progress': 100 if completed else 30,
+            'is_completed': completed, 'saved_path': None, 'thumbnail': '', 'state': 'done' if completed else 'stopped',
+            'resume': None if completed else {'format_id': '137'}, 'timings': []}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    yield store
+    store.close()
+
+
+def test_migrate_json_keeps_order_and_extra_fields(store, tmp_path):
+    path = tmp_path / 'history.json'
+    # history.json은 최신 항목이 맨 앞
+    legacy = [_state(3, completed=True), _state(2), {'title': 'URL 없는 항목'}, _state(1, completed=True)]
+    path.write_text(json.dumps(legacy, ensure_ascii=False), encoding='utf-8')
+
+    assert store.migrate_json(str(path)) == 3  # URL 없는 항목은 건너뜀
+    assert not path.exists() and (tmp_path / 'history.json.bak').exists()
+    assert store.migrate_json(str(path)) == 0  # 한 번만 가져옴
+
+    page = store.load_page()
+    assert [item['title'] for item in page] == ['영상 3', '영상 2', '영상 1']
+    assert page[1]['resume'] == {'format_id': '137'}  # 컬럼이 없는 키는 extra에 보존
+    assert page[1]['settings'] == {'format': 'mp4', 'quality': '최고'}
+    assert [item['title'] for item in store.incomplete()] == ['영상 2']
+
+
+def test_paging_newest_first(store):
+    ids = [store.add(_state(n, completed=n % 3 != 0)) for n in range(10)]
+    assert store.count() == 10
+
+    first = store.load_page(limit=4)
+    assert [item['history_id'] for item in first] == ids[::-1][:4]
+    assert [item['history_id'] for item in store.load_page(offset=4, limit=4)] == ids[::-1][4:8]
+    rest = store.load_before(first[-1]['history_id'], limit=100)
+    assert [item['history_id'] for item in rest] == ids[::-1][4:]
+
+    completed = store.load_page(limit=3, completed_only=True)
+    assert all(item['is_completed'] for item in completed)
+    older = store.load_before(completed[-1]['history_id'], completed_only=True)
+    assert [item['history_id'] for item in completed + older] == [i for n, i in reversed(list(enumerate(ids)))
+                                                                  if n % 3 != 0]
+
+
+def test_update_and_remove(store):
+    first, second = store.add(_state(1)), store.add(_state(2))
+    store.update_many([(first, _state(1, completed=True))])
+    store.remove(second)
+    assert [(item['history_id'], item['is_completed']) for item in store.load_page()] == [(first, True)]
+    store.remove_completed()
+    assert store.count() == 0
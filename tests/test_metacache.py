@@ -0,0 +1,70 @@
+import time
+
+import metacache
+from metacache import MetadataCache, _format_expiry
+
+
+def _info(video_id, url='https://rr1---sn-a.googlevideo.com/videoplayback?expire=4102444800&id=1', pad=0):
+    return {'id': video_id, 'title': video_id, 'duration': 10, 'description': 'x' * pad,
+            'formats': [{'format_id': '18', 'url': url, 'height': 360}]}
+
+
+def test_format_expiry_reads_query_and_manifest_path():
+    info = {'formats': [
+        {'url': 'https://rr1---sn-a.googlevideo.com/videoplayback?expire=2000&id=1'},
+        {'manifest_url': 'https://manifest.googlevideo.com/api/manifest/dash/expire/1500/ei/abc/id/1'},
+        {'url': 'https://example.com/a.mp4?expire=soon'},  # 숫자가 아니면 무시
+    ]}
+    assert _format_expiry(info) == 1500.0
+    assert _format_expiry({'formats': [{'url': 'https://example.com/a.mp4'}]}) is None
+    assert _format_expiry({}) is None
+
+
+def test_expired_format_urls_keep_summary_only(tmp_path):
+    cache = MetadataCache(str(tmp_path / 'cache.db'))
+    url = 'https://www.youtube.com/watch?v=expiredvid1'
+    past = time.time() + metacache.EXPIRY_MARGIN - 1  # 여유 시간 안에 만료
+    cache.put(url, _info('expiredvid1', url=f'https://rr1---sn-a.googlevideo.com/v?expire={past:.0f}'))
+    assert cache.get_info(url) is None
+    assert cache.get_summary(url)['title'] == 'expiredvid1'
+    cache.close()
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    urls = [f'https://www.youtube.com/watch?v=video{i:06d}' for i in range(3)]
+    probe = MetadataCache(str(tmp_path / 'probe.db'))
+    probe.put(urls[0], _info('video000000', pad=4000))
+    entry_size = probe.stats()['bytes']
+    probe.close()
+
+    cache = MetadataCache(str(tmp_path / 'cache.db'), max_bytes=int(entry_size * 2.5))
+    cache.put(urls[0], _info('video000000', pad=4000))
+    cache.put(urls[1], _info('video000001', pad=4000))
+    assert cache.get_info(urls[0]) is not None  # 0번을 최근에 사용 (시각은 모아 두었다가 기록)
+    cache.put(urls[2], _info('video000002', pad=4000))
+
+    assert cache.get_summary(urls[1]) is None  # 가장 오래 사용하지 않은 항목부터 삭제
+    assert cache.get_summary(urls[0]) is not None
+    assert cache.get_summary(urls[2]) is not None
+    assert cache.stats()['entries'] == 2
+
+
+def test_reads_are_not_committed_one_by_one(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    url = 'https://www.youtube.com/watch?v=touchvideo1'
+    cache = MetadataCache(path)
+    cache.put(url, _info('touchvideo1'))
+    cache._conn.execute("UPDATE metadata SET last_access = 0")
+    cache._conn.commit()
+    commits = []
+    cache._conn.set_trace_callback(lambda sql: commits.append(sql) if sql.startswith('COMMIT') else None)
+    for _ in range(metacache.TOUCH_BATCH - 1):
+        cache.get_summary(url)
+    assert commits == []
+
+    read_at = time.time()
+    cache.close()  # 닫을 때 남은 사용 시각을 기록
+    reopened = MetadataCache(path)
+    last_access = reopened._conn.execute("SELECT last_access FROM metadata").fetchone()[0]
+    assert 0 < read_at - last_access < 5
+    reopened.close()
@@ -0,0 +1,69 @@
+import time
+
+from scheduler import DownloadScheduler, PRIORITY_HIGH, PRIORITY_LOW
+
+
+class FakeJob:
+    def __init__(self, url, started):
+        self.url = url
+        self.started = started
+
+    def start_download(self):
+        self.started.append(self)
+
+
+def _jobs(count, started, url='https://www.youtube.com/watch?v=job{:06d}'):
+    return [FakeJob(url.format(i), started) for i in range(count)]
+
+
+def test_default_runs_up_to_global_limit_on_one_host():
+    started = []
+    scheduler = DownloadScheduler(max_concurrent=4)
+    for job in _jobs(10, started) + [FakeJob('https://youtu.be/short000001', started)]:
+        scheduler.submit(job)
+    assert len(started) == 4  # youtube.com/youtu.be는 같은 호스트지만 전체 제한까지 실행
+    assert scheduler.queued_count == 7
+
+
+def test_per_host_limit_when_configured():
+    started = []
+    scheduler = DownloadScheduler(max_concurrent=4, per_host_limit=2, host_limits={'example.com': 1})
+    for job in (_jobs(3, started) + _jobs(3, started, 'https://example.com/v{}')
+                + _jobs(3, started, 'https://vimeo.com/{}')):
+        scheduler.submit(job)
+    hosts = [job.url.split('/')[2] for job in started]
+    assert hosts == ['www.youtube.com', 'www.youtube.com', 'example.com', 'vimeo.com']
+
+
+def test_priority_front_and_cancel_order():
+    started = []
+    scheduler = DownloadScheduler(max_concurrent=1)
+    running, *queued = _jobs(6, started)
+    for job in [running] + queued:
+        scheduler.submit(job)
+    scheduler.set_priority(queued[3], PRIORITY_HIGH)
+    scheduler.set_priority(queued[0], PRIORITY_LOW)
+    scheduler.move_to_front(queued[4])
+    scheduler.cancel(queued[1])
+    expected = [queued[4], queued[3], queued[2], queued[0]]
+    assert [scheduler.queue_position(job) for job in expected] == [0, 1, 2, 3]
+    assert scheduler.queue_position(queued[1]) is None
+
+    for job in [running] + expected:
+        assert started[-1] is job
+        scheduler.job_done(job)
+    assert scheduler.running_count == 0 and scheduler.queued_count == 0
+
+
+def test_dispatch_does_not_sort_large_queue():
+    started = []
+    scheduler = DownloadScheduler(max_concurrent=2)
+    jobs = _jobs(20000, started)
+    for job in jobs:
+        scheduler.submit(job)
+    begin = time.perf_counter()
+    for job in jobs[:2000]:
+        scheduler.job_done(job)  # 끝날 때마다 대기열에서 다음 작업을 꺼냄
+    elapsed = time.perf_counter() - begin
+    assert started[:2002] == jobs[:2002]
+    assert elapsed < 2.0  # 매번 2만 개를 정렬하면 수십 초
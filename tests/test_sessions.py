@@ -0,0 +1,51 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sessions import YoutubeDLPool
+
+OPTS = {'quiet': True, 'no_warnings': True}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_GET(self):
+        self.server.clients.add(self.client_address)
+        body = (self.headers.get('Cookie') or '').encode()
+        self.send_response(200)
+        if self.path == '/login':
+            self.send_header('Set-Cookie', 'sid=pool; Path=/')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.clients = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def test_downloaders_share_connection_and_cookies(server):
+    base = f'http://127.0.0.1:{server.server_port}'
+    pool = YoutubeDLPool()
+    try:
+        with pool.downloader(OPTS) as first:
+            director = first._request_director
+            first.urlopen(f'{base}/login').read()
+        # 작업이 끝나 닫힌 뒤에도 공용 연결/쿠키는 다음 작업이 그대로 씀
+        with pool.downloader(OPTS) as second, pool.extractor(OPTS) as extractor:
+            assert second._request_director is director is extractor._request_director
+            assert second.cookiejar is extractor.cookiejar
+            assert second.urlopen(f'{base}/echo').read() == b'sid=pool'
+    finally:
+        pool.close()
+    assert len(server.clients) == 1  # 요청 두 번이 keep-alive 연결 하나로
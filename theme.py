@@ -0,0 +1,77 @@
+"""
+앱 전체 스타일시트
+
+위젯마다 setStyleSheet()을 부르면 호출할 때마다 스타일시트를 다시 해석하고 하위 위젯 전체를 다시 꾸민다.
+스타일은 QApplication에 한 번만 적용하고, 위젯별 차이는 동적 속성(role, state)으로 고른다.
+상태가 바뀔 때는 set_state()로 속성만 바꾸고 해당 위젯만 다시 꾸민다.
+"""
+
+# 기본 색상
+COLORS = {
+    'window': '#1e1e1e',
+    'text': '#ffffff',
+    'input': '#333333',
+    'button': '#333333',
+    'button_primary': '#444444',
+    'border': '#555555',
+    'hover': '#555555',
+    'list': '#222222',
+    'list_border': '#2a2a2a',
+    'item': '#2b2b2b',
+    'item_selected': '#333333',
+    'muted': '#aaaaaa',
+    'bar': '#444444',
+    'accent': '#3498db',
+}
+
+# 상태별 색상 (목록의 상태 메시지/프로그레스 바, state 속성을 가진 위젯)
+STATE_COLORS = {
+    'queued': '#3498db',
+    'running': '#3498db',
+    'done': '#2ecc71',
+    'error': '#e74c3c',
+    'stopped': '#e67e22',
+    'interrupted': '#e67e22',
+}
+
+
+def _state_rules():
+    return "\n".join(f'QLabel[state="{state}"] {{ color: {color}; }}'
+                     for state, color in STATE_COLORS.items())
+
+
+APP_STYLESHEET = f"""
+QWidget {{ background-color: {COLORS['window']}; color: {COLORS['text']}; }}
+QLineEdit {{ padding: 5px; background-color: {COLORS['input']}; border: 1px solid {COLORS['border']}; color: white; }}
+QComboBox {{ background-color: {COLORS['input']}; color: white; padding: 3px; }}
+QPushButton {{ background-color: {COLORS['button']}; color: white; padding: 3px; }}
+QPushButton[role="primary"] {{ background-color: {COLORS['button_primary']}; padding: 5px; }}
+QRadioButton {{ color: white; }}
+QRadioButton::indicator:checked {{ background-color: {COLORS['accent']}; border: 2px solid white; border-radius: 6px; }}
+QMenu {{ background-color: {COLORS['input']}; color: white; border: 1px solid {COLORS['border']}; }}
+QMenu::item:selected {{ background-color: {COLORS['hover']}; }}
+QLabel[role="separator"] {{ border-top: 1px solid {COLORS['border']}; margin-top: 5px; margin-bottom: 5px; }}
+QLabel[role="hint"] {{ color: {COLORS['muted']}; }}
+QListView#downloadList {{ border: 2px inset {COLORS['list_border']}; background-color: {COLORS['list']}; }}
+QListView#downloadList QScrollBar:vertical {{ background: {COLORS['input']}; width: 10px; }}
+QListView#downloadList QScrollBar::handle:vertical {{ background: {COLORS['border']}; }}
+QTableWidget {{ background-color: {COLORS['list']}; gridline-color: #444; border: 1px solid {COLORS['border']}; }}
+QHeaderView::section {{ background-color: {COLORS['input']}; color: white; border: 1px solid #444; padding: 3px; }}
+{_state_rules()}
+"""
+
+
+def apply_theme(app):
+    """QApplication에 스타일시트를 한 번 적용 (이미 적용되어 있으면 다시 해석하지 않음)"""
+    if app.styleSheet() != APP_STYLESHEET:
+        app.setStyleSheet(APP_STYLESHEET)
+
+
+def set_state(widget, state):
+    """state 속성만 바꾸고 그 위젯만 다시 꾸민다 (값이 같으면 아무것도 하지 않음)"""
+    if widget.property('state') == state:
+        return
+    widget.setProperty('state', state)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
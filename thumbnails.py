@@ -0,0 +1,133 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+
+from sessions import get_http_session
+from metrics import get_metrics
+
+THUMBNAIL_CACHE_DIR = 'thumbnail_cache'
+THUMBNAIL_SIZE = (120, 68)  # 목록 항목의 썸네일 영역 크기
+FAILED_RETRY = 10 * 60  # 받지 못한 썸네일을 네트워크에서 다시 받기까지 기다리는 시간 (초)
+
+
+def _cache_file(cache_dir, url):
+    return os.path.join(cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.jpg')
+
+
+# --- 썸네일 로딩 작업 (스레드풀에서 실행) ---
+class _ThumbnailTask(QRunnable):
+    def __init__(self, loader, url):
+        super().__init__()
+        self.loader = loader
+        self.url = url
+        self.cache_dir = loader.cache_dir
+        self.size = loader.size
+
+    def run(self):
+        image = QImage()
+        path = _cache_file(self.cache_dir, self.url)
+        try:
+            # 1. 디스크 캐시 (이미 축소된 이미지)
+            if os.path.exists(path) and image.load(path):
+                self.loader._loaded.emit(self.url, image)
+                return
+
+            # 2. 네트워크에서 받아서 라벨 크기로 한 번만 축소 후 디스크에 저장
+            started = time.monotonic()
+            data = get_http_session().get(self.url, timeout=10).content
+            get_metrics().observe_phase('thumbnail', time.monotonic() - started, len(data))
+            if image.loadFromData(data):
+                image = image.scaled(self.size[0], self.size[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                os.makedirs(self.cache_dir, exist_ok=True)
+                image.save(path, 'JPG', 90)
+        except Exception as e:
+            print(f"썸네일 로드 실패: {e}")
+        self.loader._loaded.emit(self.url, image)
+
+
+# --- 썸네일 로더 ---
+class ThumbnailLoader(QObject):
+    """
+    GUI 스레드를 막지 않고 썸네일을 가져온다.
+    축소된 QPixmap은 메모리 LRU(max_items개)에, 원본 대신 축소본은 디스크에 보관하여
+    히스토리에서 복원한 항목은 네트워크 없이 썸네일을 다시 표시한다.
+    항목은 QPixmap을 들고 있지 않고 URL(캐시 키)만 가지며 그릴 때 cached()로 찾는다.
+    그래서 LRU에서 밀려난 썸네일은 실제로 메모리에서 해제된다.
+    """
+    _loaded = pyqtSignal(str, QImage)
+
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, max_items=300, size=THUMBNAIL_SIZE, max_threads=4):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.size = size
+        self._memory = OrderedDict()  # url -> QPixmap
+        self._pending = {}  # url -> [callback, ...]
+        self._failed = {}  # 받지 못한 url -> 실패 시각 (FAILED_RETRY 동안 다시 받지 않음)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._loaded.connect(self._on_loaded)
+
+    def request(self, url, callback):
+        """
+        썸네일이 준비되면 GUI 스레드에서 callback(pixmap) 호출. 메모리 캐시에 있으면 즉시 호출.
+        받지 못했으면 callback(None) (최근에 실패한 URL이면 다시 받지 않고 즉시 호출)
+        """
+        if not url:
+            return
+        pixmap = self._memory.get(url)
+        if pixmap is not None:
+            self._memory.move_to_end(url)
+            callback(pixmap)
+            return
+        failed = self._failed.get(url)
+        if failed is not None:
+            if time.monotonic() - failed < FAILED_RETRY:
+                callback(None)
+                return
+            del self._failed[url]
+        if url in self._pending:
+            self._pending[url].append(callback)
+            return
+        self._pending[url] = [callback]
+        self._pool.start(_ThumbnailTask(self, url))
+
+    def cached(self, url):
+        """메모리 캐시에 있는 썸네일 (없으면 None). 찾은 항목은 최근 사용으로 표시"""
+        pixmap = self._memory.get(url)
+        if pixmap is not None:
+            self._memory.move_to_end(url)
+        return pixmap
+
+    def _on_loaded(self, url, image):
+        callbacks = self._pending.pop(url, [])
+        if image.isNull():
+            # 요청한 항목이 로드 중 상태로 남지 않도록 실패도 알림
+            self._failed[url] = time.monotonic()
+            pixmap = None
+        else:
+            pixmap = QPixmap.fromImage(image)
+            self._memory[url] = pixmap
+            self._memory.move_to_end(url)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+        for callback in callbacks:
+            try:
+                callback(pixmap)
+            except RuntimeError:
+                pass  # 요청한 위젯이 이미 삭제된 경우
+
+
+_loader = None
+
+
+def get_thumbnail_loader():
+    """앱 전체에서 공유하는 썸네일 로더 (GUI 스레드에서 호출)"""
+    global _loader
+    if _loader is None:
+        _loader = ThumbnailLoader()
+    return _loader
@@ -7,8 +7,25 @@ HISTORY_FILE = 'history.json'
 
 DEFAULT_SETTINGS = {
     "save_path": os.path.join(os.getcwd(), "download"),
-    "format_index": 0,  # 0: mp4, 1: mkv, 2: mp3
-    "quality_index": 0  # 0: 최고, 1: 1080p, ...
+    "format_index": 0,  # 0: mp4, 1: mkv, 2: mp3, 3: m4a, 4: opus
+    "quality_index": 0,  # 0: 최고, 1: 1080p, ...
+    "max_concurrent_downloads": 3,  # 전체 동시 다운로드 수
+    "max_downloads_per_host": None,  # 호스트별 동시 다운로드 수 (None = 전체 동시 다운로드 수까지)
+    "host_download_limits": {},  # 호스트별 개별 제한 (예: {"youtube.com": 2})
+    "metadata_cache_max_mb": 64,  # 메타데이터 캐시 최대 크기
+    "metadata_cache_ttl_hours": 168,  # 제목/길이 등 메타데이터 보관 기간
+    "metadata_prefetch_delay_ms": 400,  # URL 입력이 멈춘 뒤 메타데이터 분석을 시작할 때까지 기다리는 시간
+    "auto_resume": True,  # 이전 세션에서 중단된 다운로드를 시작 시 자동으로 이어받기
+    "bandwidth_limit_mbps": 0,  # 전체 다운로드 속도 제한 (Mbit/s, 0 = 무제한)
+    # 시간대별 제한 (예: [{"days": [0, 1, 2, 3, 4], "start": "09:00", "end": "18:00", "limit_mbps": 20}])
+    "bandwidth_schedule": [],
+    "bandwidth_override_mbps": None,  # 화면에서 직접 고른 제한 (None = 위 기본값/일정 사용)
+    "fragment_concurrency": "auto",  # 조각 동시 요청 수 ("auto" = 처리량에 맞춰 자동 조절, 숫자 = 고정)
+    "mp3_quality": "192",  # mp3 인코딩 음질 (kbps, 또는 0~9 = VBR이며 0이 최고 음질). m4a/opus는 재인코딩 없음
+    "use_download_archive": True,  # 같은 폴더에 같은 형식/화질로 이미 받은 영상은 다시 받지 않음
+    "extra_formats": [],  # 주 형식과 함께 만들 형식 (한 번만 받고 로컬에서 변환)
+    "derive_from_local": True,  # 화질이 같거나 더 좋은 파일을 받아 둔 기록이 있으면 다시 받지 않고 그 파일에서 변환
+    "metrics_port": 9477  # 127.0.0.1에서 /metrics(Prometheus), /metrics.json 제공 (0이면 끔)
 }
 
 def load_settings():
@@ -27,21 +44,42 @@ def save_settings(settings):
     except Exception as e:
         print(f"설정 저장 실패: {e}")
 
-def load_history():
-    if not os.path.exists(HISTORY_FILE):
+def load_history(path=HISTORY_FILE):
+    if not os.path.exists(path):
         return []
     try:
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
+        with open(path, 'r', encoding='utf-8') as f:
             return json.load(f)
     except:
         return []
 
-def save_history(history_data):
-    try:
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history_data, f, ensure_ascii=False, indent=4)
-    except Exception as e:
-        print(f"히스토리 저장 실패: {e}")
+# 같은 영상을 가리키는 URL(watch?v=, youtu.be/, shorts/, embed/ ...)을 하나의 ID로 묶기 위한 정규식
+VIDEO_ID_REGEX = re.compile(r'(?:[?&]v=|/(?:shorts|embed|v|live)/|youtu\.be/)([0-9A-Za-z_-]{11})(?![0-9A-Za-z_-])')
+CLIP_ID_REGEX = re.compile(r'/clip/([0-9A-Za-z_-]+)')
+
+def extract_video_id(url):
+    """URL을 정규화된 영상 ID로 변환 (클립은 'clip:ID'). 인식할 수 없으면 None"""
+    match = CLIP_ID_REGEX.search(url)
+    if match:
+        return f"clip:{match.group(1)}"
+    match = VIDEO_ID_REGEX.search(url)
+    if match:
+        return match.group(1)
+    return None
+
+def video_key(url):
+    """중복 판단/다운로드 기록용 키: 유튜브 URL은 영상 ID, 그 외에는 URL 자체"""
+    return extract_video_id(url) or url.strip()
+
+# 재생목록/채널 URL (개별 영상 URL은 제외)
+COLLECTION_URL_REGEX = re.compile(
+    r'youtube\.com/(?:playlist\?|@[^/?#]+|channel/|c/|user/)', re.IGNORECASE)
+
+def is_collection_url(url):
+    """재생목록, 채널, 채널의 /videos 탭 등 여러 영상을 담은 URL인지 확인"""
+    if VIDEO_ID_REGEX.search(url) or CLIP_ID_REGEX.search(url):
+        return False
+    return COLLECTION_URL_REGEX.search(url) is not None
 
 def validate_url(url):
     youtube_regex = (
@@ -58,8 +96,16 @@ def seconds_to_hms(seconds):
     h, m = divmod(m, 60)
     return f"{int(h):02d}:{int(m):02d}:{int(s):02d}"
 
+def format_speed(bytes_per_sec):
+    """초당 바이트를 사람이 읽기 쉬운 속도 문자열로 변환"""
+    if not bytes_per_sec:
+        return "-"
+    if bytes_per_sec >= 1024 * 1024:
+        return f"{bytes_per_sec / (1024 * 1024):.1f}MB/s"
+    return f"{bytes_per_sec / 1024:.0f}KB/s"
+
 def hms_to_seconds(hms_str):
-    """HH:MM:SS 문자열을 초(float)로 변환"""
+    """HH:MM:SS (또는 MM:SS) 문자열을 초(int)로 변환. 형식이 잘못되면 0"""
     try:
         parts = hms_str.split(':')
         if len(parts) == 3:
@@ -69,4 +115,21 @@ def hms_to_seconds(hms_str):
         else:
             return 0
     except:
-        return 0
\ No newline at end of file
+        return 0
+
+
+def parse_ranges(text):
+    """
+    "00:01:00-00:02:00, 05:00~06:30" 형식의 여러 구간을 [(시작 문자열, 끝 문자열)]로 변환.
+    구간은 쉼표/세미콜론/줄바꿈으로 구분하고 시작과 끝은 - 또는 ~로 잇는다. 잘못된 구간은 ValueError.
+    """
+    ranges = []
+    for part in re.split(r'[,;\n]+', text or ''):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.fullmatch(r'(\d{1,2}(?::\d{1,2}){1,2})\s*[-~]\s*(\d{1,2}(?::\d{1,2}){1,2})', part)
+        if not match or hms_to_seconds(match.group(2)) <= hms_to_seconds(match.group(1)):
+            raise ValueError(f"잘못된 구간: {part}")
+        ranges.append((match.group(1), match.group(2)))
+    return ranges
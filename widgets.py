@@ -1,235 +1,785 @@
 import os
 import subprocess
-import requests
-from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QLabel,
-                             QProgressBar, QMenu, QAction, QApplication, QMessageBox)
-from PyQt5.QtGui import QPixmap
-from PyQt5.QtCore import Qt, pyqtSignal
+import threading
+import time
+from collections import deque
+from PyQt5.QtWidgets import (QListView, QStyledItemDelegate, QStyle, QAbstractItemView,
+                             QMenu, QAction, QApplication, QMessageBox)
+from PyQt5.QtGui import QColor, QFont, QPen, QBrush, QPainterPath
+from PyQt5.QtCore import Qt, QEvent, QAbstractListModel, QModelIndex, QObject, QRect, QRectF, QSize, QTimer, pyqtSignal
 from downloader import DownloadWorker
-
-class DownloadItemWidget(QWidget):
-    remove_requested = pyqtSignal(QWidget)
-    cleanup_requested = pyqtSignal()
-
-    def __init__(self, url, settings, restore_data=None):
-        super().__init__()
+from scheduler import STATE_QUEUED
+from metacache import get_metadata_cache
+from thumbnails import get_thumbnail_loader, THUMBNAIL_SIZE
+from utils import seconds_to_hms, format_speed, video_key
+from progress import STAGE_POSTPROCESS
+from derive import OUTPUT_FORMATS
+from metrics import format_timings
+from theme import COLORS, STATE_COLORS
+
+ITEM_HEIGHT = 110
+ItemRole = Qt.UserRole + 1
+FRAME_SAMPLES = 300  # 화면 갱신 시간 통계에 쓰는 최근 그리기 횟수
+
+# --- 항목 상태 ---
+STATE_WAITING = 'queued'
+STATE_RUNNING = 'running'
+STATE_DONE = 'done'
+STATE_ERROR = 'error'
+STATE_STOPPED = 'stopped'
+STATE_INTERRUPTED = 'interrupted'  # 앱 종료/비정상 종료로 멈춘 항목 (다음 실행 시 자동 이어받기)
+
+# 다음 실행 시 자동으로 이어받을 상태 (비정상 종료 시에는 queued/running 상태로 남아 있음)
+RESUMABLE_STATES = (STATE_WAITING, STATE_RUNNING, STATE_INTERRUPTED)
+
+# 대역폭 우선순위 (메뉴 표시 이름, 가중치)
+BANDWIDTH_WEIGHTS = [("높음", 3.0), ("보통", 1.0), ("낮음", 0.3)]
+
+# 위젯 없이 실행 중인 워커가 GC로 정리되지 않도록 보관
+_active_workers = set()
+
+
+def wait_for_workers(timeout):
+    """앱 종료 시: 중지한 다운로드 스레드가 끝나기를 최대 timeout초 기다림. 모두 끝났으면 True"""
+    deadline = time.monotonic() + timeout
+    for worker in list(_active_workers):
+        if not worker.wait(int(max(deadline - time.monotonic(), 0) * 1000)):
+            return False
+    return True
+
+
+# --- 진행률 일괄 반영기 ---
+class ProgressHub(QObject):
+    """
+    등록된 작업들의 진행 상태를 고정 주기(기본 10Hz)로 한 번에 GUI에 반영한다.
+    워커는 콜백마다 신호를 보내지 않고 JobProgress만 갱신하므로
+    동시 다운로드 수와 관계없이 GUI 스레드 부하가 일정하다.
+    """
+    flushed = pyqtSignal()
+
+    def __init__(self, interval_ms=100, parent=None):
+        super().__init__(parent)
+        self._jobs = {}  # id(progress) -> (progress, callback)
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+
+    def register(self, progress, callback):
+        """callback(snapshot)은 GUI 스레드에서 변경이 있을 때만 호출된다"""
+        self._jobs[id(progress)] = (progress, callback)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def unregister(self, progress, final_flush=True):
+        entry = self._jobs.pop(id(progress), None)
+        if entry and final_flush:
+            snap = progress.snapshot()
+            if snap:
+                entry[1](snap)
+                self.flushed.emit()
+        if not self._jobs:
+            self._timer.stop()
+
+    def flush(self):
+        changed = False
+        for progress, callback in list(self._jobs.values()):
+            snap = progress.snapshot()
+            if snap:
+                callback(snap)
+                changed = True
+        if changed:
+            self.flushed.emit()
+
+# --- 다운로드 항목 (화면에 그려지는 위젯이 아닌 상태 + 작업 제어 객체) ---
+class DownloadItem:
+    def __init__(self, url, settings, restore_data=None, scheduler=None, info=None, history=None,
+                 progress_hub=None, title=None):
         self.url = url
         self.settings = settings
+        self.scheduler = scheduler
+        self.progress_hub = progress_hub  # 진행률을 주기적으로 모아서 반영 (없으면 반영하지 않음)
+        self.history = history  # HistoryStore (상태 변경 시 해당 항목만 기록)
+        self.history_id = None
+        self._saved_milestone = None
+        self.resume_data = None  # 이어받기용 {'target_path', 'format_id', 'part_file'}
+        self.prefetched_info = info  # 첫 다운로드에서만 사용 (재시도 시 포맷 URL 만료 가능)
         self.worker = None
         self.is_completed = False
         self.saved_path = None
         self.restore_data = restore_data
+        self.model = None
+
+        # 화면 표시용 상태
+        self.title = title or "정보 불러오는 중..."  # 재생목록 항목은 목록에서 받은 제목을 먼저 표시
+        self.meta_text = f"- | - | {self.settings['format']} | {self.settings['quality']} | -"
+        self.status_text = "대기 중..."
+        self.progress = 0
+        self.state = STATE_WAITING
 
         # 메타데이터 저장을 위한 변수
         self.cached_duration = ""
         self.cached_ext = ""
         self.cached_type = ""
+        self.thumbnail_url = ""  # 썸네일 로더의 캐시 키 (QPixmap은 로더의 메모리 캐시에만 둠)
+        self.thumbnail_requested = False  # 로드 요청 후 아직 받지 못한 상태
+        self.thumbnail_failed = False  # 받지 못한 썸네일 (그릴 때마다 다시 요청하지 않음)
+        self._thumbnail_started = None
 
-        self.init_ui()
+        # 단계별 소요 시간 (metrics.JobTimings.summary 형식, 히스토리에 함께 저장)
+        self.timings = []
+        self.thumbnail_timing = None
 
         if self.restore_data:
             self.restore_state()
         else:
-            self.start_download()
-
-    def init_ui(self):
-        self.setFixedHeight(110)
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #2b2b2b; 
-                border-bottom: 1px solid #555; 
-            }
-        """)
-
-        layout = QHBoxLayout()
-        layout.setContentsMargins(10, 10, 10, 10)
-
-        # 썸네일
-        self.thumb_label = QLabel()
-        self.thumb_label.setFixedSize(120, 68)
-        self.thumb_label.setStyleSheet("background-color: black; border: none;")
-        self.thumb_label.setScaledContents(True)
-        layout.addWidget(self.thumb_label)
-
-        # 정보 영역
-        info_layout = QVBoxLayout()
-        info_layout.setSpacing(2)
-
-        # 1. 제목
-        self.title_label = QLabel("정보 불러오는 중...")
-        self.title_label.setStyleSheet("color: white; font-weight: bold; font-size: 14px; border: none; background: transparent;")
-        info_layout.addWidget(self.title_label)
-
-        # 2. 메타 정보 (초기값)
-        self.meta_label = QLabel(f"- | - | {self.settings['format']} | {self.settings['quality']} | -")
-        self.meta_label.setStyleSheet("color: #aaaaaa; font-size: 12px; border: none; background: transparent;")
-        info_layout.addWidget(self.meta_label)
-
-        # 3. 상태 메시지
-        self.status_label = QLabel("대기 중...")
-        self.status_label.setStyleSheet("color: #3498db; font-size: 11px; border: none; background: transparent;")
-        info_layout.addWidget(self.status_label)
-
-        # 4. 프로그레스 바
-        self.pbar = QProgressBar()
-        self.pbar.setFixedHeight(8)
-        self.pbar.setStyleSheet("""
-            QProgressBar { border: none; background-color: #444; border-radius: 4px; }
-            QProgressBar::chunk { background-color: #3498db; border-radius: 4px; }
-        """)
-        info_layout.addWidget(self.pbar)
-
-        layout.addLayout(info_layout)
-        self.setLayout(layout)
-
-        self.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.customContextMenuRequested.connect(self.show_context_menu)
+            if self.history is not None:
+                self.history_id = self.history.add(self.get_state())
+            self.enqueue_download()
+
+    def notify(self):
+        """모델에 변경 알림 (보이는 행만 다시 그려짐)"""
+        if self.model is not None:
+            self.model.item_changed(self)
+
+    def set_status(self, text, state=None):
+        self.status_text = text
+        if state is not None:
+            self.state = state
+            self.persist()
+        self.notify()
+
+    def persist(self):
+        """현재 상태를 히스토리 저장소에 기록 (앱 종료로 닫힌 뒤 늦게 온 신호는 무시)"""
+        if self.history is not None and self.history_id is not None and not self.history.closed:
+            try:
+                self.history.update(self.history_id, self.get_state())
+            except Exception as e:
+                print(f"히스토리 저장 실패: {e}")
 
     def restore_state(self):
         data = self.restore_data
-        self.title_label.setText(data.get('title', 'Unknown'))
-        self.meta_label.setText(data.get('meta_text', ''))
+        self.history_id = data.get('history_id')
+        self.resume_data = data.get('resume')
+        self.title = data.get('title', 'Unknown')
+        self.meta_text = data.get('meta_text', '')
         self.saved_path = data.get('saved_path', None)
+        self.thumbnail_url = data.get('thumbnail', '')  # 화면에 보일 때 로드
+        self.timings = data.get('timings') or []
 
         if data.get('is_completed', False):
-            self.pbar.setValue(100)
-            self.pbar.setStyleSheet("QProgressBar::chunk { background-color: #2ecc71; }")
-            self.status_label.setText("다운로드 완료")
-            self.status_label.setStyleSheet("color: #2ecc71; font-size: 11px; border: none; background: transparent;")
+            self.progress = 100
+            self.status_text = "다운로드 완료"
+            self.state = STATE_DONE
             self.is_completed = True
         else:
-            self.pbar.setValue(int(data.get('progress', 0)))
-            self.status_label.setText("중단됨 (이전 세션)")
-            self.status_label.setStyleSheet("color: #e67e22; font-size: 11px; border: none; background: transparent;")
-            self.pbar.setStyleSheet("QProgressBar::chunk { background-color: #e67e22; }")
+            self.progress = int(data.get('progress', 0))
+            self.status_text = "중단됨 (이전 세션)"
+            saved_state = data.get('state')
+            self.state = STATE_INTERRUPTED if saved_state in RESUMABLE_STATES else STATE_STOPPED
 
     def get_state(self):
         return {
             'url': self.url,
             'settings': self.settings,
-            'title': self.title_label.text(),
-            'meta_text': self.meta_label.text(),
-            'progress': self.pbar.value(),
+            'title': self.title,
+            'meta_text': self.meta_text,
+            'progress': int(self.progress),
             'is_completed': self.is_completed,
-            'saved_path': self.saved_path
+            'saved_path': self.saved_path,
+            'thumbnail': self.thumbnail_url,
+            'state': self.state,
+            'resume': self.resume_data,
+            'timings': self.all_timings()
         }
 
+    def all_timings(self):
+        """작업 단계 기록 + 썸네일 (썸네일은 작업과 따로 받으므로 항목에서 잰다)"""
+        if self.thumbnail_timing is None:
+            return self.timings
+        return [t for t in self.timings if t['phase'] != 'thumbnail'] + [self.thumbnail_timing]
+
+    def enqueue_download(self):
+        """스케줄러 대기열에 등록 (스케줄러가 없으면 바로 시작)"""
+        if self.scheduler is None:
+            self.start_download()
+            return
+        self.progress = 0
+        self.is_completed = False
+        self.show_cached_summary()
+        self.set_status("대기 중...", STATE_WAITING)
+        self.scheduler.submit(self)
+
+    def show_cached_summary(self):
+        """캐시된 메타데이터가 있으면 대기 중에도 제목/길이를 바로 표시"""
+        summary = get_metadata_cache().get_summary(self.url)
+        if not summary:
+            return
+        if summary.get('title'):
+            self.title = summary['title']
+        self.load_thumbnail(summary.get('thumbnail', ''))
+        if self.settings.get('mode') == 'clip':
+            duration = f"{self.settings.get('start_time')} ~ {self.settings.get('end_time')}"
+        else:
+            duration = seconds_to_hms(summary.get('duration') or 0)
+        self.meta_text = f"{duration} | - | {self.settings['format']} | {self.settings['quality']} | -"
+
     def start_download(self):
-        self.pbar.setValue(0)
+        self.progress = 0
         self.is_completed = False
-        self.worker = DownloadWorker(self.url, self.settings)
+        self.worker = DownloadWorker(self.url, self.settings, info=self.prefetched_info, resume=self.resume_data)
+        self.prefetched_info = None
         self.worker.info_signal.connect(self.update_info)
-        self.worker.progress_signal.connect(self.update_progress)
+        self.worker.resume_signal.connect(self.on_resume_data)
+        if self.progress_hub is not None:
+            self.progress_hub.register(self.worker.progress, self.update_progress)
         self.worker.finished_signal.connect(self.on_finished)
         self.worker.error_signal.connect(self.on_error)
-        self.worker.start()
+        worker = self.worker
+        # 스레드는 다운로드가 끝나면 종료되지만 후처리 풀에서 병합/변환하는 동안에는 워커(신호)를 유지
+        _active_workers.add(worker)
+        worker.done_signal.connect(lambda: _active_workers.discard(worker))
+        worker.done_signal.connect(lambda: self.on_job_done(worker))
+        if self.progress_hub is not None:
+            hub = self.progress_hub
+            worker.done_signal.connect(lambda: hub.unregister(worker.progress, final_flush=False))
+        if self.scheduler is not None:
+            # 다운로드 슬롯은 스레드가 끝나는 즉시(후처리 전) 반납해 다음 다운로드를 시작
+            scheduler = self.scheduler
+            worker.finished.connect(lambda job=self: scheduler.job_done(job))
+        self.set_status("다운로드 준비 중...", STATE_RUNNING)
+        worker.start()
+
+    def is_queued(self):
+        return self.scheduler is not None and self.scheduler.state_of(self) == STATE_QUEUED
+
+    def is_running(self):
+        """다운로드 중이거나 후처리(병합/변환) 중"""
+        return self.worker is not None and (self.worker.isRunning() or self.worker.is_postprocessing())
+
+    def move_to_front(self):
+        if self.scheduler is not None:
+            self.scheduler.move_to_front(self)
+
+    def set_bandwidth_weight(self, weight):
+        """전체 속도 제한 안에서 이 항목이 받을 몫의 비율 (다운로드 중에도 즉시 반영)"""
+        self.settings['bandwidth_weight'] = weight
+        if self.is_running():
+            self.worker.job.set_bandwidth_weight(weight)
+        self.persist()
 
     def update_info(self, info):
-        self.title_label.setText(info['title'])
+        self.title = info['title']
         # 나중에 업데이트를 위해 캐싱
         self.cached_duration = info['duration']
         self.cached_ext = info['ext']
         self.cached_type = info['video_type']
 
-        meta_text = f"{info['duration']} - {info['filesize']} - {info['ext']} - {self.settings['quality']} - {info['video_type']}"
-        self.meta_label.setText(meta_text)
-
-        try:
-            image_data = requests.get(info['thumbnail']).content
-            pixmap = QPixmap()
-            pixmap.loadFromData(image_data)
-            self.thumb_label.setPixmap(pixmap)
-        except:
-            pass
+        self.meta_text = f"{info['duration']} - {info['filesize']} - {info['ext']} - {self.settings['quality']} - {info['video_type']}"
+        self.load_thumbnail(info['thumbnail'])
+        self.persist()
+        self.notify()
 
-    def update_progress(self, value, msg):
-        self.pbar.setValue(int(value))
-        if value < 100:
-            self.status_label.setText(f"{msg} ({value:.1f}%)")
+    def load_thumbnail(self, url):
+        """썸네일은 백그라운드에서 받아 라벨 크기로 축소된 이미지를 받음"""
+        if not url or (url == self.thumbnail_url and self.thumbnail_requested):
+            return
+        self.thumbnail_url = url
+        self.thumbnail_requested = True
+        self.thumbnail_failed = False
+        if self.thumbnail_timing is None:
+            self._thumbnail_started = time.time()
+        get_thumbnail_loader().request(url, self.set_thumbnail)
+
+    def set_thumbnail(self, pixmap):
+        # 이미지는 로더의 메모리 캐시에 있으므로 그릴 때 URL로 찾음 (None이면 받지 못함)
+        self.thumbnail_requested = False
+        if pixmap is None:
+            self.thumbnail_failed = True
+        elif self._thumbnail_started is not None:
+            seconds = time.time() - self._thumbnail_started
+            self.thumbnail_timing = {'phase': 'thumbnail', 'start': self._thumbnail_started,
+                                     'seconds': round(seconds, 3), 'bytes': None, 'throughput': None}
+            self._thumbnail_started = None
+        self.notify()
+
+    def update_progress(self, snap):
+        """ProgressHub가 주기적으로 호출. 다시 그리기는 모델이 한 번에 처리"""
+        if self.worker is None:
+            return
+        value = snap['percent']
+        self.progress = value
+        if snap.get('stage') == STAGE_POSTPROCESS:
+            # 후처리 단계는 진행률을 0부터 다시 표시 (대기 중에는 상태만)
+            self.status_text = f"{snap['status']} ({value:.0f}%)" if value else snap['status']
+        elif value < 100:
+            text = f"{snap['status']} ({value:.1f}%)"
+            if snap.get('speed'):
+                text += f" - {format_speed(snap['speed'])}"
+            if snap.get('eta'):
+                text += f", 남은 시간 {seconds_to_hms(snap['eta'])}"
+            if snap.get('concurrency'):
+                text += f" · 동시 {snap['concurrency']}"
+            self.status_text = text
+        else:
+            self.status_text = snap['status']
+        # 진행률은 10% 단위로만 기록
+        milestone = int(value // 10)
+        if milestone != self._saved_milestone:
+            self._saved_milestone = milestone
+            self.persist()
+        if self.model is not None:
+            self.model.mark_changed(self)
+
+    def on_resume_data(self, data):
+        """임시 파일 경로/포맷을 기록해 두어 다음 세션에서 같은 .part 파일을 이어받음"""
+        self.resume_data = data
+        self.persist()
 
     # [수정] 완료 시 실제 파일 크기를 받아서 UI 업데이트
     def on_finished(self, final_path, final_size):
-        self.pbar.setValue(100)
-        self.pbar.setStyleSheet("QProgressBar::chunk { background-color: #2ecc71; }")
-
-        self.status_label.setText("다운로드 완료")
-        self.status_label.setStyleSheet("color: #2ecc71; font-size: 11px; border: none; background: transparent;")
+        self.progress = 100
         self.saved_path = final_path
+        self.resume_data = None
         self.worker = None
         self.is_completed = True
 
         # 실제 파일 크기로 메타 텍스트 업데이트
         if self.cached_duration: # 정보가 로드된 상태라면
-            new_meta_text = f"{self.cached_duration} - {final_size} - {self.cached_ext} - {self.settings['quality']} - {self.cached_type}"
-            self.meta_label.setText(new_meta_text)
+            self.meta_text = f"{self.cached_duration} - {final_size} - {self.cached_ext} - {self.settings['quality']} - {self.cached_type}"
+        self.set_status("다운로드 완료", STATE_DONE)
 
     def on_error(self, err_msg):
-        self.pbar.setStyleSheet("QProgressBar::chunk { background-color: #e74c3c; }")
-        self.status_label.setText(f"오류: {err_msg}")
-        self.status_label.setStyleSheet("color: #e74c3c; font-size: 11px; border: none; background: transparent;")
         self.worker = None
+        self.set_status(f"오류: {err_msg}", STATE_ERROR)
+
+    def on_job_done(self, worker):
+        """후처리까지 끝난 작업의 단계 기록을 보관"""
+        summary = worker.job.timings.summary()
+        if summary:
+            self.timings = summary
+            self.persist()
 
     def stop_download(self):
-        if self.worker and self.worker.isRunning():
+        if self.scheduler is not None and self.scheduler.cancel(self):
+            self.set_status("다운로드 중지됨", STATE_STOPPED)
+        elif self.is_running():
+            self.worker.stop()
+            self.set_status("다운로드 중지됨", STATE_STOPPED)
+
+    def interrupt(self):
+        """앱 종료 시 호출. 다음 실행 때 이어받을 수 있도록 중단 상태로 기록"""
+        if self.scheduler is not None and self.scheduler.cancel(self):
+            self.set_status("중단됨 (이전 세션)", STATE_INTERRUPTED)
+        elif self.is_running():
             self.worker.stop()
-            self.status_label.setText("다운로드 중지됨")
+            self.set_status("중단됨 (이전 세션)", STATE_INTERRUPTED)
+
+    def can_auto_resume(self):
+        return not self.is_completed and self.state in RESUMABLE_STATES
 
     def retry_download(self):
-        if self.worker and self.worker.isRunning():
+        """재시도/이어받기 (남아 있는 .part 파일이 있으면 이어서 받음)"""
+        if self.is_running() or self.is_queued():
+            return
+        self.enqueue_download()
+        if not self.is_running():
+            self.set_status("재시도 대기 중...")
+
+
+# --- 리스트 모델 ---
+class DownloadListModel(QAbstractListModel):
+    """
+    DownloadItem 목록. 새 항목이 맨 위에 오도록 내부에는 역순으로 저장하여
+    추가 시 기존 행 번호 계산이 바뀌지 않게 한다.
+    같은 영상 확인은 영상 ID 색인으로 한다 (youtu.be/ID, watch?v=ID&t=30, shorts/ID는 같은 영상).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items = []  # 오래된 항목이 앞쪽
+        self._positions = {}  # id(item) -> self._items 내 위치
+        self._by_video = {}  # video_key(url) -> [item]
+        self._pending_changes = set()
+        # 히스토리 저장소에서 스크롤에 맞춰 페이지 단위로 불러오기
+        self._history = None
+        self._completed_only = False
+        self._item_factory = None
+        self._page_size = 200
+        self._oldest_id = None
+        self._history_exhausted = True
+
+    def set_history_source(self, history, item_factory, page_size=200, completed_only=False):
+        """item_factory(state)로 저장된 항목을 DownloadItem으로 만들어 필요할 때마다 추가"""
+        self._history = history
+        self._completed_only = completed_only
+        self._item_factory = item_factory
+        self._page_size = page_size
+        self._oldest_id = None
+        self._history_exhausted = False
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._history_exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._history_exhausted:
+            return
+        if self._oldest_id is None:
+            states = self._history.load_page(0, self._page_size, completed_only=self._completed_only)
+        else:
+            states = self._history.load_before(self._oldest_id, self._page_size, completed_only=self._completed_only)
+        if len(states) < self._page_size:
+            self._history_exhausted = True
+        if not states:
+            return
+        self._oldest_id = states[-1]['history_id']
+        self.append_items([self._item_factory(state) for state in states])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.item_at(index.row())
+        if role == ItemRole:
+            return item
+        if role == Qt.DisplayRole:
+            return item.title
+        if role == Qt.ToolTipRole:
+            return item.url
+        return None
+
+    def item_at(self, row):
+        return self._items[len(self._items) - 1 - row]
+
+    def row_of(self, item):
+        pos = self._positions.get(id(item))
+        if pos is None:
+            return -1
+        return len(self._items) - 1 - pos
+
+    def items(self):
+        """화면 순서(최신 항목 먼저)대로 반환"""
+        return list(reversed(self._items))
+
+    def find_active(self, url):
+        """같은 영상의 완료되지 않은 항목 (URL 형태와 무관). 없으면 None"""
+        for item in self._by_video.get(video_key(url), ()):
+            if not item.is_completed:
+                return item
+        return None
+
+    def _index(self, item):
+        self._by_video.setdefault(video_key(item.url), []).append(item)
+
+    def _unindex(self, item):
+        key = video_key(item.url)
+        entries = self._by_video.get(key)
+        if entries and item in entries:
+            entries.remove(item)
+            if not entries:
+                del self._by_video[key]
+
+    def add_item(self, item):
+        """맨 위에 항목 추가"""
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._positions[id(item)] = len(self._items)
+        self._items.append(item)
+        self._index(item)
+        item.model = self
+        self.endInsertRows()
+
+    def add_items(self, items):
+        """여러 항목을 한 번에 추가 (items는 화면 순서, 첫 항목이 맨 위)"""
+        if not items:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(items) - 1)
+        for item in reversed(items):
+            self._positions[id(item)] = len(self._items)
+            self._items.append(item)
+            self._index(item)
+            item.model = self
+        self.endInsertRows()
+
+    def append_items(self, items):
+        """목록 맨 아래에 추가 (items는 화면 순서)"""
+        if not items:
+            return
+        first = len(self._items)
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        self._items[0:0] = list(reversed(items))
+        for item in items:
+            self._index(item)
+            item.model = self
+        self._positions = {id(it): i for i, it in enumerate(self._items)}
+        self.endInsertRows()
+
+    def remove_item(self, item):
+        row = self.row_of(item)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._items[self._positions[id(item)]]
+        self._unindex(item)
+        item.model = None
+        self._positions = {id(it): i for i, it in enumerate(self._items)}
+        self.endRemoveRows()
+
+    def remove_completed(self):
+        """완료된 항목 일괄 삭제"""
+        if self._history is not None:
+            self._history.remove_completed()
+        if not any(item.is_completed for item in self._items):
             return
-        self.status_label.setText("재시도 중...")
-        self.status_label.setStyleSheet("color: #3498db; font-size: 11px; border: none; background: transparent;")
-        self.pbar.setStyleSheet("QProgressBar::chunk { background-color: #3498db; border-radius: 4px; }")
-        self.start_download()
+        self.beginResetModel()
+        for item in self._items:
+            if item.is_completed:
+                self._unindex(item)
+                item.model = None
+        self._items = [item for item in self._items if not item.is_completed]
+        self._positions = {id(it): i for i, it in enumerate(self._items)}
+        self.endResetModel()
+
+    def item_changed(self, item):
+        row = self.row_of(item)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def mark_changed(self, item):
+        """진행률처럼 잦은 변경은 모아두었다가 flush_changes()에서 한 번에 알림"""
+        self._pending_changes.add(id(item))
+
+    def flush_changes(self):
+        if not self._pending_changes:
+            return
+        rows = [len(self._items) - 1 - self._positions[key]
+                for key in self._pending_changes if key in self._positions]
+        self._pending_changes.clear()
+        if rows:
+            self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)))
+
+
+# --- 항목 그리기 ---
+class DownloadItemDelegate(QStyledItemDelegate):
+    """항목마다 위젯을 만들지 않고 보이는 행만 직접 그린다"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.title_font = QFont()
+        self.title_font.setPixelSize(14)
+        self.title_font.setBold(True)
+        self.meta_font = QFont()
+        self.meta_font.setPixelSize(12)
+        self.status_font = QFont()
+        self.status_font.setPixelSize(11)
+        self.colors = {state: QColor(color) for state, color in STATE_COLORS.items()}
+        self.background = QColor(COLORS['item'])
+        self.selected_background = QColor(COLORS['item_selected'])
+        self.border = QColor(COLORS['border'])
+        self.meta_color = QColor(COLORS['muted'])
+        self.bar_background = QColor(COLORS['bar'])
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), ITEM_HEIGHT)
+
+    def paint(self, painter, option, index):
+        item = index.data(ItemRole)
+        if item is None:
+            return
+        rect = option.rect
+        painter.save()
+        painter.setRenderHint(painter.Antialiasing)
+
+        selected = option.state & QStyle.State_Selected
+        painter.fillRect(rect, self.selected_background if selected else self.background)
+        painter.setPen(QPen(self.border))
+        painter.drawLine(rect.left(), rect.bottom(), rect.right(), rect.bottom())
+
+        # 썸네일
+        thumb_w, thumb_h = THUMBNAIL_SIZE
+        thumb_rect = QRect(rect.left() + 10, rect.top() + (rect.height() - thumb_h) // 2, thumb_w, thumb_h)
+        painter.fillRect(thumb_rect, Qt.black)
+        pm = get_thumbnail_loader().cached(item.thumbnail_url) if item.thumbnail_url else None
+        if pm is not None:
+            x = thumb_rect.left() + (thumb_w - pm.width()) // 2
+            y = thumb_rect.top() + (thumb_h - pm.height()) // 2
+            painter.drawPixmap(x, y, pm)
+        elif item.thumbnail_url and not item.thumbnail_requested and not item.thumbnail_failed:
+            # 복원된 항목이 처음 보일 때나 메모리 캐시에서 밀려난 뒤 다시 로드 (디스크 캐시 우선)
+            item.load_thumbnail(item.thumbnail_url)
+
+        # 정보 영역
+        left = thumb_rect.right() + 12
+        width = rect.right() - 10 - left
+        color = self.colors.get(item.state, self.colors[STATE_RUNNING])
+
+        painter.setFont(self.title_font)
+        painter.setPen(Qt.white)
+        title = painter.fontMetrics().elidedText(item.title, Qt.ElideRight, width)
+        painter.drawText(QRect(left, rect.top() + 14, width, 20), Qt.AlignLeft | Qt.AlignVCenter, title)
+
+        painter.setFont(self.meta_font)
+        painter.setPen(self.meta_color)
+        meta = painter.fontMetrics().elidedText(item.meta_text, Qt.ElideRight, width)
+        painter.drawText(QRect(left, rect.top() + 36, width, 18), Qt.AlignLeft | Qt.AlignVCenter, meta)
+
+        painter.setFont(self.status_font)
+        painter.setPen(color)
+        status = painter.fontMetrics().elidedText(item.status_text, Qt.ElideRight, width)
+        painter.drawText(QRect(left, rect.top() + 56, width, 16), Qt.AlignLeft | Qt.AlignVCenter, status)
+
+        # 프로그레스 바
+        bar = QRectF(left, rect.top() + 80, width, 8)
+        painter.setPen(Qt.NoPen)
+        path = QPainterPath()
+        path.addRoundedRect(bar, 4, 4)
+        painter.fillPath(path, QBrush(self.bar_background))
+        ratio = max(0.0, min(float(item.progress), 100.0)) / 100.0
+        if ratio > 0:
+            chunk = QPainterPath()
+            chunk.addRoundedRect(QRectF(bar.left(), bar.top(), bar.width() * ratio, bar.height()), 4, 4)
+            painter.fillPath(chunk, QBrush(color))
+
+        painter.restore()
+
+
+# --- 다운로드 리스트 뷰 ---
+class DownloadListView(QListView):
+    remove_requested = pyqtSignal(object)
+    cleanup_requested = pyqtSignal()
+    derive_requested = pyqtSignal(object, str)  # (완료된 항목, 만들 형식)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("downloadList")  # 앱 스타일시트의 QListView#downloadList
+        self._frame_lock = threading.Lock()
+        self._frame_times = deque(maxlen=FRAME_SAMPLES)  # 최근 그리기 시간 (초)
+        self.list_model = DownloadListModel(self)
+        self.setModel(self.list_model)
+        self.setItemDelegate(DownloadItemDelegate(self))
+        # 모든 행 높이가 같으므로 보이는 행만 계산/그리기
+        self.setUniformItemSizes(True)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+
+    def viewportEvent(self, event):
+        if event.type() != QEvent.Paint:
+            return super().viewportEvent(event)
+        started = time.perf_counter()
+        result = super().viewportEvent(event)
+        with self._frame_lock:
+            self._frame_times.append(time.perf_counter() - started)
+        return result
+
+    def frame_stats(self):
+        """최근 그리기 시간 (GUI 스레드에서 목록 한 번 그리는 데 걸린 ms)"""
+        with self._frame_lock:
+            samples = sorted(self._frame_times)
+        if not samples:
+            return {'frames': 0}
+        return {
+            'frames': len(samples),
+            'p50_ms': round(samples[len(samples) // 2] * 1000, 2),
+            'p95_ms': round(samples[min(int(len(samples) * 0.95), len(samples) - 1)] * 1000, 2),
+            'max_ms': round(samples[-1] * 1000, 2),
+        }
+
+    def _menu(self):
+        return QMenu(self)  # 스타일은 앱 스타일시트(theme)에서
 
     def show_context_menu(self, pos):
-        menu = QMenu(self)
-        menu.setStyleSheet("""
-            QMenu { background-color: #333; color: white; border: 1px solid #555; }
-            QMenu::item:selected { background-color: #555; }
-        """)
+        index = self.indexAt(pos)
+        item = index.data(ItemRole) if index.isValid() else None
+        menu = self._menu()
+
+        cleanup_action = QAction("완료된 항목 전체 삭제", self)
+        cleanup_action.triggered.connect(self.cleanup_requested.emit)
+
+        if item is None:
+            menu.addAction(cleanup_action)
+            menu.exec_(self.viewport().mapToGlobal(pos))
+            return
 
         open_loc_action = QAction("파일 위치 열기", self)
         copy_action = QAction("영상 URL 복사", self)
         stop_action = QAction("다운로드 중지", self)
+        front_action = QAction("맨 앞으로 이동", self)
         retry_action = QAction("재시도", self)
         delete_action = QAction("항목 삭제", self)
-        cleanup_action = QAction("완료된 항목 전체 삭제", self)
 
-        open_loc_action.triggered.connect(self.open_file_location)
-        copy_action.triggered.connect(lambda: QApplication.clipboard().setText(self.url))
-        stop_action.triggered.connect(self.stop_download)
-        retry_action.triggered.connect(self.retry_download)
-        delete_action.triggered.connect(lambda: self.remove_requested.emit(self))
-        cleanup_action.triggered.connect(self.cleanup_requested.emit)
-
-        if self.is_completed:
+        timings_action = QAction("작업 시간 보기", self)
+        open_loc_action.triggered.connect(lambda: self.open_file_location(item))
+        timings_action.triggered.connect(lambda: self.show_timings(item))
+        copy_action.triggered.connect(lambda: QApplication.clipboard().setText(item.url))
+        stop_action.triggered.connect(item.stop_download)
+        front_action.triggered.connect(item.move_to_front)
+        retry_action.triggered.connect(item.retry_download)
+        delete_action.triggered.connect(lambda: self.remove_requested.emit(item))
+
+        # 속도 제한이 있을 때 항목별로 나눠 받을 비율
+        weight_menu = self._menu()
+        weight_menu.setTitle("대역폭 우선순위")
+        current_weight = item.settings.get('bandwidth_weight', 1.0)
+        for label, weight in BANDWIDTH_WEIGHTS:
+            action = QAction(label, weight_menu)
+            action.setCheckable(True)
+            action.setChecked(current_weight == weight)
+            action.triggered.connect(lambda checked, w=weight: item.set_bandwidth_weight(w))
+            weight_menu.addAction(action)
+
+        # 받아 둔 파일에서 다른 형식 만들기 (다시 받지 않음, 클립 제외)
+        derive_menu = self._menu()
+        derive_menu.setTitle("다른 형식으로 저장")
+        for fmt in OUTPUT_FORMATS:
+            if fmt == item.settings['format']:
+                continue
+            action = QAction(fmt, derive_menu)
+            action.triggered.connect(lambda checked, f=fmt: self.derive_requested.emit(item, f))
+            derive_menu.addAction(action)
+
+        if item.is_completed:
             menu.addAction(open_loc_action)
+            if item.settings.get('mode') != 'clip':
+                menu.addMenu(derive_menu)
             menu.addSeparator()
 
         menu.addAction(copy_action)
+        if item.all_timings():
+            menu.addAction(timings_action)
         menu.addAction(stop_action)
+        if item.is_queued():
+            menu.addAction(front_action)
+        if not item.is_completed:
+            menu.addMenu(weight_menu)
         menu.addAction(retry_action)
         menu.addSeparator()
         menu.addAction(delete_action)
         menu.addSeparator()
         menu.addAction(cleanup_action)
 
-        menu.exec_(self.mapToGlobal(pos))
+        menu.exec_(self.viewport().mapToGlobal(pos))
+
+    def show_timings(self, item):
+        lines = format_timings(item.all_timings())
+        QMessageBox.information(self, "작업 시간", f"{item.title}\n\n" + "\n".join(lines))
 
-    def open_file_location(self):
-        if not self.saved_path:
+    def open_file_location(self, item):
+        if not item.saved_path:
             QMessageBox.warning(self, "알림", "저장된 파일 경로 정보가 없습니다.")
             return
 
-        if os.path.exists(self.saved_path):
+        if os.path.exists(item.saved_path):
             try:
                 if os.name == 'nt':
-                    subprocess.Popen(['explorer', '/select,', os.path.normpath(self.saved_path)])
+                    subprocess.Popen(['explorer', '/select,', os.path.normpath(item.saved_path)])
                 else:
-                    folder_path = os.path.dirname(self.saved_path)
+                    folder_path = os.path.dirname(item.saved_path)
                     subprocess.Popen(['xdg-open' if os.name == 'posix' else 'open', folder_path])
             except Exception as e:
                 QMessageBox.warning(self, "오류", f"폴더를 여는 중 오류가 발생했습니다.\n{e}")
         else:
-            QMessageBox.warning(self, "파일 없음", "파일을 찾을 수 없습니다.")
\ No newline at end of file
+            QMessageBox.warning(self, "파일 없음", "파일을 찾을 수 없습니다.")